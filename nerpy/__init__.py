@@ -1,5 +1,6 @@
 from nerpy.annotator import MentionAnnotator, SequenceMentionAnnotator, Trainable
 from nerpy.document import (
+    CompactSentence,
     Document,
     DocumentBuilder,
     EntityType,
@@ -7,6 +8,7 @@ from nerpy.document import (
     MentionType,
     Sentence,
     Token,
+    TokenVocabulary,
 )
 from nerpy.encoding import (
     BILOU,
@@ -22,5 +24,10 @@ from nerpy.encoding import (
 )
 from nerpy.ingest.conll import CoNLLIngester, write_conll
 from nerpy.ingest.ontonotes import OntoNotesIngester
-from nerpy.io import load_json, load_pickled_documents, pickle_documents
-from nerpy.scoring import Score, ScoringResult, score_prf
+from nerpy.io import (
+    load_documents,
+    load_json,
+    load_pickled_documents,
+    pickle_documents,
+)
+from nerpy.scoring import Score, Scorer, ScoringResult, score_prf
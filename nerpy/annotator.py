@@ -1,11 +1,15 @@
+import multiprocessing
+import pickle
 import time
 from abc import ABCMeta, abstractmethod
+from itertools import islice
 from os import PathLike
-from typing import Iterable, Sequence, Union
+from typing import Iterable, Iterator, List, Optional, Sequence, Union
 
 from nerpy.document import Document, Mention
 from nerpy.encoding import MentionEncoder
 from nerpy.features import ExtractedFeatures, SentenceFeatureExtractor
+from nerpy.scoring import Scorer
 
 
 class MentionAnnotator(metaclass=ABCMeta):
@@ -16,6 +20,55 @@ class MentionAnnotator(metaclass=ABCMeta):
     def add_mentions(self, doc: Document) -> Document:
         return doc.copy_with_mentions(self.mentions(doc))
 
+    def annotate_batch(
+        self, docs: Iterable[Document], *, workers: int = 1, chunksize: int = 1
+    ) -> List[Document]:
+        """Add mentions to each document, returning the documents in the same order.
+
+        If workers is greater than one, documents are annotated in a pool of processes,
+        each of which loads its own copy of the annotator once.
+        """
+        if workers < 1:
+            raise ValueError(f"Number of workers must be positive: {workers}")
+
+        if workers == 1:
+            return [self.add_mentions(doc) for doc in docs]
+
+        annotator_bytes = pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL)
+        with multiprocessing.Pool(
+            workers, initializer=_init_worker, initargs=(annotator_bytes,)
+        ) as pool:
+            return list(pool.imap(_add_mentions_worker, docs, chunksize=chunksize))
+
+    def score_batch(
+        self, gold_docs: Iterable[Document], *, workers: int = 1, chunksize: int = 10
+    ) -> Scorer:
+        """Annotate copies of gold documents without their mentions and score them.
+
+        If workers is greater than one, each chunk of documents is annotated and scored
+        in a pool of processes, which return only their counts.
+        """
+        if workers < 1:
+            raise ValueError(f"Number of workers must be positive: {workers}")
+
+        scorer = Scorer()
+        if workers == 1:
+            for gold_doc in gold_docs:
+                scorer.update(
+                    gold_doc, self.add_mentions(gold_doc.copy_without_mentions())
+                )
+            return scorer
+
+        annotator_bytes = pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL)
+        with multiprocessing.Pool(
+            workers, initializer=_init_worker, initargs=(annotator_bytes,)
+        ) as pool:
+            for chunk_scorer in pool.imap_unordered(
+                _score_worker, _chunks(gold_docs, chunksize)
+            ):
+                scorer.merge(chunk_scorer)
+        return scorer
+
 
 class Trainable(metaclass=ABCMeta):
     @abstractmethod
@@ -52,21 +105,40 @@ class SequenceMentionAnnotator(MentionAnnotator, metaclass=ABCMeta):
     def to_bytes(self) -> bytes:
         raise NotImplementedError
 
+    @abstractmethod
+    def sentence_mentions(self, doc: Document) -> List[Sequence[Mention]]:
+        """Return the mentions predicted for each sentence of a document."""
+        raise NotImplementedError
+
+    def mentions(self, doc: Document) -> Sequence[Mention]:
+        return [
+            mention for mentions in self.sentence_mentions(doc) for mention in mentions
+        ]
+
+    def add_mentions(self, doc: Document) -> Document:
+        # Mentions are already grouped by sentence, so they do not need regrouping
+        return doc.copy_with_sentence_mentions(self.sentence_mentions(doc))
+
     def extract_features(self, docs: Iterable[Document]) -> ExtractedFeatures:
         # Avoid repeated lookups of these properties
         feature_extractor = self.feature_extractor
         mention_encoder = self.mention_encoder
+        # Store feature IDs instead of names if the extractor has a vocabulary
+        feature_ids = feature_extractor.vocabulary is not None
+        extract = (
+            feature_extractor.extract_ids if feature_ids else feature_extractor.extract
+        )
 
         mention_count = 0
         token_count = 0
         document_count = 0
         sentence_count = 0
         start_time = time.perf_counter()
-        features = []
+        features: list = []
         labels = []
         for doc in docs:
             for sentence, mentions in doc.sentences_with_mentions():
-                sent_x = feature_extractor.extract(sentence, doc)
+                sent_x = extract(sentence, doc)
                 sent_y = mention_encoder.encode_mentions(sentence, mentions)
                 assert len(sent_x) == len(sent_y)
                 features.append(sent_x)
@@ -83,5 +155,38 @@ class SequenceMentionAnnotator(MentionAnnotator, metaclass=ABCMeta):
             f"{token_count} tokens, {mention_count} mentions in {time.perf_counter() - start_time} "
             "seconds"
         )
+        print(f"Feature cache: {feature_extractor.cache_info()}")
+
+        return ExtractedFeatures(feature_extractor, features, labels, feature_ids)
+
+
+# Annotator loaded once by each worker process in MentionAnnotator.annotate_batch
+_worker_annotator: Optional[MentionAnnotator] = None
+
+
+def _init_worker(annotator_bytes: bytes) -> None:
+    global _worker_annotator  # pylint: disable=global-statement
+    _worker_annotator = pickle.loads(annotator_bytes)
+
+
+def _add_mentions_worker(doc: Document) -> Document:
+    assert _worker_annotator is not None
+    return _worker_annotator.add_mentions(doc)
+
+
+def _score_worker(gold_docs: List[Document]) -> Scorer:
+    assert _worker_annotator is not None
+    scorer = Scorer()
+    for gold_doc in gold_docs:
+        scorer.update(
+            gold_doc, _worker_annotator.add_mentions(gold_doc.copy_without_mentions())
+        )
+    return scorer
+
 
-        return ExtractedFeatures(feature_extractor, features, labels)
+def _chunks(docs: Iterable[Document], size: int) -> Iterator[List[Document]]:
+    docs = iter(docs)
+    chunk = list(islice(docs, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(docs, size))
@@ -3,18 +3,25 @@ import os
 import pickle
 import tempfile
 import time
+from itertools import chain, repeat
 from os import PathLike
 from pathlib import Path
 from typing import IO, Dict, Iterable, List, Mapping, Optional, Sequence, Union
 
+import numpy as np
 from attr import attrib, attrs
 from attr.validators import instance_of, optional
 from pycrfsuite import Tagger, Trainer  # pylint: disable=no-name-in-module
 
 from nerpy.annotator import SequenceMentionAnnotator, Trainable
 from nerpy.document import Document, Mention, MentionType
-from nerpy.encoding import MentionEncoder
-from nerpy.features import ExtractedFeatures, SentenceFeatureExtractor
+from nerpy.encoding import AbstractMentionEncoder, MentionEncoder
+from nerpy.features import (
+    ExtractedFeatures,
+    LabeledSequence,
+    SentenceFeatureExtractor,
+    SequenceFeatures,
+)
 
 # TODO: Figure out how to serialize models with their strategies and feature extractors
 # TODO: Refactor to reduce redundancy around feature extraction and multiple training methods
@@ -33,6 +40,14 @@ class CRFSuiteAnnotator(SequenceMentionAnnotator, Trainable):
     )
     _tagger: Tagger = attrib(validator=instance_of(Tagger))
     _tagger_bytes: Optional[bytes] = attrib(validator=optional(instance_of(bytes)))
+    # Whether to decode with a Viterbi search limited to valid label sequences
+    _constrained_decoding: bool = attrib(
+        default=False, validator=instance_of(bool), kw_only=True
+    )
+    # Created from the tagger when first needed for constrained decoding
+    _constrained_decoder: Optional["ConstrainedDecoder"] = attrib(
+        default=None, init=False, eq=False, repr=False
+    )
 
     def __getstate__(self) -> dict:
         if self._tagger_bytes is None:
@@ -42,9 +57,16 @@ class CRFSuiteAnnotator(SequenceMentionAnnotator, Trainable):
 
         state = dict(self.__dict__)
         state["_tagger"] = None
+        state["_constrained_decoder"] = None
+        # The model only needs feature names, so do not save the vocabulary
+        if self._feature_extractor.vocabulary is not None:
+            state["_feature_extractor"] = self._feature_extractor.without_vocabulary()
         return state
 
     def __setstate__(self, state: dict) -> None:
+        # Models saved before constrained decoding was added do not have these
+        state.setdefault("_constrained_decoding", False)
+        state.setdefault("_constrained_decoder", None)
         self.__dict__.update(state)
         self._tagger = Tagger()
         self._tagger.open_inmemory(self._tagger_bytes)
@@ -75,14 +97,44 @@ class CRFSuiteAnnotator(SequenceMentionAnnotator, Trainable):
     def to_bytes(self) -> bytes:
         return pickle.dumps(self)
 
-    def mentions(self, doc: Document) -> Sequence[Mention]:
-        mentions: List[Mention] = []
+    def sentence_mentions(self, doc: Document) -> List[Sequence[Mention]]:
+        if self._constrained_decoding:
+            return self._constrained_mentions(doc)
+
+        sentence_mentions: List[Sequence[Mention]] = []
         for sentence in doc.sentences:
             sent_x = self._feature_extractor.extract(sentence, doc)
             pred_y = self._tagger.tag(sent_x)
-            mentions.extend(self._mention_encoder.decode_mentions(sentence, pred_y))
+            sentence_mentions.append(
+                self._mention_encoder.decode_mentions(sentence, pred_y)
+            )
+
+        return sentence_mentions
 
-        return mentions
+    def _constrained_mentions(self, doc: Document) -> List[Sequence[Mention]]:
+        if self._constrained_decoder is None:
+            self._constrained_decoder = ConstrainedDecoder(
+                self._tagger, self._mention_encoder
+            )
+        decoder = self._constrained_decoder
+        mention_encoder = decoder.mention_encoder
+
+        sentence_mentions: List[Sequence[Mention]] = []
+        for sentence in doc.sentences:
+            sent_x = self._feature_extractor.extract(sentence, doc)
+            sentence_mentions.append(
+                mention_encoder.decode_mention_ids(sentence, decoder.decode_ids(sent_x))
+            )
+
+        return sentence_mentions
+
+    @property
+    def constrained_decoding(self) -> bool:
+        return self._constrained_decoding
+
+    @constrained_decoding.setter
+    def constrained_decoding(self, constrained: bool) -> None:
+        self._constrained_decoding = constrained
 
     @property
     def mention_encoder(self) -> MentionEncoder:
@@ -138,6 +190,7 @@ class CRFSuiteAnnotator(SequenceMentionAnnotator, Trainable):
             f"{token_count} tokens, {mention_count} mentions",
             file=log_file,
         )
+        print(f"Feature cache: {self._feature_extractor.cache_info()}", file=log_file)
 
         # Set up model path
         if tmp_model_path:
@@ -178,13 +231,43 @@ class CRFSuiteAnnotator(SequenceMentionAnnotator, Trainable):
         assert (
             training_data.extractor == self._feature_extractor
         ), "Training data feature extractor differs from instance feature extractor"
+        assert training_data.labels is not None, "Training data must have labels"
+
+        self.train_sequences(
+            zip(training_data.sequence_features(), training_data.labels),
+            model_path,
+            algorithm=algorithm,
+            train_params=train_params,
+            verbose=verbose,
+            log_file=log_file,
+        )
+        # Features not seen in training cannot affect the model, so stop adding them
+        vocabulary = self._feature_extractor.vocabulary
+        if vocabulary is not None:
+            vocabulary.freeze()
 
+    def train_sequences(
+        self,
+        sequences: Iterable[LabeledSequence],
+        model_path: Union[str, Path],
+        *,
+        algorithm: str,
+        train_params: Optional[Mapping] = None,
+        verbose: bool = False,
+        log_file: Optional[IO[str]] = None,
+    ) -> None:
+        """Train on features and labels that were already extracted, such as ones read
+        from a CorpusFeatureCache.
+
+        Each sequence is passed to the trainer as it is read, so the sequences do not
+        need to be held in memory.
+        """
         if train_params is None:
             train_params = {}
         trainer = Trainer(algorithm=algorithm, params=train_params, verbose=verbose)
         Path(model_path).parent.mkdir(parents=True, exist_ok=True)
 
-        for sent_x, sent_y in zip(training_data.features, training_data.labels):
+        for sent_x, sent_y in sequences:
             trainer.append(sent_x, sent_y)
 
         start_time = time.perf_counter()
@@ -194,6 +277,137 @@ class CRFSuiteAnnotator(SequenceMentionAnnotator, Trainable):
             file=log_file,
         )
         self._tagger.open(model_path)
+        with open(model_path, "rb") as model_file:
+            self._tagger_bytes = model_file.read()
+
+
+class ConstrainedDecoder:
+    """Viterbi decoding of a CRFSuite model that only produces valid label sequences.
+
+    The weights of the model are combined with the transition constraints of the
+    mention encoder, so invalid sequences such as an inside label without a
+    preceding begin are never predicted.
+    """
+
+    def __init__(self, tagger: Tagger, mention_encoder: MentionEncoder) -> None:
+        if not isinstance(mention_encoder, AbstractMentionEncoder):
+            raise ValueError(
+                f"Constrained decoding is not supported for {type(mention_encoder)}"
+            )
+        self.mention_encoder = mention_encoder
+
+        model = tagger.info()
+        self.labels: List[str] = tagger.labels()
+        label_indices = {label: idx for idx, label in enumerate(self.labels)}
+        # The ID of each model label in the encoder's label inventory
+        self.label_ids = np.array(
+            [mention_encoder.label_inventory.label_id(label) for label in self.labels],
+            dtype=np.int32,
+        )
+
+        # Attribute weights for each label
+        self.attribute_indices: Dict[str, int] = {}
+        for attribute, _ in model.state_features:
+            self.attribute_indices.setdefault(attribute, len(self.attribute_indices))
+        # Includes an extra row for unknown attributes
+        self.state_weights = np.zeros(
+            (len(self.attribute_indices) + 1, len(self.labels)), dtype=np.float64
+        )
+        for (attribute, label), weight in model.state_features.items():
+            self.state_weights[
+                self.attribute_indices[attribute], label_indices[label]
+            ] = weight
+
+        self.transition_weights = np.zeros(
+            (len(self.labels), len(self.labels)), dtype=np.float64
+        )
+        for (prev_label, label), weight in model.transitions.items():
+            self.transition_weights[
+                label_indices[prev_label], label_indices[label]
+            ] = weight
+
+        # Invalid transitions can never be taken
+        starts, transitions, ends = mention_encoder.transition_constraints(self.labels)
+        self.start_scores = np.where(starts, 0.0, -np.inf)
+        self.transition_weights[~transitions] = -np.inf
+        self.end_scores = np.where(ends, 0.0, -np.inf)
+
+    def state_scores(self, features: SequenceFeatures) -> np.ndarray:
+        """Return the score of each label for each token."""
+        # Attributes not seen in training use the final row, which has zero weights
+        unknown_row = len(self.attribute_indices)
+        rows = np.fromiter(
+            map(
+                self.attribute_indices.get,
+                chain.from_iterable(features),
+                repeat(unknown_row),
+            ),
+            dtype=np.intp,
+        )
+        values = np.fromiter(
+            chain.from_iterable(token_features.values() for token_features in features),
+            dtype=np.float64,
+        )
+        # Index of each token's first attribute, plus the total count
+        boundaries = np.zeros(len(features) + 1, dtype=np.intp)
+        np.cumsum(
+            [len(token_features) for token_features in features], out=boundaries[1:]
+        )
+
+        # Sum the weights of each token's attributes using cumulative sums, which
+        # works even for tokens with no attributes
+        cumulative = np.zeros((len(rows) + 1, len(self.labels)))
+        np.cumsum(
+            self.state_weights[rows] * values[:, np.newaxis], axis=0, out=cumulative[1:]
+        )
+        return cumulative[boundaries[1:]] - cumulative[boundaries[:-1]]
+
+    def decode(self, features: SequenceFeatures) -> List[str]:
+        """Return the highest-scoring valid labels for a sequence."""
+        labels = self.labels
+        return [labels[idx] for idx in self._best_path(features)]
+
+    def decode_ids(self, features: SequenceFeatures) -> List[int]:
+        """Return the IDs in the encoder's label inventory of the highest-scoring
+        valid labels for a sequence."""
+        return self.label_ids[self._best_path(features)].tolist()
+
+    def _best_path(self, features: SequenceFeatures) -> np.ndarray:
+        if not features:
+            return np.zeros(0, dtype=np.int64)
+        return viterbi(
+            self.state_scores(features),
+            self.transition_weights,
+            self.start_scores,
+            self.end_scores,
+        )
+
+
+def viterbi(
+    state_scores: np.ndarray,
+    transition_scores: np.ndarray,
+    start_scores: np.ndarray,
+    end_scores: np.ndarray,
+) -> np.ndarray:
+    """Return the highest-scoring sequence of label indices.
+
+    State scores are indexed by position and label, and transition scores by
+    previous label and label. Disallowed labels and transitions should be scored
+    as negative infinity.
+    """
+    length, label_count = state_scores.shape
+    backpointers = np.empty((length, label_count), dtype=np.int64)
+    scores = start_scores + state_scores[0]
+    for idx in range(1, length):
+        candidates = scores[:, np.newaxis] + transition_scores
+        backpointers[idx] = np.argmax(candidates, axis=0)
+        scores = candidates[backpointers[idx], np.arange(label_count)] + state_scores[idx]
+
+    path = np.empty(length, dtype=np.int64)
+    path[-1] = np.argmax(scores + end_scores)
+    for idx in range(length - 1, 0, -1):
+        path[idx - 1] = backpointers[idx, path[idx]]
+    return path
 
 
 def train_crfsuite(
@@ -218,3 +432,51 @@ def train_crfsuite(
         verbose=verbose,
     )
     return annotator
+
+
+def train_crfsuite_featurized(
+    mention_encoder: MentionEncoder,
+    feature_extractor: SentenceFeatureExtractor,
+    mention_type: MentionType,
+    training_data: ExtractedFeatures,
+    train_params: Dict,
+    *,
+    verbose: bool = False,
+) -> CRFSuiteAnnotator:
+    algorithm = train_params.pop("algorithm")
+    annotator = CRFSuiteAnnotator.for_training(
+        mention_type, feature_extractor, mention_encoder
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        annotator.train_featurized(
+            training_data,
+            os.path.join(tmpdir, "crfsuite_annotator_tmp.model"),
+            algorithm=algorithm,
+            train_params=train_params,
+            verbose=verbose,
+        )
+    return annotator
+
+
+def train_crfsuite_sequences(
+    mention_encoder: MentionEncoder,
+    feature_extractor: SentenceFeatureExtractor,
+    mention_type: MentionType,
+    sequences: Iterable[LabeledSequence],
+    train_params: Dict,
+    *,
+    verbose: bool = False,
+) -> CRFSuiteAnnotator:
+    algorithm = train_params.pop("algorithm")
+    annotator = CRFSuiteAnnotator.for_training(
+        mention_type, feature_extractor, mention_encoder
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        annotator.train_sequences(
+            sequences,
+            os.path.join(tmpdir, "crfsuite_annotator_tmp.model"),
+            algorithm=algorithm,
+            train_params=train_params,
+            verbose=verbose,
+        )
+    return annotator
@@ -10,7 +10,13 @@ from attr.validators import instance_of
 from nerpy.annotator import SequenceMentionAnnotator
 from nerpy.document import Document, Mention, MentionType
 from nerpy.encoding import MentionEncoder
-from nerpy.features import SentenceFeatureExtractor, SequenceFeatures, SequenceLabels
+from nerpy.features import (
+    ExtractedFeatures,
+    LabeledSequence,
+    SentenceFeatureExtractor,
+    SequenceFeatures,
+    SequenceLabels,
+)
 from sequencemodels import ViterbiStructuredPerceptron
 
 
@@ -52,14 +58,16 @@ class SequenceModelsAnnotator(SequenceMentionAnnotator):
         model = ViterbiStructuredPerceptron()
         return cls(mention_type, feature_extractor, mention_encoder, model)
 
-    def mentions(self, doc: Document) -> Sequence[Mention]:
-        mentions: List[Mention] = []
+    def sentence_mentions(self, doc: Document) -> List[Sequence[Mention]]:
+        sentence_mentions: List[Sequence[Mention]] = []
         for sentence in doc.sentences:
             sent_x = self._feature_extractor.extract(sentence, doc)
             pred_y = self._model.predict(sent_x)
-            mentions.extend(self._mention_encoder.decode_mentions(sentence, pred_y))
+            sentence_mentions.append(
+                self._mention_encoder.decode_mentions(sentence, pred_y)
+            )
 
-        return mentions
+        return sentence_mentions
 
     @property
     def mention_encoder(self) -> MentionEncoder:
@@ -111,6 +119,64 @@ class SequenceModelsAnnotator(SequenceMentionAnnotator):
             f"{token_count} tokens, {mention_count} mentions",
             file=log_file,
         )
+        print(f"Feature cache: {self._feature_extractor.cache_info()}", file=log_file)
+        print("Training", file=log_file)
+        start_time = time.perf_counter()
+        self._model.train(
+            features, labels, epochs=epochs, averaged=averaged, verbose=verbose
+        )
+        print(
+            "Training took {} seconds".format(time.perf_counter() - start_time),
+            file=log_file,
+        )
+
+    def train_featurized(
+        self,
+        training_data: ExtractedFeatures,
+        *,
+        epochs: int,
+        averaged: bool = True,
+        verbose: bool = False,
+        log_file: Optional[IO[str]] = None,
+    ) -> None:
+        assert (
+            training_data.extractor == self._feature_extractor
+        ), "Training data feature extractor differs from instance feature extractor"
+        assert training_data.labels is not None, "Training data must have labels"
+
+        self.train_sequences(
+            zip(training_data.sequence_features(), training_data.labels),
+            epochs=epochs,
+            averaged=averaged,
+            verbose=verbose,
+            log_file=log_file,
+        )
+        # Features not seen in training cannot affect the model, so stop adding them
+        vocabulary = self._feature_extractor.vocabulary
+        if vocabulary is not None:
+            vocabulary.freeze()
+
+    def train_sequences(
+        self,
+        sequences: Iterable[LabeledSequence],
+        *,
+        epochs: int,
+        averaged: bool = True,
+        verbose: bool = False,
+        log_file: Optional[IO[str]] = None,
+    ) -> None:
+        """Train on features and labels that were already extracted, such as ones read
+        from a CorpusFeatureCache.
+
+        The perceptron makes several passes over the data, so unlike CRFSuite training,
+        all of the sequences are held in memory.
+        """
+        features: List[SequenceFeatures] = []
+        labels: List[SequenceLabels] = []
+        for sent_x, sent_y in sequences:
+            features.append(sent_x)
+            labels.append(sent_y)
+
         print("Training", file=log_file)
         start_time = time.perf_counter()
         self._model.train(
@@ -141,3 +207,45 @@ def train_seqmodels(
         train_docs, epochs=epochs, averaged=averaged, verbose=verbose,
     )
     return annotator
+
+
+def train_seqmodels_featurized(
+    mention_encoder: MentionEncoder,
+    feature_extractor: SentenceFeatureExtractor,
+    mention_type: MentionType,
+    training_data: ExtractedFeatures,
+    train_params: Dict,
+    *,
+    verbose: bool = False,
+) -> SequenceModelsAnnotator:
+    epochs = train_params["max_iterations"]
+    averaged = bool(train_params.get("averaged", True))
+
+    annotator = SequenceModelsAnnotator.for_training(
+        mention_type, feature_extractor, mention_encoder
+    )
+    annotator.train_featurized(
+        training_data, epochs=epochs, averaged=averaged, verbose=verbose
+    )
+    return annotator
+
+
+def train_seqmodels_sequences(
+    mention_encoder: MentionEncoder,
+    feature_extractor: SentenceFeatureExtractor,
+    mention_type: MentionType,
+    sequences: Iterable[LabeledSequence],
+    train_params: Dict,
+    *,
+    verbose: bool = False,
+) -> SequenceModelsAnnotator:
+    epochs = train_params["max_iterations"]
+    averaged = bool(train_params.get("averaged", True))
+
+    annotator = SequenceModelsAnnotator.for_training(
+        mention_type, feature_extractor, mention_encoder
+    )
+    annotator.train_sequences(
+        sequences, epochs=epochs, averaged=averaged, verbose=verbose
+    )
+    return annotator
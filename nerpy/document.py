@@ -1,6 +1,9 @@
+import sys
+from itertools import chain
 from operator import attrgetter
 from typing import (
     Any,
+    Callable,
     Dict,
     Iterable,
     Iterator,
@@ -10,11 +13,15 @@ from typing import (
     Sequence,
     Set,
     Tuple,
+    Type,
+    TypeVar,
     Union,
     overload,
 )
+from weakref import WeakValueDictionary
 
-from attr import Attribute, attrib, attrs, evolve
+import numpy as np
+from attr import Attribute, attrib, attrs, validate
 from attr.validators import instance_of
 from immutabledict import immutabledict
 
@@ -51,20 +58,63 @@ def _convert_immutabledict(mapping: Optional[Mapping]) -> immutabledict:
     return immutabledict(mapping) if mapping else _EMPTY_IMMUTABLEDICT
 
 
+def _intern_str(value: Any) -> Any:
+    # Leave validating non-strings to the validator
+    return sys.intern(value) if type(value) is str else value
+
+
+# Token properties shared by all tokens with the same items, which are dropped once no
+# token uses them
+_INTERNED_PROPERTIES: "WeakValueDictionary[Tuple, immutabledict]" = WeakValueDictionary()
+
+
+def intern_properties(mapping: Optional[Mapping[str, Any]]) -> immutabledict:
+    """Return a shared immutable copy of a mapping of token properties."""
+    if not mapping:
+        return _EMPTY_IMMUTABLEDICT
+
+    # Include value types so that equal values of different types (1 and True) are
+    # not shared
+    key = tuple((name, type(value), value) for name, value in mapping.items())
+    try:
+        interned = _INTERNED_PROPERTIES.get(key)
+    except TypeError:
+        # Mappings with unhashable values cannot be shared
+        return immutabledict(mapping)
+
+    if interned is None:
+        interned = (
+            mapping if isinstance(mapping, immutabledict) else immutabledict(mapping)
+        )
+        _INTERNED_PROPERTIES[key] = interned
+    return interned
+
+
 # Type-specific implementations to work around buggy type checkers
 def _tuplify_tokens(tokens: Sequence["Token"]) -> Tuple["Token", ...]:
     return tuple(tokens)
 
 
-# Type-specific implementations to work around buggy type checkers
-def _tuplify_sentences(sentences: Sequence["Sentence"]) -> Tuple["Sentence", ...]:
-    return tuple(sentences)
+_EntityTypeT = TypeVar("_EntityTypeT", bound="EntityType")
 
 
-@attrs(frozen=True, slots=True)
+@attrs(frozen=True, slots=True, cache_hash=True)
 class EntityType(Sequence[str]):
     types: Tuple[str, ...] = attrib(converter=_convert_compound_types)
 
+    @classmethod
+    def of(cls: Type[_EntityTypeT], types: Union[str, Sequence[str]]) -> _EntityTypeT:
+        """Return the shared instance of this class for the given types."""
+        key = (cls, _convert_compound_types(types))
+        instance = _CANONICAL_TYPES.get(key)
+        if instance is None:
+            instance = _CANONICAL_TYPES.setdefault(key, cls(key[1]))
+        return instance  # type: ignore
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # Unpickled types are shared instances too
+        return _canonical_type, (type(self), self.types)
+
     # PyCharm doesn't understand .validator
     # noinspection PyUnresolvedReferences
     @types.validator
@@ -93,22 +143,32 @@ class EntityType(Sequence[str]):
         return ":".join(self.types)
 
 
-@attrs(frozen=True, slots=True)
+@attrs(frozen=True, slots=True, cache_hash=True)
 class MentionType(EntityType):
     pass
 
 
+# Shared instances created by EntityType.of, keyed by class and types. The number of
+# distinct types is small, so they are kept for the life of the process.
+_CANONICAL_TYPES: Dict[Tuple[type, Tuple[str, ...]], EntityType] = {}
+
+
+def _canonical_type(cls: Type[EntityType], types: Tuple[str, ...]) -> EntityType:
+    return cls.of(types)
+
+
 @attrs(frozen=True, slots=True)
 class Token(Sequence[str]):
     _POS_TAG = "pos"
     _CHUNK_TAG = "chunk"
     _LEMMAS = "lemmas"
 
-    text: str = attrib(validator=_validator_nonempty_str)
+    # Texts and properties are interned, since most of them are repeated across tokens
+    text: str = attrib(converter=_intern_str, validator=_validator_nonempty_str)
     # Mypy gives a false positive on this validator
     index: int = attrib(validator=_validator_nonnegative, eq=False)  # type: ignore
     properties: Mapping[str, Any] = attrib(
-        converter=_convert_immutabledict, default=_EMPTY_IMMUTABLEDICT,
+        converter=intern_properties, default=_EMPTY_IMMUTABLEDICT,
     )
 
     @property
@@ -148,6 +208,18 @@ class Token(Sequence[str]):
 
         return Token(text, index, properties)
 
+    @staticmethod
+    def create_unchecked(
+        text: str, index: int, properties: immutabledict = _EMPTY_IMMUTABLEDICT
+    ) -> "Token":
+        """Create a token from trusted values without validating or converting them."""
+        token = _new_object(Token)
+        set_text, set_index, set_properties = _TOKEN_SETTERS
+        set_text(token, text)
+        set_index(token, index)
+        set_properties(token, properties)
+        return token
+
     @overload
     def __getitem__(self, index: int) -> str:
         raise NotImplementedError
@@ -187,6 +259,18 @@ class Sentence(Sequence[Token]):
         # Mypy does not recognize tokens as an Iterable
         return Sentence(tokens, sentence_index)  # type: ignore
 
+    @staticmethod
+    def create_unchecked(tokens: Tuple[Token, ...], sentence_index: int) -> "Sentence":
+        """Create a sentence from trusted values without validating or converting them.
+
+        Each token's index must already match its position.
+        """
+        sentence = _new_object(Sentence)
+        set_tokens, set_index = _SENTENCE_SETTERS
+        set_tokens(sentence, tokens)
+        set_index(sentence, sentence_index)
+        return sentence
+
     @overload
     def __getitem__(self, index: int) -> Token:
         raise NotImplementedError
@@ -208,6 +292,207 @@ class Sentence(Sequence[Token]):
         return " ".join([str(token) for token in self.tokens])
 
 
+class CompactSentence(Sentence):
+    """A sentence stored as IDs in a shared TokenVocabulary.
+
+    Tokens are created each time they are accessed, so code that only needs token text
+    should use text_ids or texts instead. SentenceFeatureExtractor uses texts when all
+    of its extractors are text-only; extractors that use POS or chunk tags still create
+    the tokens.
+    """
+
+    __slots__ = ("vocabulary", "ids")
+
+    vocabulary: "TokenVocabulary"
+    # Rows of text, POS tag, and chunk tag IDs, with a column for each token
+    ids: np.ndarray
+
+    def __init__(
+        self, vocabulary: "TokenVocabulary", ids: np.ndarray, index: int
+    ) -> None:
+        if ids.ndim != 2 or len(ids) != 3:
+            raise ValueError(f"IDs must be of shape (3, tokens): {ids.shape}")
+        if index < 0:
+            raise ValueError("Negative value: {}".format(index))
+        ids.flags.writeable = False
+        # Set slots directly since the class is frozen
+        object.__setattr__(self, "vocabulary", vocabulary)
+        object.__setattr__(self, "ids", ids)
+        object.__setattr__(self, "index", index)
+
+    # Mypy does not allow replacing the attribute with a property
+    @property  # type: ignore
+    def tokens(self) -> Tuple[Token, ...]:  # type: ignore
+        return self[:]
+
+    @property
+    def text_ids(self) -> np.ndarray:
+        return self.ids[0]
+
+    @property
+    def texts(self) -> List[str]:
+        vocabulary_texts = self.vocabulary.texts
+        return [vocabulary_texts[text_id] for text_id in self.ids[0].tolist()]
+
+    @overload
+    def __getitem__(self, index: int) -> Token:
+        raise NotImplementedError
+
+    @overload
+    def __getitem__(self, index: slice) -> Tuple[Token, ...]:
+        raise NotImplementedError
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[Token, Tuple[Token, ...]]:
+        if isinstance(i, slice):
+            indices = range(len(self))[i]
+            if not indices:
+                return ()
+            token = self.vocabulary.token
+            columns = self.ids[:, i].T.tolist()
+            return tuple(token(idx, *column) for idx, column in zip(indices, columns))
+        else:
+            if i < 0:
+                i += len(self)
+            if not 0 <= i < len(self):
+                raise IndexError("Token index out of range")
+            return self.vocabulary.token(i, *self.ids[:, i].tolist())
+
+    def __iter__(self) -> Iterator[Token]:
+        return iter(self[:])
+
+    def __len__(self) -> int:
+        return self.ids.shape[1]
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, CompactSentence) and other.vocabulary is self.vocabulary:
+            return bool(np.array_equal(self.ids, other.ids))
+        elif isinstance(other, Sentence):
+            return self.tokens == other.tokens
+        else:
+            return NotImplemented
+
+    # Equal to a Sentence with the same tokens, so it must hash the same way
+    __hash__ = Sentence.__hash__
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return CompactSentence, (self.vocabulary, self.ids, self.index)
+
+
+@attrs(eq=False)
+class TokenVocabulary:
+    """Token texts, POS tags, and chunk tags shared by compact sentences.
+
+    ID 0 in the POS and chunk tag vocabularies means that the token has no tag.
+    """
+
+    texts: List[str] = attrib(factory=list, init=False)
+    pos_tags: List[Optional[str]] = attrib(factory=lambda: [None], init=False)
+    chunk_tags: List[Optional[str]] = attrib(factory=lambda: [None], init=False)
+    _text_ids: Dict[str, int] = attrib(factory=dict, init=False)
+    _pos_tag_ids: Dict[Optional[str], int] = attrib(factory=lambda: {None: 0}, init=False)
+    _chunk_tag_ids: Dict[Optional[str], int] = attrib(
+        factory=lambda: {None: 0}, init=False
+    )
+    # Token properties for each pair of POS and chunk tag IDs
+    _properties: Dict[Tuple[int, int], immutabledict] = attrib(factory=dict, init=False)
+
+    def create_sentence(
+        self,
+        texts: Sequence[str],
+        sentence_index: int,
+        *,
+        pos_tags: Optional[Sequence[Optional[str]]] = None,
+        chunk_tags: Optional[Sequence[Optional[str]]] = None,
+    ) -> CompactSentence:
+        for tags in (pos_tags, chunk_tags):
+            if tags is not None and len(tags) != len(texts):
+                raise ValueError(
+                    f"Sentence has {len(texts)} tokens but {len(tags)} tags provided"
+                )
+
+        ids = np.zeros((3, len(texts)), dtype=np.int32)
+        ids[0] = [self._text_id(text) for text in texts]
+        if pos_tags is not None:
+            ids[1] = [
+                _add_item(tag, self.pos_tags, self._pos_tag_ids) for tag in pos_tags
+            ]
+        if chunk_tags is not None:
+            ids[2] = [
+                _add_item(tag, self.chunk_tags, self._chunk_tag_ids) for tag in chunk_tags
+            ]
+        return CompactSentence(self, ids, sentence_index)
+
+    def compact_sentence(self, sentence: Sentence) -> CompactSentence:
+        """Return a compact copy of a sentence.
+
+        Raises ValueError if any token has properties other than POS and chunk tags.
+        """
+        for token in sentence:
+            if len(token.properties) > (token.pos_tag is not None) + (
+                token.chunk_tag is not None
+            ):
+                raise ValueError(
+                    f"Compact sentences only store POS and chunk tags: {token!r}"
+                )
+
+        return self.create_sentence(
+            [token.text for token in sentence],
+            sentence.index,
+            pos_tags=[token.pos_tag for token in sentence],
+            chunk_tags=[token.chunk_tag for token in sentence],
+        )
+
+    def compact_document(self, doc: "Document") -> "Document":
+        """Return a copy of a document with all of its sentences compact."""
+        return Document.create_unchecked(
+            doc.id,
+            tuple(self.compact_sentence(sentence) for sentence in doc),
+            doc.mentions,
+            properties=doc.properties,
+            metadata=doc.metadata,
+        )
+
+    def token(
+        self, index: int, text_id: int, pos_tag_id: int, chunk_tag_id: int
+    ) -> Token:
+        """Create the token for a column of sentence IDs."""
+        key = (pos_tag_id, chunk_tag_id)
+        properties = self._properties.get(key)
+        if properties is None:
+            properties = self._properties.setdefault(
+                key,
+                intern_properties(
+                    _tag_properties(
+                        self.pos_tags[pos_tag_id], self.chunk_tags[chunk_tag_id]
+                    )
+                ),
+            )
+        return Token.create_unchecked(self.texts[text_id], index, properties)
+
+    def _text_id(self, text: str) -> int:
+        if not text or not isinstance(text, str):
+            raise ValueError("Empty or non-string value: {!r}".format(text))
+        return _add_item(sys.intern(text), self.texts, self._text_ids)
+
+
+def _add_item(item: Any, items: List[Any], ids: Dict[Any, int]) -> int:
+    item_id = ids.get(item)
+    if item_id is None:
+        item_id = ids[item] = len(items)
+        items.append(item)
+    return item_id
+
+
+def _tag_properties(pos_tag: Optional[str], chunk_tag: Optional[str]) -> Dict[str, str]:
+    # The same keys as Token.create uses
+    properties = {}
+    if pos_tag is not None:
+        properties[Token._POS_TAG] = pos_tag
+    if chunk_tag is not None:
+        properties[Token._CHUNK_TAG] = chunk_tag
+    return properties
+
+
 @attrs(frozen=True, slots=True)
 class Mention:
     sentence_index: int = attrib(validator=_validator_nonnegative)
@@ -252,6 +537,30 @@ class Mention:
             sentence_idx, first_token_index, last_token_index, mention_type, entity_type
         )
 
+    @staticmethod
+    def create_unchecked(
+        sentence_index: int,
+        start: int,
+        end: int,
+        mention_type: MentionType,
+        entity_type: EntityType,
+    ) -> "Mention":
+        """Create a mention from trusted values without validating them."""
+        mention = _new_object(Mention)
+        (
+            set_sentence_index,
+            set_start,
+            set_end,
+            set_mention_type,
+            set_entity_type,
+        ) = _MENTION_SETTERS
+        set_sentence_index(mention, sentence_index)
+        set_start(mention, start)
+        set_end(mention, end)
+        set_mention_type(mention, mention_type)
+        set_entity_type(mention, entity_type)
+        return mention
+
     def __len__(self) -> int:
         return self.end - self.start
 
@@ -281,33 +590,116 @@ class Mention:
         return " ".join([token.text for token in self.tokens(source)])
 
 
-def _sort_mentions(mentions: Sequence[Mention]) -> Tuple[Mention, ...]:
+def _sort_mentions(mentions: Iterable[Mention]) -> Tuple[Mention, ...]:
     return tuple(sorted(mentions, key=attrgetter("sort_key")))
 
 
-@attrs(frozen=True, slots=True)
+@attrs(frozen=True, slots=True, init=False, repr=False, getstate_setstate=False)
 class Document(Sequence[Sentence]):
     id: str = attrib(validator=_validator_nonempty_str)
-    sentences: Tuple[Sentence, ...] = attrib(converter=_tuplify_sentences)
-    mentions: Tuple[Mention, ...] = attrib(converter=_sort_mentions, default=())
-    properties: immutabledict = attrib(
-        converter=_convert_immutabledict, default=_EMPTY_IMMUTABLEDICT, kw_only=True
-    )
-    metadata: immutabledict = attrib(
-        converter=_convert_immutabledict,
-        default=_EMPTY_IMMUTABLEDICT,
-        eq=False,
-        kw_only=True,
-    )
-    # TODO: Consider making this the primary mention representation so we don't store mentions twice
-    _sentence_mentions: Tuple[Tuple[Mention, ...], ...] = attrib(init=False)
-
-    @_sentence_mentions.default
-    def _sentence_mentions_default(self) -> Tuple[Tuple[Mention, ...], ...]:
-        sentence_mentions: List[List[Mention]] = [[] for _ in range(len(self.sentences))]
-        for mention in self.mentions:
-            sentence_mentions[mention.sentence_index].append(mention)
-        return tuple(tuple(mentions) for mentions in sentence_mentions)
+    sentences: Tuple[Sentence, ...] = attrib()
+    # The sorted mentions of each sentence, which are the only copy of the mentions
+    _sentence_mentions: Tuple[Tuple[Mention, ...], ...] = attrib()
+    properties: immutabledict = attrib()
+    metadata: immutabledict = attrib(eq=False)
+
+    # pylint: disable=redefined-builtin
+    def __init__(
+        self,
+        id: str,
+        sentences: Iterable[Sentence],
+        mentions: Optional[Iterable[Mention]] = None,
+        *,
+        properties: Optional[Mapping] = None,
+        metadata: Optional[Mapping] = None,
+        sentence_mentions: Optional[Iterable[Iterable[Mention]]] = None,
+    ) -> None:
+        sentences = tuple(sentences)
+        # Mentions can also be given for each sentence, which is how attr.evolve passes
+        # them. To change the mentions of a document, use copy_with_mentions.
+        if sentence_mentions is not None:
+            # Even empty mentions conflict, since attr.evolve would otherwise silently
+            # keep the old mentions
+            if mentions is not None:
+                raise ValueError(
+                    "Cannot specify both mentions and sentence_mentions; "
+                    "use copy_with_mentions to replace the mentions of a document"
+                )
+            grouped = _group_sentence_mentions(sentence_mentions, len(sentences))
+        else:
+            grouped = _group_mentions(
+                mentions if mentions is not None else (), len(sentences), sort=True
+            )
+        _set_document(
+            self,
+            id,
+            sentences,
+            grouped,
+            _convert_immutabledict(properties),
+            _convert_immutabledict(metadata),
+        )
+        validate(self)
+
+    @staticmethod
+    def create_unchecked(
+        doc_id: str,
+        sentences: Tuple[Sentence, ...],
+        mentions: Iterable[Mention],
+        *,
+        properties: immutabledict = _EMPTY_IMMUTABLEDICT,
+        metadata: immutabledict = _EMPTY_IMMUTABLEDICT,
+    ) -> "Document":
+        """Create a document from trusted values without validating or converting them.
+
+        Mentions must already be sorted by their sort key.
+        """
+        document = _new_object(Document)
+        _set_document(
+            document,
+            doc_id,
+            sentences,
+            _group_mentions(mentions, len(sentences), sort=False),
+            properties,
+            metadata,
+        )
+        return document
+
+    @property
+    def mentions(self) -> Tuple[Mention, ...]:
+        """All mentions in the document, sorted."""
+        return tuple(chain.from_iterable(self._sentence_mentions))
+
+    def __repr__(self) -> str:
+        return (
+            f"Document(id={self.id!r}, sentences={self.sentences!r}, "
+            f"mentions={self.mentions!r}, properties={self.properties!r}, "
+            f"metadata={self.metadata!r})"
+        )
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (
+            _restore_document,
+            (
+                self.id,
+                self.sentences,
+                self._sentence_mentions,
+                self.properties,
+                self.metadata,
+            ),
+        )
+
+    def __setstate__(self, state: Any) -> None:
+        # Only used for documents pickled when the flat tuple of mentions was stored
+        if not isinstance(state, dict):
+            state = dict(zip(_PICKLED_DOCUMENT_FIELDS, state))
+        _set_document(
+            self,
+            state["id"],
+            state["sentences"],
+            state["_sentence_mentions"],
+            state["properties"],
+            state["metadata"],
+        )
 
     @overload
     def __getitem__(self, index: int) -> Sentence:
@@ -340,10 +732,151 @@ class Document(Sequence[Sentence]):
         return self._sentence_mentions[sentence_idx]
 
     def copy_with_mentions(self, mentions: Iterable[Mention]) -> "Document":
-        return evolve(self, mentions=mentions)
+        # The other fields were already checked when this document was created
+        return _restore_document(
+            self.id,
+            self.sentences,
+            _group_mentions(mentions, len(self.sentences), sort=True),
+            self.properties,
+            self.metadata,
+        )
+
+    def copy_with_sentence_mentions(
+        self, sentence_mentions: Iterable[Iterable[Mention]]
+    ) -> "Document":
+        """Copy the document with new mentions given separately for each sentence.
+
+        This avoids sorting all of the mentions together, as copy_with_mentions does.
+        """
+        return _restore_document(
+            self.id,
+            self.sentences,
+            _group_sentence_mentions(sentence_mentions, len(self.sentences)),
+            self.properties,
+            self.metadata,
+        )
 
     def copy_without_mentions(self) -> "Document":
-        return evolve(self, mentions=())
+        return _restore_document(
+            self.id,
+            self.sentences,
+            ((),) * len(self.sentences),
+            self.properties,
+            self.metadata,
+        )
+
+
+def _group_mentions(
+    mentions: Iterable[Mention], sentence_count: int, *, sort: bool
+) -> Tuple[Tuple[Mention, ...], ...]:
+    sentence_mentions: List[List[Mention]] = [[] for _ in range(sentence_count)]
+    for mention in mentions:
+        if mention.sentence_index >= sentence_count:
+            raise ValueError(
+                f"Mention sentence index is not in the document ({sentence_count} "
+                f"sentences): {mention!r}"
+            )
+        sentence_mentions[mention.sentence_index].append(mention)
+    if sort:
+        return tuple(_sort_sentence_mentions(mentions) for mentions in sentence_mentions)
+    else:
+        return tuple(tuple(mentions) for mentions in sentence_mentions)
+
+
+def _group_sentence_mentions(
+    sentence_mentions: Iterable[Iterable[Mention]], sentence_count: int
+) -> Tuple[Tuple[Mention, ...], ...]:
+    grouped = []
+    for sentence_idx, mentions in enumerate(sentence_mentions):
+        mentions = _sort_sentence_mentions(mentions)
+        for mention in mentions:
+            if mention.sentence_index != sentence_idx:
+                raise ValueError(
+                    f"Mention does not belong to sentence {sentence_idx}: {mention!r}"
+                )
+        grouped.append(mentions)
+    if len(grouped) != sentence_count:
+        raise ValueError(
+            f"Document has {sentence_count} sentences but mentions provided "
+            f"for {len(grouped)}"
+        )
+    return tuple(grouped)
+
+
+def _sort_sentence_mentions(mentions: Iterable[Mention]) -> Tuple[Mention, ...]:
+    mentions = tuple(mentions)
+    # Mentions are usually already in order, as decoded mentions are, which is cheaper
+    # to check than computing every sort key
+    for prev, mention in zip(mentions, mentions[1:]):
+        if prev.start > mention.start or (
+            prev.start == mention.start and prev.end >= mention.end
+        ):
+            return _sort_mentions(mentions)
+    return mentions
+
+
+def _set_document(
+    document: Document,
+    doc_id: str,
+    sentences: Tuple[Sentence, ...],
+    sentence_mentions: Tuple[Tuple[Mention, ...], ...],
+    properties: immutabledict,
+    metadata: immutabledict,
+) -> None:
+    (
+        set_id,
+        set_sentences,
+        set_sentence_mentions,
+        set_properties,
+        set_metadata,
+    ) = _DOCUMENT_SETTERS
+    set_id(document, doc_id)
+    set_sentences(document, sentences)
+    set_sentence_mentions(document, sentence_mentions)
+    set_properties(document, properties)
+    set_metadata(document, metadata)
+
+
+def _restore_document(
+    doc_id: str,
+    sentences: Tuple[Sentence, ...],
+    sentence_mentions: Tuple[Tuple[Mention, ...], ...],
+    properties: immutabledict,
+    metadata: immutabledict,
+) -> Document:
+    document = _new_object(Document)
+    _set_document(document, doc_id, sentences, sentence_mentions, properties, metadata)
+    return document
+
+
+# Fields of documents pickled by attrs before mentions were stored only by sentence
+_PICKLED_DOCUMENT_FIELDS = (
+    "id",
+    "sentences",
+    "mentions",
+    "properties",
+    "metadata",
+    "_sentence_mentions",
+)
+
+
+_new_object = object.__new__
+
+
+def _slot_setters(cls: type, *names: str) -> Tuple[Callable[[Any, Any], None], ...]:
+    # Setting slots through their descriptors skips the frozen __setattr__
+    return tuple(cls.__dict__[name].__set__ for name in names)
+
+
+# Used by create_unchecked
+_TOKEN_SETTERS = _slot_setters(Token, "text", "index", "properties")
+_SENTENCE_SETTERS = _slot_setters(Sentence, "tokens", "index")
+_MENTION_SETTERS = _slot_setters(
+    Mention, "sentence_index", "start", "end", "mention_type", "entity_type"
+)
+_DOCUMENT_SETTERS = _slot_setters(
+    Document, "id", "sentences", "_sentence_mentions", "properties", "metadata"
+)
 
 
 @attrs(eq=False)
@@ -351,6 +884,8 @@ class DocumentBuilder:
     id: str = attrib(validator=_validator_nonempty_str)
     properties: dict = attrib(factory=dict, kw_only=True)
     metadata: dict = attrib(factory=dict, kw_only=True)
+    # Skip checking sentences and mentions, for data that is already known to be valid
+    trusted: bool = attrib(default=False, kw_only=True)
     next_sentence_idx: int = attrib(default=0, init=False)
     _sentences: List[Sentence] = attrib(factory=list, init=False)
     _mentions: List[Mention] = attrib(factory=list, init=False)
@@ -363,6 +898,10 @@ class DocumentBuilder:
         return bool(self._sentences)
 
     def add_mention(self, mention: Mention) -> "DocumentBuilder":
+        if self.trusted:
+            self._mentions.append(mention)
+            return self
+
         if mention in self._mention_set:
             raise ValueError("Cannot add duplicate mention: " + repr(mention))
         if not mention.sentence_index < self.next_sentence_idx:
@@ -380,9 +919,18 @@ class DocumentBuilder:
         return self
 
     def contains_mention(self, mention: Mention) -> bool:
+        if self.trusted:
+            # Trusted builders do not keep a set of mentions
+            return mention in self._mentions
         return mention in self._mention_set
 
     def create_sentence(self, tokens: Sequence[Token]) -> Sentence:
+        if self.trusted:
+            sentence = Sentence.create_unchecked(tuple(tokens), self.next_sentence_idx)
+            self._sentences.append(sentence)
+            self.next_sentence_idx += 1
+            return sentence
+
         sentence = Sentence.from_tokens(tokens, self.next_sentence_idx)
         self.add_sentence(sentence)
         return sentence
@@ -403,5 +951,13 @@ class DocumentBuilder:
         return self
 
     def build(self) -> Document:
-        # Mypy does not recognize tokens as an Iterable
-        return Document(self.id, self._sentences, self._mentions)  # type: ignore
+        if self.trusted:
+            return _restore_document(
+                self.id,
+                tuple(self._sentences),
+                _group_mentions(self._mentions, len(self._sentences), sort=True),
+                _EMPTY_IMMUTABLEDICT,
+                _EMPTY_IMMUTABLEDICT,
+            )
+
+        return Document(self.id, self._sentences, self._mentions)
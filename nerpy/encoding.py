@@ -1,9 +1,9 @@
 from abc import ABCMeta, abstractmethod
-from typing import Dict, Optional, Sequence, Type
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Type
 
-from attr import attrs
+import numpy as np
 
-from nerpy.document import EntityType, Mention, MentionType, Sentence
+from nerpy.document import Document, EntityType, Mention, MentionType, Sentence
 
 LABEL_DELIM = "-"
 
@@ -24,12 +24,109 @@ class MentionEncoder(metaclass=ABCMeta):
         raise NotImplementedError()
 
 
-@attrs(auto_attribs=True)
-class _EncoderToken:
-    entity_type: Optional[EntityType] = None
-    first_token: bool = False
-    last_token: bool = False
-    first_token_after_same_type_mention = False
+# Kinds of labels, which determine how they are decoded
+_OUTSIDE_KIND = 0
+_BEGIN_KIND = 1
+_INSIDE_KIND = 2
+_LAST_KIND = 3
+_UNIT_KIND = 4
+
+# Type ID of labels without an entity type
+_NO_TYPE = -1
+
+_NAME = MentionType.of("name")
+
+
+class LabelInventory:
+    """Integer IDs for the labels of a mention encoder.
+
+    For each label ID, the inventory stores its kind and the ID of its entity type, so
+    that labels can be decoded without parsing them again. Labels are added as they are
+    encountered, with the outside label always having ID 0.
+    """
+
+    OUTSIDE_ID = 0
+
+    def __init__(self, encoder: "AbstractMentionEncoder") -> None:
+        self._prefix_kinds = (
+            (encoder.BEGIN_PREFIX, _BEGIN_KIND),
+            (encoder.LAST_PREFIX, _LAST_KIND),
+            (encoder.UNIT_PREFIX, _UNIT_KIND),
+            (encoder.INSIDE_PREFIX, _INSIDE_KIND),
+        )
+        self._outside = encoder.OUTSIDE
+        self.labels: List[str] = [encoder.OUTSIDE]
+        self.kinds: List[int] = [_OUTSIDE_KIND]
+        self.type_ids: List[int] = [_NO_TYPE]
+        # A single instance of each entity type, by type ID
+        self.entity_types: List[EntityType] = []
+        self._label_ids: Dict[str, int] = {encoder.OUTSIDE: self.OUTSIDE_ID}
+        self._prefixed_ids: Dict[Tuple[str, str], int] = {}
+        self._entity_type_ids: Dict[EntityType, int] = {}
+        # Object array of the labels, created when first needed and whenever labels
+        # have been added since
+        self._label_array: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def label_id(self, label: str) -> int:
+        """Return the ID of a label, adding it if needed."""
+        label_id = self._label_ids.get(label)
+        if label_id is None:
+            label_id = self._add_label(label)
+        return label_id
+
+    def prefixed_label_id(self, prefix: str, entity_type: EntityType) -> int:
+        """Return the ID of the label for a prefix and entity type, adding it if needed."""
+        key = (prefix, entity_type.types[0])
+        label_id = self._prefixed_ids.get(key)
+        if label_id is None:
+            label_id = self.label_id(_create_label(prefix, entity_type))
+            self._prefixed_ids[key] = label_id
+        return label_id
+
+    def entity_type_id(self, entity_type: EntityType) -> int:
+        """Return the ID of an entity type, adding it if needed."""
+        type_id = self._entity_type_ids.get(entity_type)
+        if type_id is None:
+            type_id = len(self.entity_types)
+            self._entity_type_ids[entity_type] = type_id
+            self.entity_types.append(entity_type)
+        return type_id
+
+    def label_counts(self, label_ids: np.ndarray) -> Dict[str, int]:
+        """Return the number of times each label occurs in an array of label IDs."""
+        counts = np.bincount(label_ids, minlength=len(self.labels))
+        return {label: int(count) for label, count in zip(self.labels, counts)}
+
+    def label_array(self, label_ids: np.ndarray) -> np.ndarray:
+        """Return an array of the labels for an array of label IDs."""
+        if self._label_array is None:
+            self._label_array = np.array(self.labels, dtype=object)
+        return self._label_array[label_ids]
+
+    def _add_label(self, label: str) -> int:
+        if label == self._outside:
+            kind = _OUTSIDE_KIND
+        else:
+            for prefix, kind in self._prefix_kinds:
+                if label.startswith(prefix):
+                    break
+            else:
+                raise ValueError(f"Unknown label: {repr(label)}")
+
+        type_id = _NO_TYPE
+        if kind != _OUTSIDE_KIND:
+            type_id = self.entity_type_id(_extract_entity_type(label))
+
+        label_id = len(self.labels)
+        self._label_ids[label] = label_id
+        self.labels.append(label)
+        self.kinds.append(kind)
+        self.type_ids.append(type_id)
+        self._label_array = None
+        return label_id
 
 
 class AbstractMentionEncoder(MentionEncoder, metaclass=ABCMeta):
@@ -39,14 +136,88 @@ class AbstractMentionEncoder(MentionEncoder, metaclass=ABCMeta):
     UNIT_PREFIX = "U"
     OUTSIDE = "O"
 
+    def __init__(self) -> None:
+        self._create_tables()
+
+    def __getattr__(self, name: str) -> Any:
+        # Encoders pickled before the tables were added are loaded without them
+        if name in ("label_inventory", "_prefix_table"):
+            self._create_tables()
+            return getattr(self, name)
+        raise AttributeError(name)
+
+    def _create_tables(self) -> None:
+        self.label_inventory = LabelInventory(self)
+        # The prefix for each combination of whether a token is first in its mention,
+        # last in its mention, and first after a mention of the same type
+        self._prefix_table = tuple(
+            self._prefix(first, last, first_after_same_type)
+            for first in (False, True)
+            for last in (False, True)
+            for first_after_same_type in (False, True)
+        )
+
     @abstractmethod
-    def _encode_token(self, token: _EncoderToken) -> str:
-        """Encode the tokens using the mention encoding."""
+    def _prefix(self, first: bool, last: bool, first_after_same_type: bool) -> str:
+        """Return the prefix for a token inside a mention."""
+
+    def _allows_transition(self, prev_kind: int, kind: int, same_type: bool) -> bool:
+        """Return whether a label of one kind can follow a label of another kind.
+
+        The start and end of a sentence are treated as outside labels.
+        """
+        return True
+
+    def transition_constraints(
+        self, labels: Sequence[str]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return which of the given labels are valid at each position of a sequence.
+
+        Returns boolean arrays of whether each label can start a sentence, whether
+        each label can follow each other label (indexed by previous label, then next
+        label), and whether each label can end a sentence.
+        """
+        inventory = self.label_inventory
+        label_ids = [inventory.label_id(label) for label in labels]
+        kinds = [inventory.kinds[label_id] for label_id in label_ids]
+        type_ids = [inventory.type_ids[label_id] for label_id in label_ids]
+
+        starts = np.array(
+            [self._allows_transition(_OUTSIDE_KIND, kind, False) for kind in kinds],
+            dtype=bool,
+        )
+        transitions = np.array(
+            [
+                [
+                    self._allows_transition(prev_kind, kind, prev_type_id == type_id)
+                    for kind, type_id in zip(kinds, type_ids)
+                ]
+                for prev_kind, prev_type_id in zip(kinds, type_ids)
+            ],
+            dtype=bool,
+        ).reshape(len(labels), len(labels))
+        ends = np.array(
+            [self._allows_transition(kind, _OUTSIDE_KIND, False) for kind in kinds],
+            dtype=bool,
+        )
+        return starts, transitions, ends
 
     def encode_mentions(
         self, sentence: Sentence, mentions: Sequence[Mention]
     ) -> Sequence[str]:
-        encoder_tokens = [_EncoderToken() for _ in sentence.tokens]
+        labels = self.label_inventory.labels
+        return tuple(
+            [labels[label_id] for label_id in self.encode_mention_ids(sentence, mentions)]
+        )
+
+    def encode_mention_ids(
+        self, sentence: Sentence, mentions: Sequence[Mention]
+    ) -> List[int]:
+        """Encode mentions as IDs in the label inventory."""
+        length = len(sentence)
+        entity_types: List[Optional[EntityType]] = [None] * length
+        firsts = [False] * length
+        lasts = [False] * length
         for mention in mentions:
             start = mention.start
             end = mention.end
@@ -54,161 +225,316 @@ class AbstractMentionEncoder(MentionEncoder, metaclass=ABCMeta):
 
             # Set entity type on all tokens
             for idx in range(start, end):
-                token = encoder_tokens[idx]
-                if token.entity_type is not None:
+                if entity_types[idx] is not None:
                     raise ValueError(
-                        f"Token at index {idx} already has entity type {token.entity_type}, "
+                        f"Token at index {idx} already has entity type {entity_types[idx]}, "
                         f"refusing to overwrite it with entity type {entity_type}"
                     )
-                token.entity_type = entity_type
+                entity_types[idx] = entity_type
 
             # Set first and last. Note that both will be True for single-token mentions.
-            encoder_tokens[start].first_token = True
+            firsts[start] = True
             # Exclusive end offset, so subtract one
-            encoder_tokens[end - 1].last_token = True
+            lasts[end - 1] = True
 
-        # Do a final pass to mark special tokens for IOB encoding
-        prev_entity_type = None
-        for token in encoder_tokens:
-            if token.entity_type == prev_entity_type and token.first_token:
-                token.first_token_after_same_type_mention = True
+        # Optimization: avoid repeated lookups
+        prefix_table = self._prefix_table
+        prefixed_label_id = self.label_inventory.prefixed_label_id
+        outside_id = LabelInventory.OUTSIDE_ID
 
-            prev_entity_type = token.entity_type
+        label_ids = []
+        prev_entity_type = None
+        for entity_type, first, last in zip(entity_types, firsts, lasts):
+            if entity_type is None:
+                label_ids.append(outside_id)
+            else:
+                # First after same type is needed for IOB encoding
+                first_after_same_type = first and entity_type == prev_entity_type
+                prefix = prefix_table[4 * first + 2 * last + first_after_same_type]
+                label_ids.append(prefixed_label_id(prefix, entity_type))
+            prev_entity_type = entity_type
 
-        return tuple(self._encode_token(token) for token in encoder_tokens)
+        return label_ids
 
     def decode_mentions(
         self, sentence: Sentence, labels: Sequence[str]
     ) -> Sequence[Mention]:
-        if len(sentence) != len(labels):
+        label_id = self.label_inventory.label_id
+        return self.decode_mention_ids(sentence, [label_id(label) for label in labels])
+
+    def decode_mention_ids(
+        self, sentence: Sentence, label_ids: Sequence[int]
+    ) -> List[Mention]:
+        """Decode mentions from IDs in the label inventory."""
+        if len(sentence) != len(label_ids):
             raise ValueError(
-                f"Sentence is of length {len(sentence)} but {len(labels)} labels provided"
+                f"Sentence is of length {len(sentence)} but {len(label_ids)} labels provided"
             )
 
+        # Optimization: avoid repeated lookups
+        inventory = self.label_inventory
+        kinds = inventory.kinds
+        type_ids = inventory.type_ids
+        entity_types = inventory.entity_types
+
+        # Spans always lie within the sentence, so mentions are created unchecked
         mentions = []
-        entity_type: Optional[EntityType] = None
-        mention_start: Optional[int] = None
+        # Type ID and start of the current mention, if any
+        open_type_id = _NO_TYPE
+        mention_start = 0
 
         sentence_idx = sentence.index
-        for idx, _ in enumerate(sentence.tokens):
-            label = labels[idx]
+        for idx, label_id in enumerate(label_ids):
+            kind = kinds[label_id]
+            type_id = type_ids[label_id]
 
-            if label.startswith(self.BEGIN_PREFIX):
+            if kind == _BEGIN_KIND:
                 # Clear out any started mention
-                if entity_type:
-                    assert mention_start is not None
-                    mention = Mention(
-                        sentence_idx, mention_start, idx, MentionType("name"), entity_type
+                if open_type_id != _NO_TYPE:
+                    mentions.append(
+                        Mention.create_unchecked(
+                            sentence_idx,
+                            mention_start,
+                            idx,
+                            _NAME,
+                            entity_types[open_type_id],
+                        )
                     )
-                    mentions.append(mention)
 
                 # Start new mention
-                entity_type = _extract_entity_type(label)
+                open_type_id = type_id
                 mention_start = idx
-            elif label.startswith(self.LAST_PREFIX):
+            elif kind == _LAST_KIND:
                 # Clear out any started mention if the type is different
-                if entity_type and entity_type != _extract_entity_type(label):
-                    assert mention_start is not None
-                    mention = Mention(
-                        sentence_idx, mention_start, idx, MentionType("name"), entity_type
+                if open_type_id != _NO_TYPE and open_type_id != type_id:
+                    mentions.append(
+                        Mention.create_unchecked(
+                            sentence_idx,
+                            mention_start,
+                            idx,
+                            _NAME,
+                            entity_types[open_type_id],
+                        )
                     )
-                    mentions.append(mention)
-                    entity_type = None
-                    mention_start = None
+                    open_type_id = _NO_TYPE
 
                 # Fill in entity type if needed
                 # This can occur if a last is predicted without a preceding begin or inside
-                if not entity_type:
+                if open_type_id == _NO_TYPE:
                     mention_start = idx
-                    entity_type = _extract_entity_type(label)
 
-                assert mention_start is not None
-                mention = Mention(
-                    sentence_idx, mention_start, idx + 1, MentionType("name"), entity_type
+                mentions.append(
+                    Mention.create_unchecked(
+                        sentence_idx, mention_start, idx + 1, _NAME, entity_types[type_id]
+                    )
                 )
-                mentions.append(mention)
-                mention_start = None
-                entity_type = None
-            elif label.startswith(self.UNIT_PREFIX):
+                open_type_id = _NO_TYPE
+            elif kind == _UNIT_KIND:
                 # Clear out any previously started mention
-                if entity_type:
-                    assert mention_start is not None
-                    mention = Mention(
-                        sentence_idx, mention_start, idx, MentionType("name"), entity_type
+                if open_type_id != _NO_TYPE:
+                    mentions.append(
+                        Mention.create_unchecked(
+                            sentence_idx,
+                            mention_start,
+                            idx,
+                            _NAME,
+                            entity_types[open_type_id],
+                        )
                     )
-                    mentions.append(mention)
 
                 # Unit mention
-                entity_type = _extract_entity_type(label)
-                mention = Mention(
-                    sentence_idx, idx, idx + 1, MentionType("name"), entity_type
+                mentions.append(
+                    Mention.create_unchecked(
+                        sentence_idx, idx, idx + 1, _NAME, entity_types[type_id]
+                    )
                 )
-                mentions.append(mention)
-                mention_start = None
-                entity_type = None
-            elif label.startswith(self.INSIDE_PREFIX):
+                open_type_id = _NO_TYPE
+            elif kind == _INSIDE_KIND:
                 # Clear out any started mention if the type is different
-                if entity_type and entity_type != _extract_entity_type(label):
-                    assert mention_start is not None
-                    mention = Mention(
-                        sentence_idx, mention_start, idx, MentionType("name"), entity_type
+                if open_type_id != _NO_TYPE and open_type_id != type_id:
+                    mentions.append(
+                        Mention.create_unchecked(
+                            sentence_idx,
+                            mention_start,
+                            idx,
+                            _NAME,
+                            entity_types[open_type_id],
+                        )
                     )
-                    mentions.append(mention)
-                    entity_type = None
-                    mention_start = None
+                    open_type_id = _NO_TYPE
 
                 # Start mention if needed
-                # This can occur if a last is predicted without a preceding begin or inside
-                if mention_start is None:
+                # This can occur if an inside is predicted without a preceding begin
+                if open_type_id == _NO_TYPE:
                     mention_start = idx
-                    entity_type = _extract_entity_type(label)
-            elif label == self.OUTSIDE:
+                    open_type_id = type_id
+            elif open_type_id != _NO_TYPE:
                 # Close any non-ended mention
                 # This will happen if a mention doesn't end with last
-                if mention_start is not None:
-                    mention = Mention(
+                mentions.append(
+                    Mention.create_unchecked(
                         sentence_idx,
                         mention_start,
                         idx,  # Previous token must be the last one, and index is exclusive
-                        MentionType("name"),
-                        entity_type,
+                        _NAME,
+                        entity_types[open_type_id],
                     )
-                    mentions.append(mention)
-                    mention_start = None
-                    entity_type = None
-            else:
-                raise ValueError(f"Unknown label: {repr(label)}")
+                )
+                open_type_id = _NO_TYPE
 
         # Close any dangling mention at end of sentence
-        if mention_start is not None:
-            mention = Mention(
-                sentence_idx,
-                mention_start,
-                len(sentence.tokens),  # Final index of sentence
-                MentionType("name"),
-                entity_type,
+        if open_type_id != _NO_TYPE:
+            mentions.append(
+                Mention.create_unchecked(
+                    sentence_idx,
+                    mention_start,
+                    len(sentence),  # Final index of sentence
+                    _NAME,
+                    entity_types[open_type_id],
+                )
             )
-            mentions.append(mention)
 
         return mentions
 
+    def encode_corpus(self, docs: Iterable[Document]) -> Tuple[np.ndarray, np.ndarray]:
+        """Encode the mentions of every sentence in a corpus as label IDs.
+
+        Returns a flat int32 array of the label IDs of all tokens and an array of
+        offsets into it, where sentence i covers label_ids[offsets[i]:offsets[i + 1]].
+        """
+        entity_type_id = self.label_inventory.entity_type_id
+        sentence_lengths: List[int] = []
+        mention_starts: List[int] = []
+        mention_ends: List[int] = []
+        mention_type_ids: List[int] = []
+        token_count = 0
+        for doc in docs:
+            sentence_offsets = []
+            for sentence in doc.sentences:
+                sentence_offsets.append(token_count)
+                sentence_lengths.append(len(sentence))
+                token_count += len(sentence)
+            for mention in doc.mentions:
+                offset = sentence_offsets[mention.sentence_index]
+                mention_starts.append(offset + mention.start)
+                mention_ends.append(offset + mention.end)
+                mention_type_ids.append(entity_type_id(mention.entity_type))
+
+        offsets = np.zeros(len(sentence_lengths) + 1, dtype=np.int64)
+        np.cumsum(sentence_lengths, out=offsets[1:])
+        label_ids = np.full(token_count, LabelInventory.OUTSIDE_ID, dtype=np.int32)
+        if not mention_starts:
+            return label_ids, offsets
+
+        starts = np.array(mention_starts, dtype=np.int64)
+        ends = np.array(mention_ends, dtype=np.int64)
+        lengths = ends - starts
+
+        # Position of every token covered by a mention
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(
+            lengths.sum()
+        )
+        coverage = np.bincount(positions, minlength=token_count)
+        if coverage.max() > 1:
+            position = int(np.argmax(coverage > 1))
+            sentence_idx = int(np.searchsorted(offsets, position, side="right")) - 1
+            raise ValueError(
+                f"Token at index {position - offsets[sentence_idx]} of sentence "
+                f"{sentence_idx} is part of more than one mention"
+            )
+
+        type_ids = np.full(token_count, _NO_TYPE, dtype=np.int64)
+        type_ids[positions] = np.repeat(mention_type_ids, lengths)
+        firsts = np.zeros(token_count, dtype=bool)
+        firsts[starts] = True
+        lasts = np.zeros(token_count, dtype=bool)
+        lasts[ends - 1] = True
+        # First after same type is needed for IOB encoding
+        prev_type_ids = np.empty_like(type_ids)
+        prev_type_ids[1:] = type_ids[:-1]
+        prev_type_ids[offsets[:-1]] = _NO_TYPE
+        first_after_same_type = firsts & (type_ids == prev_type_ids)
+
+        # Look up the label for each distinct combination of prefix and type
+        prefix_indices = 4 * firsts + 2 * lasts + first_after_same_type
+        codes = prefix_indices[positions] * len(self.label_inventory.entity_types) + (
+            type_ids[positions]
+        )
+        unique_codes, inverse = np.unique(codes, return_inverse=True)
+        entity_types = self.label_inventory.entity_types
+        code_label_ids = np.array(
+            [
+                self.label_inventory.prefixed_label_id(
+                    self._prefix_table[prefix_idx], entity_types[type_id]
+                )
+                for prefix_idx, type_id in zip(
+                    *np.divmod(unique_codes.tolist(), len(entity_types))
+                )
+            ],
+            dtype=np.int32,
+        )
+        label_ids[positions] = code_label_ids[inverse]
+        return label_ids, offsets
+
+    def decode_corpus(
+        self, docs: Iterable[Document], label_ids: np.ndarray, offsets: np.ndarray
+    ) -> List[Document]:
+        """Return copies of documents with mentions decoded from corpus label IDs.
+
+        The label IDs and offsets are in the form returned by encode_corpus.
+        """
+        # Only sentences with a label other than outside can contain mentions
+        labeled = np.flatnonzero(label_ids != LabelInventory.OUTSIDE_ID)
+        labeled_sentences = set(
+            np.unique(np.searchsorted(offsets, labeled, side="right") - 1).tolist()
+        )
+
+        decoded_docs = []
+        sentence_count = 0
+        for doc in docs:
+            mentions: List[Mention] = []
+            for sentence in doc.sentences:
+                start = offsets[sentence_count]
+                end = offsets[sentence_count + 1]
+                if end - start != len(sentence):
+                    raise ValueError(
+                        f"Sentence is of length {len(sentence)} but "
+                        f"{end - start} labels provided"
+                    )
+                if sentence_count in labeled_sentences:
+                    mentions.extend(
+                        self.decode_mention_ids(sentence, label_ids[start:end].tolist())
+                    )
+                sentence_count += 1
+            decoded_docs.append(doc.copy_with_mentions(mentions))
+
+        if sentence_count != len(offsets) - 1:
+            raise ValueError(
+                f"Offsets are for {len(offsets) - 1} sentences "
+                f"but {sentence_count} sentences provided"
+            )
+        return decoded_docs
+
 
 class BILOU(AbstractMentionEncoder):
-    def _encode_token(self, token: _EncoderToken) -> str:
-        if token.entity_type:
-            if token.first_token:
-                if token.last_token:
-                    # Both first and last means unit
-                    prefix = self.UNIT_PREFIX
-                else:
-                    prefix = self.BEGIN_PREFIX
-            elif token.last_token:
-                prefix = self.LAST_PREFIX
+    def _prefix(self, first: bool, last: bool, first_after_same_type: bool) -> str:
+        if first:
+            if last:
+                # Both first and last means unit
+                return self.UNIT_PREFIX
             else:
-                prefix = self.INSIDE_PREFIX
-            return _create_label(prefix, token.entity_type)
+                return self.BEGIN_PREFIX
+        elif last:
+            return self.LAST_PREFIX
         else:
-            return self.OUTSIDE
+            return self.INSIDE_PREFIX
+
+    def _allows_transition(self, prev_kind: int, kind: int, same_type: bool) -> bool:
+        if prev_kind == _BEGIN_KIND or prev_kind == _INSIDE_KIND:
+            # A mention continues until its last token
+            return (kind == _INSIDE_KIND or kind == _LAST_KIND) and same_type
+        else:
+            return kind != _INSIDE_KIND and kind != _LAST_KIND
 
 
 class BIOES(BILOU):
@@ -221,55 +547,63 @@ class BMES(BIOES):
 
 
 class BIOU(AbstractMentionEncoder):
-    def _encode_token(self, token: _EncoderToken) -> str:
-        if token.entity_type:
-            if token.first_token:
-                if token.last_token:
-                    # Both first and last means unit
-                    prefix = self.UNIT_PREFIX
-                else:
-                    prefix = self.BEGIN_PREFIX
+    def _prefix(self, first: bool, last: bool, first_after_same_type: bool) -> str:
+        if first:
+            if last:
+                # Both first and last means unit
+                return self.UNIT_PREFIX
             else:
-                prefix = self.INSIDE_PREFIX
-            return _create_label(prefix, token.entity_type)
+                return self.BEGIN_PREFIX
+        else:
+            return self.INSIDE_PREFIX
+
+    def _allows_transition(self, prev_kind: int, kind: int, same_type: bool) -> bool:
+        if prev_kind == _BEGIN_KIND:
+            # Single-token mentions are units, so a begin must be continued
+            return kind == _INSIDE_KIND and same_type
+        elif kind == _INSIDE_KIND:
+            return prev_kind == _INSIDE_KIND and same_type
         else:
-            return self.OUTSIDE
+            return True
 
 
 class IO(AbstractMentionEncoder):
-    def _encode_token(self, token: _EncoderToken) -> str:
-        if token.entity_type:
-            return _create_label(self.INSIDE_PREFIX, token.entity_type)
-        else:
-            return self.OUTSIDE
+    def _prefix(self, first: bool, last: bool, first_after_same_type: bool) -> str:
+        return self.INSIDE_PREFIX
 
 
 class IOB(AbstractMentionEncoder):
-    def _encode_token(self, token: _EncoderToken) -> str:
-        if token.entity_type:
-            if token.first_token_after_same_type_mention:
-                prefix = self.BEGIN_PREFIX
-            else:
-                prefix = self.INSIDE_PREFIX
-            return _create_label(prefix, token.entity_type)
+    def _prefix(self, first: bool, last: bool, first_after_same_type: bool) -> str:
+        if first_after_same_type:
+            return self.BEGIN_PREFIX
         else:
-            return self.OUTSIDE
+            return self.INSIDE_PREFIX
+
+    def _allows_transition(self, prev_kind: int, kind: int, same_type: bool) -> bool:
+        # Begin is only used to separate adjacent mentions of the same type
+        if kind == _BEGIN_KIND:
+            return (prev_kind == _BEGIN_KIND or prev_kind == _INSIDE_KIND) and same_type
+        else:
+            return True
 
 
 class BIO(AbstractMentionEncoder):
-    def _encode_token(self, token: _EncoderToken) -> str:
-        if token.entity_type:
-            if token.first_token:
-                prefix = self.BEGIN_PREFIX
-            else:
-                prefix = self.INSIDE_PREFIX
-            return _create_label(prefix, token.entity_type)
+    def _prefix(self, first: bool, last: bool, first_after_same_type: bool) -> str:
+        if first:
+            return self.BEGIN_PREFIX
+        else:
+            return self.INSIDE_PREFIX
+
+    def _allows_transition(self, prev_kind: int, kind: int, same_type: bool) -> bool:
+        # Inside can only continue a mention of the same type
+        if kind == _INSIDE_KIND:
+            return (prev_kind == _BEGIN_KIND or prev_kind == _INSIDE_KIND) and same_type
         else:
-            return self.OUTSIDE
+            return True
 
 
 # Declared mid-file so it can refer to classes in file
-_ENCODING_NAMES: Dict[str, Type[MentionEncoder]] = {
+_ENCODING_NAMES: Dict[str, Type[AbstractMentionEncoder]] = {
     "IOB": IOB,
     "IOB1": IOB,
     "BIO": BIO,
@@ -284,7 +618,7 @@ _ENCODING_NAMES: Dict[str, Type[MentionEncoder]] = {
 SUPPORTED_ENCODINGS: Sequence[str] = tuple(sorted(_ENCODING_NAMES))
 
 
-def get_mention_encoder(name: str) -> Type[MentionEncoder]:
+def get_mention_encoder(name: str) -> Type[AbstractMentionEncoder]:
     name = name.upper()
     if name in _ENCODING_NAMES:
         return _ENCODING_NAMES[name]
@@ -295,7 +629,7 @@ def get_mention_encoder(name: str) -> Type[MentionEncoder]:
 def _extract_entity_type(label: str) -> EntityType:
     splits = label.split(LABEL_DELIM)
     if len(splits) == 2:
-        return EntityType(splits[1])
+        return EntityType.of(splits[1])
     else:
         raise ValueError("Cannot parse label {!r}".format(label))
 
@@ -1,7 +1,28 @@
+import copy
+import hashlib
+import json
+import os
+import pickle
 import re
 from abc import ABCMeta, abstractmethod
-from functools import lru_cache
-from typing import Any, Dict, Iterable, List, Mapping, MutableMapping, Optional, Sequence
+from collections import OrderedDict
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 
 # For Unicode properties
 import numpy as np
@@ -9,7 +30,15 @@ import regex
 from attr import attrs
 from quickvec import SqliteWordEmbedding
 
-from nerpy.document import Document, Sentence, Token
+from nerpy.document import CompactSentence, Document, Sentence, Token
+from nerpy.encoding import MentionEncoder
+from nerpy.io import (
+    PathType,
+    iter_records,
+    read_record,
+    read_record_index,
+    write_records,
+)
 
 # Sentinel for dict lookup
 _NOTHING = object()
@@ -19,48 +48,328 @@ _RE_DIGIT = re.compile(r"\d")
 # We use the regex package since we want to use Unicode properties
 _RE_PUNC = regex.compile(r"\p{p}")
 
+_FEATURE_CACHE_MAGIC = b"NERPYFEAT1\n"
+# Number of tokens whose features SentenceFeatureExtractor caches by default
+_DEFAULT_CACHE_SIZE = 10000
+
 # pylint: disable=invalid-name
 FeatureSink = MutableMapping[str, float]
 ItemFeatures = Mapping[str, float]
 SequenceFeatures = Sequence[ItemFeatures]
 CorpusFeatures = Sequence[SequenceFeatures]
+ItemFeatureIds = Mapping[int, float]
+SequenceFeatureIds = Sequence[ItemFeatureIds]
+CorpusFeatureIds = Sequence[SequenceFeatureIds]
 SequenceLabels = Sequence[str]
 CorpusLabels = Sequence[SequenceLabels]
+LabeledSequence = Tuple[SequenceFeatures, SequenceLabels]
 
 
 class FeatureExtractor(metaclass=ABCMeta):
+    # Whether the output for a token depends only on the token itself, so that it can be
+    # cached by SentenceFeatureExtractor and re-labeled for each window position.
+    # Cacheable extractors must add features using _add_feature_with_value or
+    # _add_feature_without_value so that the position can be re-labeled.
+    cacheable = True
+
     @abstractmethod
     def extract(self, token: Token, index: int, output: FeatureSink) -> None:
         raise NotImplementedError()
 
+    # Whether the output for a token depends only on its text, so that it can be
+    # extracted using extract_text without creating a Token. Subclass
+    # TextFeatureExtractor rather than setting this directly.
+    text_only = False
+
+    def prepare(self, tokens: Sequence[Token]) -> None:
+        """Prepare to extract features for the tokens of a sentence.
+
+        SentenceFeatureExtractor calls this before calling extract for any of the tokens,
+        allowing extractors to load what they need for all of them at once.
+        """
+
+    def extract_text(self, text: str, index: int, output: FeatureSink) -> None:
+        raise NotImplementedError()
+
+    def prepare_texts(self, texts: Sequence[str]) -> None:
+        """Prepare to extract features for the token texts of a sentence.
+
+        This is the equivalent of prepare for extract_text.
+        """
+
+
+class TextFeatureExtractor(FeatureExtractor):
+    """An extractor whose features depend only on the text of each token.
+
+    SentenceFeatureExtractor uses extract_text and prepare_texts directly for a
+    CompactSentence when all of its extractors are text-only, reading the texts from
+    the sentence's vocabulary instead of creating its tokens.
+    """
+
+    text_only = True
+
+    @abstractmethod
+    def extract_text(self, text: str, index: int, output: FeatureSink) -> None:
+        raise NotImplementedError()
+
+    def extract(self, token: Token, index: int, output: FeatureSink) -> None:
+        self.extract_text(token.text, index, output)
+
+    def prepare(self, tokens: Sequence[Token]) -> None:
+        self.prepare_texts([token.text for token in tokens])
+
 
-class WordEmbeddingFeatures(FeatureExtractor):
+class WordEmbeddingFeatures(TextFeatureExtractor):
 
     FEATURE = "v"
     OOV = "OOV"
+    # Vectors are already cached by this class and the outputs are too large to cache per token
+    cacheable = False
+    # SQLite limits the number of parameters in a query
+    MAX_BATCH_SIZE = 900
 
-    def __init__(self, path: str, *, scale: float = 1.0, cache_size: int = 10000):
+    def __init__(
+        self,
+        path: str,
+        *,
+        scale: float = 1.0,
+        cache_size: int = 10000,
+        preload: bool = False,
+        matrix_path: Optional[str] = None,
+        projection_dim: Optional[int] = None,
+        buckets: Optional[int] = None,
+        fit_size: int = 100000,
+    ):
+        """Create features from the word embedding in the QuickVec database at path.
+
+        If preload is set, the whole embedding is loaded into memory. If matrix_path is
+        set, the embedding is instead memory-mapped from a matrix stored in that
+        directory, which is created from the database if it does not exist. Processes
+        that memory-map the same matrix share a single copy of it.
+
+        If projection_dim is set, vectors are projected to that many dimensions using
+        PCA. If buckets is set, each dimension is quantized into that many buckets of
+        equal frequency, giving one binary feature per dimension instead of a real
+        value. Both are fit to the first fit_size words of the embedding, usually the
+        most frequent ones, unless fit is called with other words. Since the fitted
+        values are pickled with the extractor, they are not fit again when loading it.
+        """
+        self.path = path
         self.scale = scale
+        self.matrix_path = matrix_path
         self.word_vectors = SqliteWordEmbedding.open(path)
+
+        if projection_dim is not None and not 0 < projection_dim <= self.word_vectors.dim:
+            raise ValueError(
+                f"Projection dimension must be between 1 and {self.word_vectors.dim}: "
+                f"{projection_dim}"
+            )
+        if buckets is not None and buckets < 2:
+            raise ValueError(f"Number of buckets must be at least 2: {buckets}")
+        self.projection_dim = projection_dim
+        self.buckets = buckets
+        self.fit_size = fit_size
+        # Mean and projection matrix for PCA, and the upper edges of each dimension's
+        # buckets other than the last, set by fit
+        self._projection_mean: Optional[np.ndarray] = None
+        self._projection: Optional[np.ndarray] = None
+        self._bucket_edges: Optional[np.ndarray] = None
+
         self._feature_keys_cache: Dict[int, List[str]] = {}
         # Store normalized form or None to indicate no match
         self._word_casing: Dict[str, Optional[str]] = {}
-        # Cache vectors
-        # We look up directly from the vectors if there is no scaling, or add our own wrapper if there is scaling.
-        self._embedding_cache = lru_cache(cache_size)(
-            self.word_vectors.__getitem__
-            if self.scale == 1.0
-            else self._scaled_word_vector
+        # Cache transformed vectors by normalized form. Vectors are stored as lists since
+        # adding floats to the output is much faster than adding NumPy scalars.
+        self._vector_cache = _FeatureCache(cache_size)
+        # If vectors have been loaded, the unscaled vectors and the row of each word.
+        # Words without rows are then OOV without querying the database.
+        self._matrix: Optional[np.ndarray] = None
+        self._rows: Optional[Dict[str, int]] = None
+        # If only some words were preloaded, the words that were found
+        self._preloaded_words: Optional[List[str]] = None
+
+        if matrix_path is not None:
+            self._open_matrix(Path(matrix_path))
+        elif preload:
+            self.preload()
+
+        if projection_dim is not None or buckets is not None:
+            self.fit()
+
+    def __getstate__(self) -> dict:
+        # Fitted projections and buckets are kept
+        state = dict(self.__dict__)
+        # The database connection cannot be pickled, and memory-mapped matrices are
+        # opened again rather than copied
+        state["word_vectors"] = None
+        if self.matrix_path is not None or self._rows is not None:
+            state["_matrix"] = None
+            state["_rows"] = None
+        # Preloaded vectors are also read from the database again rather than copied
+        state["_preloaded"] = self.matrix_path is None and self._rows is not None
+        state["_vector_cache"] = _FeatureCache(self._vector_cache.maxsize)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        preloaded = state.pop("_preloaded", False)
+        self.__dict__.update(state)
+        self.word_vectors = SqliteWordEmbedding.open(self.path)
+        if self.matrix_path is not None:
+            self._open_matrix(Path(self.matrix_path))
+        elif preloaded:
+            self.preload(self._preloaded_words)
+
+    @property
+    def preloaded(self) -> bool:
+        return self._rows is not None
+
+    @property
+    def dim(self) -> int:
+        """The number of dimensions of the vectors used for features."""
+        return (
+            self.projection_dim
+            if self.projection_dim is not None
+            else self.word_vectors.dim
         )
 
-    def extract(self, token: Token, index: int, output: FeatureSink) -> None:
-        text = token.text
+    def fit(self, words: Optional[Iterable[str]] = None) -> None:
+        """Fit the projection and buckets to the vectors of the given words.
+
+        If no words are given, the first fit_size words of the embedding are used.
+        """
+        if words is None:
+            _, matrix = _read_embedding(self.word_vectors, self.fit_size)
+        else:
+            _, matrix = self._query_vectors(words)
+        matrix = matrix.astype(np.float64)
+
+        if self.projection_dim is not None:
+            mean = matrix.mean(axis=0)
+            _, _, right_singular = np.linalg.svd(matrix - mean, full_matrices=False)
+            if len(right_singular) < self.projection_dim:
+                raise ValueError(
+                    f"Cannot fit a projection to {self.projection_dim} dimensions "
+                    f"using {len(matrix)} vectors"
+                )
+            self._projection_mean = mean
+            self._projection = right_singular[: self.projection_dim].T
+            matrix = (matrix - mean) @ self._projection
+
+        if self.buckets is not None:
+            quantiles = np.linspace(0.0, 1.0, self.buckets + 1)[1:-1]
+            self._bucket_edges = np.quantile(matrix, quantiles, axis=0)
+
+        # Previous vectors and features no longer apply
+        self._vector_cache.clear()
+        self._feature_keys_cache.clear()
+
+    def preload(self, words: Optional[Iterable[str]] = None) -> None:
+        """Load vectors into memory so that the database is no longer queried.
+
+        If words are given, only their vectors, and those of their lowercase forms, are
+        loaded, and any other word will be treated as OOV.
+        """
+        if words is None:
+            self._rows, self._matrix = self._read_all_vectors()
+            self._preloaded_words = None
+        else:
+            words = set(words)
+            words.update([word.lower() for word in words])
+            found_words, self._matrix = self._query_vectors(words)
+            self._rows = {word: row for row, word in enumerate(found_words)}
+            self._preloaded_words = found_words
+        # Casing and vectors are now determined by the loaded vocabulary
+        self._word_casing.clear()
+        self._vector_cache.clear()
+
+    def _open_matrix(self, matrix_path: Path) -> None:
+        vectors_path = matrix_path / "vectors.npy"
+        words_path = matrix_path / "words.pkl"
+        if not vectors_path.exists():
+            self._write_matrix(matrix_path)
+
+        self._matrix = np.load(vectors_path, mmap_mode="r")
+        with open(words_path, "rb") as words_file:
+            words = pickle.load(words_file)
+        self._rows = {word: row for row, word in enumerate(words)}
+
+    def _write_matrix(self, matrix_path: Path) -> None:
+        word_vectors = self.word_vectors
+        matrix_path.mkdir(parents=True, exist_ok=True)
+        # Write to temporary files first so other processes never see partial output
+        tmp_suffix = f".{os.getpid()}.tmp"
+        tmp_vectors_path = matrix_path / ("vectors.npy" + tmp_suffix)
+        tmp_words_path = matrix_path / ("words.pkl" + tmp_suffix)
+        # Write rows directly to the file rather than holding the whole matrix in memory
+        matrix = np.lib.format.open_memmap(
+            tmp_vectors_path,
+            mode="w+",
+            dtype=word_vectors.dtype,
+            shape=(len(word_vectors), word_vectors.dim),
+        )
+        words = []
+        for row, (word, vector) in enumerate(word_vectors.items()):
+            words.append(word)
+            matrix[row] = vector
+        matrix.flush()
+        del matrix
+        with open(tmp_words_path, "wb") as words_file:
+            pickle.dump(words, words_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        os.replace(tmp_words_path, matrix_path / "words.pkl")
+        os.replace(tmp_vectors_path, matrix_path / "vectors.npy")
+
+    def _read_all_vectors(self) -> Tuple[Dict[str, int], np.ndarray]:
+        word_vectors = self.word_vectors
+        matrix = np.empty((len(word_vectors), word_vectors.dim), dtype=word_vectors.dtype)
+        rows = {}
+        for row, (word, vector) in enumerate(word_vectors.items()):
+            rows[word] = row
+            matrix[row] = vector
+        return rows, matrix
+
+    def prepare_texts(self, texts: Sequence[str]) -> None:
+        # Find every word whose casing or vector is not known yet
+        unknown_casing: Set[str] = set()
+        uncached_vectors: Set[str] = set()
+        vector_cache = self._vector_cache
+        for text in texts:
+            norm_text = self._word_casing.get(text, _NOTHING)
+            if norm_text is _NOTHING:
+                if not _is_punc(text):
+                    unknown_casing.add(text)
+            elif norm_text is not None and not vector_cache.peek(norm_text):
+                uncached_vectors.add(norm_text)  # type: ignore
+
+        if not unknown_casing and not uncached_vectors:
+            return
+
+        # Look up all the candidate forms in one batch
+        candidates = (
+            unknown_casing | {text.lower() for text in unknown_casing} | uncached_vectors
+        )
+        vectors = self._lookup_vectors(candidates)
+
+        for text in unknown_casing:
+            if text in vectors:
+                norm_text = text
+            else:
+                lower_text = text.lower()
+                norm_text = lower_text if lower_text in vectors else None
+            self._word_casing[text] = norm_text
+            if norm_text is not None:
+                uncached_vectors.add(norm_text)
+
+        for norm_text in uncached_vectors:
+            vector_cache.put(norm_text, vectors[norm_text])
+
+    def extract_text(self, text: str, index: int, output: FeatureSink) -> None:
         # Do nothing for punc
         if _is_punc(text):
             return
 
         # Optimization: avoid repeated lookups
-        word_vectors = self.word_vectors
+        word_vectors = self.word_vectors if self._rows is None else self._rows
 
         # Optimization: Using get and try/except result in indistinguishable performance
         norm_text = self._word_casing.get(text, _NOTHING)
@@ -84,22 +393,196 @@ class WordEmbeddingFeatures(FeatureExtractor):
         try:
             feature_keys = self._feature_keys_cache[index]
         except KeyError:
-            feature_keys = [
-                f"{self.FEATURE}[{index}]={i}" for i in range(word_vectors.dim)
-            ]
+            if self.buckets is None:
+                feature_keys = [f"{self.FEATURE}[{index}]={i}" for i in range(self.dim)]
+            else:
+                # One feature per bucket of each dimension
+                feature_keys = [
+                    f"{self.FEATURE}[{index}]={i}:{bucket}"
+                    for i in range(self.dim)
+                    for bucket in range(self.buckets)
+                ]
             self._feature_keys_cache[index] = feature_keys
 
-        # Optimization: Update over zip is much faster than any kind of comprehension
         # We suppress type warnings because we know norm_text must be a str at this point
-        output.update(zip(feature_keys, self._embedding_cache(norm_text)))  # type: ignore
+        vector = self._vector_cache.get(norm_text)
+        if vector is None:
+            # Not prepared, so look it up by itself
+            vector = self._lookup_vectors([norm_text])[norm_text]  # type: ignore
+            self._vector_cache.put(norm_text, vector)
+
+        if self.buckets is None:
+            # Optimization: Update over zip is much faster than any kind of comprehension
+            output.update(zip(feature_keys, vector))
+        else:
+            # The vector holds the index of the feature for each dimension's bucket
+            output.update(dict.fromkeys(map(feature_keys.__getitem__, vector), 1.0))
+
+    def _lookup_vectors(self, words: Iterable[str]) -> Dict[str, list]:
+        """Return the feature values of the words that are in the embedding.
+
+        The values are the transformed vectors, or the feature indices of their buckets
+        if buckets are used.
+        """
+        if self._rows is None:
+            found_words, matrix = self._query_vectors(words)
+        else:
+            rows = self._rows
+            found_words = [word for word in words if word in rows]
+            assert self._matrix is not None
+            matrix = self._matrix[[rows[word] for word in found_words]]
+
+        if not found_words:
+            return {}
+
+        # Transform and convert all the vectors at once as a single matrix
+        return dict(zip(found_words, self._transform(matrix).tolist()))
+
+    def _transform(self, matrix: np.ndarray) -> np.ndarray:
+        if self._projection is not None:
+            matrix = (matrix - self._projection_mean) @ self._projection
+
+        if self._bucket_edges is not None:
+            # Count the edges below each value to get its bucket, then offset by the
+            # position of each dimension's first bucket feature
+            buckets = (matrix[:, np.newaxis, :] > self._bucket_edges).sum(axis=1)
+            return buckets + np.arange(matrix.shape[1]) * self.buckets
+
+        if self.scale != 1.0:
+            matrix = matrix * self.scale
+        return matrix
+
+    def _query_vectors(self, words: Iterable[str]) -> Tuple[List[str], np.ndarray]:
+        """Return the words that are in the database and a matrix of their vectors."""
+        word_vectors = self.word_vectors
+        found_words: List[str] = []
+        buffers: List[bytes] = []
+        words = list(words)
+        for start in range(0, len(words), self.MAX_BATCH_SIZE):
+            batch = words[start : start + self.MAX_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            for word, buffer in word_vectors.conn.execute(
+                f"SELECT word, vector FROM embedding WHERE word IN ({placeholders})",
+                batch,
+            ):
+                found_words.append(word)
+                buffers.append(buffer)
+
+        matrix = np.frombuffer(b"".join(buffers), dtype=word_vectors.dtype).reshape(
+            len(found_words), word_vectors.dim
+        )
+        return found_words, matrix
+
+
+class EmbeddingClusterFeatures(TextFeatureExtractor):
+    """Features for the k-means clusters of each word's embedding.
+
+    The clusters are fit to the first fit_size words of the embedding, usually the most
+    frequent ones. Each of the first vocab_size words, or all of them if it is None, is
+    then assigned to its nearest clusters, the number of which is set by assignments.
+    If cache_dir is set, the assignments are stored there and reused by extractors with
+    the same settings.
+    """
+
+    FEATURE = "ec"
+    OOV = "OOV"
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        clusters: int = 256,
+        assignments: int = 1,
+        fit_size: int = 100000,
+        vocab_size: Optional[int] = None,
+        iterations: int = 20,
+        seed: int = 0,
+        cache_dir: Optional[str] = None,
+    ) -> None:
+        if clusters < 1:
+            raise ValueError(f"Number of clusters must be positive: {clusters}")
+        if not 0 < assignments <= clusters:
+            raise ValueError(
+                f"Number of assignments must be between 1 and {clusters}: {assignments}"
+            )
 
-    def _scaled_word_vector(self, word: str) -> np.ndarray:
-        vec = self.word_vectors[word]
-        # We cannot use in-place multiply because vec is read-only
-        return vec * self.scale
+        self.clusters = clusters
+        self.assignments = assignments
+        settings = {
+            "clusters": clusters,
+            "assignments": assignments,
+            "fit_size": fit_size,
+            "vocab_size": vocab_size,
+            "iterations": iterations,
+            "seed": seed,
+        }
+
+        cache_path = None
+        if cache_dir is not None:
+            stat = os.stat(path)
+            key = json.dumps(
+                [str(Path(path).resolve()), stat.st_size, stat.st_mtime, settings],
+                sort_keys=True,
+            )
+            digest = hashlib.sha256(key.encode("utf8")).hexdigest()[:16]
+            cache_path = Path(cache_dir, f"embedding_clusters_{digest}.pkl")
+
+        if cache_path is not None and cache_path.exists():
+            with open(cache_path, "rb") as cache_file:
+                words, word_clusters = pickle.load(cache_file)
+        else:
+            words, word_clusters = self._cluster(
+                SqliteWordEmbedding.open(path), fit_size, vocab_size, iterations, seed
+            )
+            if cache_path is not None:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+                with open(tmp_path, "wb") as cache_file:
+                    pickle.dump(
+                        (words, word_clusters),
+                        cache_file,
+                        protocol=pickle.HIGHEST_PROTOCOL,
+                    )
+                os.replace(tmp_path, cache_path)
+
+        # Precompute the feature values for each word, sharing the strings
+        cluster_names = [str(cluster) for cluster in range(clusters)]
+        self.word_clusters: Dict[str, Tuple[str, ...]] = {
+            word: tuple(cluster_names[cluster] for cluster in row)
+            for word, row in zip(words, word_clusters.tolist())
+        }
+
+    def extract_text(self, text: str, index: int, output: FeatureSink) -> None:
+        word_clusters = self.word_clusters.get(text)
+        if word_clusters is None:
+            word_clusters = self.word_clusters.get(text.lower())
+            if word_clusters is None:
+                _add_feature_with_value(self.FEATURE, index, self.OOV, output)
+                return
+
+        for cluster in word_clusters:
+            _add_feature_with_value(self.FEATURE, index, cluster, output)
+
+    def _cluster(
+        self,
+        word_vectors: SqliteWordEmbedding,
+        fit_size: int,
+        vocab_size: Optional[int],
+        iterations: int,
+        seed: int,
+    ) -> Tuple[List[str], np.ndarray]:
+        words, matrix = _read_embedding(word_vectors, vocab_size)
+        # Cluster by direction rather than magnitude
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.maximum(norms, np.finfo(matrix.dtype).tiny)
+
+        centroids = _kmeans(
+            matrix[:fit_size], self.clusters, iterations, np.random.default_rng(seed)
+        )
+        return words, _nearest_centroids(matrix, centroids, self.assignments)
 
 
-class BrownClusterFeatures(FeatureExtractor):
+class BrownClusterFeatures(TextFeatureExtractor):
 
     FEATURE = "bc"
     OOV = "OOV"
@@ -134,26 +617,52 @@ class BrownClusterFeatures(FeatureExtractor):
         self.use_prefixes = use_prefixes
         self.prefixes = prefixes
 
-        self.paths: Dict[str, str] = {}
+        word_paths: Dict[str, str] = {}
         with open(clusters_path, encoding="utf8") as cluster_file:
             for idx, line in enumerate(cluster_file):
-                splits = line.split()
-                if len(splits) != 3:
+                try:
+                    path, token, _ = line.split()
+                except ValueError:
                     raise ValueError(
                         f"Invalid format on line {idx + 1} of file {clusters_path}: {repr(line)}"
-                    )
-                path, token, _ = splits
-                self.paths[token] = path
-
-    def extract(self, token: Token, index: int, output: FeatureSink) -> None:
-        try:
-            path = self.paths[token.text]
-        except KeyError:
+                    ) from None
+                word_paths[token] = path
+        self._set_clusters(word_paths)
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        # Extractors pickled before clusters were stored by ID have a path for each word
+        if "word_clusters" not in state:
+            self._set_clusters(self.__dict__.pop("paths"))
+
+    def _set_clusters(self, word_paths: Mapping[str, str]) -> None:
+        # Each word is mapped to the index of its cluster so that each path is stored
+        # only once
+        self.word_clusters: Dict[str, int] = {}
+        cluster_ids: Dict[str, int] = {}
+        for token, path in word_paths.items():
+            self.word_clusters[token] = cluster_ids.setdefault(path, len(cluster_ids))
+        # Paths in order of their cluster IDs
+        self.cluster_paths: List[str] = list(cluster_ids)
+
+        # Compute the feature values for each cluster once rather than for every token
+        self._cluster_features: List[Tuple[str, ...]] = [
+            self._path_features(path) for path in self.cluster_paths
+        ]
+
+    def extract_text(self, text: str, index: int, output: FeatureSink) -> None:
+        cluster_id = self.word_clusters.get(text)
+        if cluster_id is None:
             _add_feature_with_value(self.FEATURE, index, self.OOV, output)
             return
 
+        for value in self._cluster_features[cluster_id]:
+            _add_feature_with_value(self.FEATURE, index, value, output)
+
+    def _path_features(self, path: str) -> Tuple[str, ...]:
+        values = []
         if self.use_full_paths:
-            _add_feature_with_value(self.FEATURE, index, path, output)
+            values.append(path)
 
         if self.use_prefixes:
             max_idx = len(path) + 1
@@ -162,90 +671,88 @@ class BrownClusterFeatures(FeatureExtractor):
                 prefix_idxs = [idx for idx in self.prefixes if idx < max_idx]
             else:
                 prefix_idxs = range(1, max_idx)
-            for idx in prefix_idxs:
-                _add_feature_with_value(self.FEATURE, index, path[:idx], output)
+            values.extend(path[:idx] for idx in prefix_idxs)
 
+        return tuple(values)
 
-class TokenIdentity(FeatureExtractor):
+
+class TokenIdentity(TextFeatureExtractor):
 
     FEATURE = "tkn"
 
     def __init__(self, *, lowercase: bool = False):
         self.lowercase = lowercase
 
-    def extract(self, token: Token, index: int, output: FeatureSink) -> None:
+    def extract_text(self, text: str, index: int, output: FeatureSink) -> None:
         _add_feature_with_value(
-            self.FEATURE,
-            index,
-            token.text if not self.lowercase else token.text.lower(),
-            output,
+            self.FEATURE, index, text if not self.lowercase else text.lower(), output,
         )
 
 
-class IsCapitalized(FeatureExtractor):
+class IsCapitalized(TextFeatureExtractor):
 
     FEATURE = "cap"
 
-    def extract(self, token: Token, index: int, output: FeatureSink) -> None:
-        value = token.text[0].isupper()
+    def extract_text(self, text: str, index: int, output: FeatureSink) -> None:
+        value = text[0].isupper()
         if value:
             _add_feature_with_value(self.FEATURE, index, value, output)
 
 
-class IsPunc(FeatureExtractor):
+class IsPunc(TextFeatureExtractor):
 
     FEATURE = "punc"
 
-    def extract(self, token: Token, index: int, output: FeatureSink) -> None:
-        value = _is_punc(token.text)
+    def extract_text(self, text: str, index: int, output: FeatureSink) -> None:
+        value = _is_punc(text)
         if value:
             _add_feature_with_value(self.FEATURE, index, value, output)
 
 
-class AllCaps(FeatureExtractor):
+class AllCaps(TextFeatureExtractor):
 
     FEATURE = "all_caps"
 
-    def extract(self, token: Token, index: int, output: FeatureSink) -> None:
-        value = token.text.isupper()
+    def extract_text(self, text: str, index: int, output: FeatureSink) -> None:
+        value = text.isupper()
         if value:
             _add_feature_with_value(self.FEATURE, index, value, output)
 
 
-class AllNumeric(FeatureExtractor):
+class AllNumeric(TextFeatureExtractor):
 
     FEATURE = "all_num"
 
-    def extract(self, token: Token, index: int, output: FeatureSink) -> None:
-        value = bool(_RE_DIGIT.search(token.text) and _RE_NUMERIC.match(token.text))
+    def extract_text(self, text: str, index: int, output: FeatureSink) -> None:
+        value = bool(_RE_DIGIT.search(text) and _RE_NUMERIC.match(text))
         if value:
             _add_feature_with_value(self.FEATURE, index, value, output)
 
 
-class ContainsNumber(FeatureExtractor):
+class ContainsNumber(TextFeatureExtractor):
 
     FEATURE = "cntns_num"
 
-    def extract(self, token: Token, index: int, output: FeatureSink) -> None:
-        value = bool(_RE_DIGIT.search(token.text))
+    def extract_text(self, text: str, index: int, output: FeatureSink) -> None:
+        value = bool(_RE_DIGIT.search(text))
         if value:
             _add_feature_with_value(self.FEATURE, index, value, output)
 
 
-class LengthValue(FeatureExtractor):
+class LengthValue(TextFeatureExtractor):
 
     FEATURE = "len_val"
 
-    def extract(self, token: Token, index: int, output: FeatureSink) -> None:
-        _add_feature_with_value(self.FEATURE, index, len(token.text), output)
+    def extract_text(self, text: str, index: int, output: FeatureSink) -> None:
+        _add_feature_with_value(self.FEATURE, index, len(text), output)
 
 
-class LengthWeight(FeatureExtractor):
+class LengthWeight(TextFeatureExtractor):
 
     FEATURE = "len_weight"
 
-    def extract(self, token: Token, index: int, output: FeatureSink) -> None:
-        _add_feature_without_value(self.FEATURE, index, output, len(token.text))
+    def extract_text(self, text: str, index: int, output: FeatureSink) -> None:
+        _add_feature_without_value(self.FEATURE, index, output, len(text))
 
 
 class POS(FeatureExtractor):
@@ -257,7 +764,7 @@ class POS(FeatureExtractor):
             _add_feature_with_value(self.FEATURE, index, token.pos_tag, output)
 
 
-class Prefix(FeatureExtractor):
+class Prefix(TextFeatureExtractor):
 
     FEATURE = "pfx"
 
@@ -265,15 +772,14 @@ class Prefix(FeatureExtractor):
         self.min_length = min_length
         self.max_length = max_length
 
-    def extract(self, token: Token, index: int, output: FeatureSink) -> None:
-        token_text = token.text
+    def extract_text(self, text: str, index: int, output: FeatureSink) -> None:
         for i in range(self.min_length, self.max_length + 1):
-            if i > len(token_text):
+            if i > len(text):
                 break
-            _add_feature_with_value(self.FEATURE, index, token_text[:i], output)
+            _add_feature_with_value(self.FEATURE, index, text[:i], output)
 
 
-class Suffix(FeatureExtractor):
+class Suffix(TextFeatureExtractor):
 
     FEATURE = "sfx"
 
@@ -281,23 +787,22 @@ class Suffix(FeatureExtractor):
         self.min_length = min_length
         self.max_length = max_length
 
-    def extract(self, token: Token, index: int, output: FeatureSink) -> None:
-        token_text = token.text
+    def extract_text(self, text: str, index: int, output: FeatureSink) -> None:
         for i in range(self.min_length, self.max_length + 1):
-            if i > len(token_text):
+            if i > len(text):
                 break
-            _add_feature_with_value(self.FEATURE, index, token_text[-i:], output)
+            _add_feature_with_value(self.FEATURE, index, text[-i:], output)
 
 
-class WordShape(FeatureExtractor):
+class WordShape(TextFeatureExtractor):
 
     FEATURE = "shape"
 
-    def extract(self, token: Token, index: int, output: FeatureSink) -> None:
+    def extract_text(self, text: str, index: int, output: FeatureSink) -> None:
         chars = []
         # Because Python doesn't support full unicode properties, we can't easily do a regex like
         # "match lowercase letters". Instead we just go character by character
-        for char in token.text:
+        for char in text:
             if char.isalpha():
                 if char.isupper():
                     chars.append("A")
@@ -310,6 +815,77 @@ class WordShape(FeatureExtractor):
         _add_feature_with_value(self.FEATURE, index, "".join(chars), output)
 
 
+def _prepares(extractor: FeatureExtractor) -> bool:
+    if extractor.text_only:
+        return type(extractor).prepare_texts is not FeatureExtractor.prepare_texts
+    return type(extractor).prepare is not FeatureExtractor.prepare
+
+
+class FeatureVocabulary:
+    """A mapping between feature names and integer feature IDs.
+
+    This is only used to store extracted features more compactly. Models are still
+    trained and applied using feature names, since that is what CRFSuite takes.
+
+    New features are assigned IDs until the vocabulary is frozen, after which unknown
+    features are dropped when encoding. Annotators freeze their extractor's vocabulary
+    after training on ExtractedFeatures.
+    """
+
+    def __init__(self) -> None:
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._frozen = False
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._ids
+
+    @property
+    def frozen(self) -> bool:
+        return self._frozen
+
+    def freeze(self) -> None:
+        self._frozen = True
+
+    def feature_id(self, name: str) -> Optional[int]:
+        feature_id = self._ids.get(name)
+        if feature_id is None and not self._frozen:
+            feature_id = len(self._names)
+            self._ids[name] = feature_id
+            self._names.append(name)
+        return feature_id
+
+    def feature_name(self, feature_id: int) -> str:
+        return self._names[feature_id]
+
+    def encode(self, features: ItemFeatures) -> Dict[int, float]:
+        ids = self._ids
+        if self._frozen:
+            return {ids[name]: weight for name, weight in features.items() if name in ids}
+
+        encoded = {}
+        for name, weight in features.items():
+            # Since most features will already be in the vocabulary, use an exception
+            # rather than a conditional
+            try:
+                feature_id = ids[name]
+            except KeyError:
+                feature_id = len(self._names)
+                ids[name] = feature_id
+                self._names.append(name)
+            encoded[feature_id] = weight
+        return encoded
+
+    def decode(self, features: ItemFeatureIds) -> Dict[str, float]:
+        # The names returned are the ones stored in the vocabulary, so no new strings
+        # are created
+        names = self._names
+        return {names[feature_id]: weight for feature_id, weight in features.items()}
+
+
 class SentenceFeatureExtractor:
 
     BIAS = "b"
@@ -327,14 +903,30 @@ class SentenceFeatureExtractor:
         "suffix": Suffix,
         "word_vectors": WordEmbeddingFeatures,
         "brown_clusters": BrownClusterFeatures,
+        "embedding_clusters": EmbeddingClusterFeatures,
         "prefix": Prefix,
     }
+    # Key in the feature parameters, alongside the feature sets, that enables IDs
+    USE_FEATURE_IDS = "use_feature_ids"
 
-    def __init__(self, feature_params: Mapping):
+    def __init__(
+        self,
+        feature_params: Mapping,
+        *,
+        cache_size: int = _DEFAULT_CACHE_SIZE,
+        use_feature_ids: bool = False,
+    ):
+        if cache_size < 0:
+            raise ValueError(f"Cache size must be non-negative: {cache_size}")
 
         self.window_features: dict = {}
 
+        use_feature_ids = use_feature_ids or bool(
+            feature_params.get(self.USE_FEATURE_IDS, False)
+        )
         for feature_set in feature_params:
+            if feature_set == self.USE_FEATURE_IDS:
+                continue
             window = feature_params[feature_set]["window"]
             window_features = []
             for feature in feature_params[feature_set]:
@@ -353,32 +945,497 @@ class SentenceFeatureExtractor:
                         self.window_features[position] = []
                     self.window_features[position].extend(window_features)
 
+        self._group_extractors(cache_size)
+        self._cache = _FeatureCache(cache_size)
+        # If set, features stored in ExtractedFeatures are keyed by ID in this
+        # vocabulary. It is not used for training or tagging, and is left out of
+        # saved annotators.
+        self.vocabulary: Optional[FeatureVocabulary] = (
+            FeatureVocabulary() if use_feature_ids else None
+        )
+
+    def __getstate__(self) -> dict:
+        # Do not serialize the cache, just start over with an empty one of the same size
+        state = dict(self.__dict__)
+        state["_cache"] = _FeatureCache(self._cache.maxsize)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        # Extractors pickled before caching, feature IDs, sentence preparation, and
+        # text-only extraction were added have none of their state
+        if "_cache" not in state:
+            self._cache = _FeatureCache(_DEFAULT_CACHE_SIZE)
+        if "_position_groups" not in state or "_text_only" not in state:
+            self._group_extractors(self._cache.maxsize)
+        if "vocabulary" not in state:
+            self.vocabulary = None
+
+    def _group_extractors(self, cache_size: int) -> None:
+        # Split the extractors for each position into those whose output can be cached
+        # and those that need to be run every time. Positions with the same cacheable
+        # extractors share a group so their cached output can be shared.
+        self._cached_extractors: Dict[int, Tuple[FeatureExtractor, ...]] = {}
+        self._uncached_extractors: Dict[int, Tuple[FeatureExtractor, ...]] = {}
+        self._position_groups: Dict[int, int] = {}
+        group_ids: Dict[Tuple[int, ...], int] = {}
+        for position, extractors in self.window_features.items():
+            cached = tuple(
+                extractor
+                for extractor in extractors
+                if cache_size and extractor.cacheable
+            )
+            self._cached_extractors[position] = cached
+            self._uncached_extractors[position] = tuple(
+                extractor for extractor in extractors if extractor not in cached
+            )
+            group_key = tuple(id(extractor) for extractor in cached)
+            self._position_groups[position] = group_ids.setdefault(
+                group_key, len(group_ids)
+            )
+
+        all_extractors = [
+            extractor
+            for extractors in self.window_features.values()
+            for extractor in extractors
+        ]
+        # Extractors that need to prepare for each sentence, each included once
+        self._preparing_extractors: Tuple[FeatureExtractor, ...] = tuple(
+            {
+                id(extractor): extractor
+                for extractor in all_extractors
+                if _prepares(extractor)
+            }.values()
+        )
+        # Whether features can be extracted from token texts alone
+        self._text_only = all(extractor.text_only for extractor in all_extractors)
+
+    def without_vocabulary(self) -> "SentenceFeatureExtractor":
+        """Return a copy of the extractor that does not store features as IDs."""
+        extractor = copy.copy(self)
+        extractor.vocabulary = None
+        return extractor
+
+    def cache_info(self) -> "FeatureCacheInfo":
+        return self._cache.info()
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+
     def extract(self, sentence: Sentence, _doc: Document) -> SequenceFeatures:
+        if self._text_only and isinstance(sentence, CompactSentence):
+            # Optimization: text-only extractors can use the texts of a compact sentence
+            # without creating its tokens
+            return self._extract_items(sentence.texts, text_only=True)
+        return self._extract_items(sentence.tokens, text_only=False)
+
+    def _extract_items(
+        self, items: Sequence[Union[Token, str]], *, text_only: bool
+    ) -> SequenceFeatures:
+        # Items are the tokens of the sentence, or their texts if text_only is set
         sentence_features: List[Mapping[str, float]] = []
-        tokens = sentence.tokens
-        max_i = len(tokens) - 1
+        max_i = len(items) - 1
+        # Optimization: avoid repeated lookups
+        position_groups = self._position_groups
+        uncached_extractors: Dict[int, List[Callable[[Any, int, FeatureSink], None]]] = {
+            position: [
+                extractor.extract_text if text_only else extractor.extract
+                for extractor in extractors
+            ]
+            for position, extractors in self._uncached_extractors.items()
+        }
 
-        for idx, _ in enumerate(tokens):
+        for extractor in self._preparing_extractors:
+            if text_only:
+                extractor.prepare_texts(items)  # type: ignore
+            else:
+                extractor.prepare(items)  # type: ignore
+
+        # Look up the cached features for each token once per group of positions rather
+        # than once per position
+        token_entries: Dict[int, List[_CachedTokenFeatures]] = {}
+        for position, extractors in self._cached_extractors.items():
+            group = position_groups[position]
+            if extractors and group not in token_entries:
+                token_entries[group] = [
+                    self._cached_features(item, extractors, group, text_only)
+                    for item in items
+                ]
+
+        for idx in range(len(items)):
             token_features = {self.BIAS: 1.0}
 
             for position in self.window_features:
                 position_index = idx + position
-                position_feature_extractors = self.window_features[position]
                 if 0 <= position_index <= max_i:
-                    position_token = tokens[position_index]
-                    for extractor in position_feature_extractors:
-                        extractor.extract(position_token, position, token_features)
+                    entries = token_entries.get(position_groups[position])
+                    if entries:
+                        token_features.update(
+                            entries[position_index].at_position(position)
+                        )
+                    position_item = items[position_index]
+                    for extract in uncached_extractors[position]:
+                        extract(position_item, position, token_features)
 
             sentence_features.append(token_features)
 
         return sentence_features
 
+    def extract_ids(self, sentence: Sentence, doc: Document) -> SequenceFeatureIds:
+        if self.vocabulary is None:
+            raise ValueError("Feature IDs require a feature vocabulary")
+        encode = self.vocabulary.encode
+        return [encode(token_features) for token_features in self.extract(sentence, doc)]
+
+    def decode_ids(self, sentence_ids: SequenceFeatureIds) -> SequenceFeatures:
+        if self.vocabulary is None:
+            raise ValueError("Feature IDs require a feature vocabulary")
+        decode = self.vocabulary.decode
+        return [decode(token_ids) for token_ids in sentence_ids]
+
+    def _cached_features(
+        self,
+        item: Union[Token, str],
+        extractors: Sequence[FeatureExtractor],
+        group: int,
+        text_only: bool,
+    ) -> "_CachedTokenFeatures":
+        if text_only:
+            # The item is the token's text
+            key: Tuple = (group, item)
+        elif self._text_only:
+            # The features do not depend on the properties, so tokens share entries
+            # with texts
+            key = (group, item.text)  # type: ignore
+        else:
+            # Comparing tuples of items is much faster than comparing mappings
+            key = (group, item.text, tuple(item.properties.items()))  # type: ignore
+        try:
+            entry = self._cache.get(key)
+        except TypeError:
+            # Token properties are not hashable, so this token cannot be cached
+            return _CachedTokenFeatures.from_extractors(extractors, item, text_only)
+
+        if entry is None:
+            entry = _CachedTokenFeatures.from_extractors(extractors, item, text_only)
+            self._cache.put(key, entry)
+        return entry
+
+
+@attrs(auto_attribs=True, frozen=True)
+class FeatureCacheInfo:
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+    def __str__(self) -> str:
+        return (
+            f"{self.hits} hits, {self.misses} misses, "
+            f"{self.currsize}/{self.maxsize} entries"
+        )
+
+
+class _CachedTokenFeatures:
+    """The position-independent features of a token and their per-position labelings."""
+
+    __slots__ = ("templates", "positions")
+
+    # Placeholder index used when extracting features to be re-labeled
+    _INDEX = 0
+    _INDEX_LABEL = f"[{_INDEX}]"
+
+    def __init__(self, templates: Sequence[Tuple[str, str, float]]) -> None:
+        # Each template is a (label, remainder, weight) tuple
+        self.templates = templates
+        self.positions: Dict[int, Dict[str, float]] = {}
+
+    @classmethod
+    def from_extractors(
+        cls,
+        extractors: Iterable[FeatureExtractor],
+        item: Union[Token, str],
+        text_only: bool = False,
+    ) -> "_CachedTokenFeatures":
+        # The item is the token's text if text_only is set
+        features: Dict[str, float] = {}
+        for extractor in extractors:
+            if text_only:
+                extractor.extract_text(item, cls._INDEX, features)  # type: ignore
+            else:
+                extractor.extract(item, cls._INDEX, features)  # type: ignore
+
+        templates = []
+        for feature, weight in features.items():
+            label, sep, remainder = feature.partition(cls._INDEX_LABEL)
+            if not sep:
+                raise ValueError(f"Cannot determine position of feature {feature!r}")
+            templates.append((label, remainder, weight))
+
+        return cls(templates)
+
+    def at_position(self, position: int) -> Dict[str, float]:
+        try:
+            return self.positions[position]
+        except KeyError:
+            features = {
+                f"{label}[{position}]{remainder}": weight
+                for label, remainder, weight in self.templates
+            }
+            self.positions[position] = features
+            return features
+
+
+class _FeatureCache:
+    """A size-limited least recently used cache."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return entry
+
+    def peek(self, key: Hashable) -> bool:
+        """Return whether the key is cached without counting it as a lookup."""
+        return key in self._entries
+
+    def put(self, key: Hashable, entry: Any) -> None:
+        self._entries[key] = entry
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def info(self) -> FeatureCacheInfo:
+        return FeatureCacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
 
 @attrs(auto_attribs=True, frozen=True)
 class ExtractedFeatures:
     extractor: SentenceFeatureExtractor
-    features: CorpusFeatures
+    # If feature_ids is set, each item's features are keyed by IDs in the extractor's
+    # vocabulary instead of by name
+    features: Union[CorpusFeatures, CorpusFeatureIds]
     labels: Optional[CorpusLabels]
+    feature_ids: bool = False
+
+    def sequence_features(self) -> Iterator[SequenceFeatures]:
+        """Return the features of each sequence keyed by name."""
+        if self.feature_ids:
+            decode_ids = self.extractor.decode_ids
+            for sentence_ids in self.features:
+                # Mypy cannot tell that these are IDs
+                yield decode_ids(sentence_ids)  # type: ignore
+        else:
+            # Mypy cannot tell that these are names
+            yield from self.features  # type: ignore
+
+
+class CorpusFeatureCache:
+    """Features extracted from every sentence of a corpus, stored on disk.
+
+    Features do not depend on mentions, so a single cache can be used to train models
+    with any mention encoding on any subset of the corpus's documents.
+    """
+
+    def __init__(self, path: PathType) -> None:
+        self.path = Path(path)
+        self.document_ids, self._offsets = read_record_index(
+            self.path, _FEATURE_CACHE_MAGIC
+        )
+
+    def __len__(self) -> int:
+        return len(self.document_ids)
+
+    def __iter__(self) -> Iterator[List[SequenceFeatures]]:
+        return iter_records(self.path, self._offsets)
+
+    def document_features(self, doc_idx: int) -> List[SequenceFeatures]:
+        """Return the features of each sentence of the specified document."""
+        return read_record(self.path, self._offsets, doc_idx)
+
+    def extracted_features(
+        self,
+        docs: Sequence[Document],
+        mention_encoder: MentionEncoder,
+        indices: Optional[Iterable[int]] = None,
+    ) -> Iterator[LabeledSequence]:
+        """Yield the features and labels of each sentence of the documents at the given
+        indices.
+
+        The documents must be the ones the cache was built from. Sentences are read from
+        the cache as they are needed, so they can be passed to a trainer without holding
+        all of them in memory.
+        """
+        if len(docs) != len(self):
+            raise ValueError(
+                f"Feature cache has {len(self)} documents but corpus has {len(docs)}"
+            )
+        if indices is None:
+            indices = range(len(self))
+
+        for doc_idx in indices:
+            doc = docs[doc_idx]
+            if doc.id != self.document_ids[doc_idx]:
+                raise ValueError(
+                    f"Document {doc_idx} is {doc.id} in the corpus but "
+                    f"{self.document_ids[doc_idx]} in the feature cache"
+                )
+            for sent_x, (sentence, mentions) in zip(
+                self.document_features(doc_idx), doc.sentences_with_mentions()
+            ):
+                yield sent_x, mention_encoder.encode_mentions(sentence, mentions)
+
+    @classmethod
+    def build(
+        cls,
+        extractor: SentenceFeatureExtractor,
+        docs: Iterable[Document],
+        path: PathType,
+    ) -> "CorpusFeatureCache":
+        path = Path(path)
+        # Write to a temporary file so that a partially written cache is never opened
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        write_records(
+            (
+                (doc.id, [extractor.extract(sentence, doc) for sentence in doc.sentences])
+                for doc in docs
+            ),
+            tmp_path,
+            _FEATURE_CACHE_MAGIC,
+        )
+        os.replace(tmp_path, path)
+        return cls(path)
+
+    @classmethod
+    def open_or_build(
+        cls, cache_dir: PathType, feature_params: Mapping, docs: Sequence[Document]
+    ) -> "CorpusFeatureCache":
+        """Open the cache for these documents and feature parameters, building it if needed.
+
+        The cache is named by fingerprints of the documents and the parameters, and is
+        built using an extractor created from the parameters. Since only the parameters
+        are fingerprinted, caches must be removed if any resources they refer to, such
+        as embeddings, change. Fingerprinting reads every document, so open the returned
+        cache's path directly when it is needed again for the same corpus.
+        """
+        cache_dir = Path(cache_dir)
+        cache_path = cache_dir / (
+            f"{corpus_fingerprint(docs)[:16]}_"
+            f"{feature_params_fingerprint(feature_params)[:16]}.features"
+        )
+        if cache_path.exists():
+            return cls(cache_path)
+
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        return cls.build(SentenceFeatureExtractor(feature_params), docs, cache_path)
+
+
+def corpus_fingerprint(docs: Iterable[Document]) -> str:
+    """Return a hash of everything in the documents that features can depend on."""
+    digest = hashlib.sha256()
+    for doc in docs:
+        digest.update(repr(doc.id).encode("utf8"))
+        for sentence in doc.sentences:
+            digest.update(
+                repr(
+                    [
+                        (token.text, tuple(token.properties.items()))
+                        for token in sentence.tokens
+                    ]
+                ).encode("utf8")
+            )
+    return digest.hexdigest()
+
+
+def feature_params_fingerprint(feature_params: Mapping) -> str:
+    return hashlib.sha256(
+        json.dumps(feature_params, sort_keys=True).encode("utf8")
+    ).hexdigest()
+
+
+def _read_embedding(
+    word_vectors: SqliteWordEmbedding, limit: Optional[int] = None
+) -> Tuple[List[str], np.ndarray]:
+    """Return the first limit words of an embedding, or all of them, and their vectors."""
+    count = len(word_vectors) if limit is None else min(limit, len(word_vectors))
+    matrix = np.empty((count, word_vectors.dim), dtype=word_vectors.dtype)
+    words = []
+    cursor = word_vectors.conn.execute(
+        "SELECT word, vector FROM embedding ORDER BY rowid LIMIT ?", (count,)
+    )
+    for row, (word, buffer) in enumerate(cursor):
+        words.append(word)
+        matrix[row] = np.frombuffer(buffer, dtype=word_vectors.dtype)
+    return words, matrix
+
+
+def _kmeans(
+    matrix: np.ndarray, clusters: int, iterations: int, rng: np.random.Generator
+) -> np.ndarray:
+    """Return the centroids found by running k-means on the rows of the matrix."""
+    if len(matrix) < clusters:
+        raise ValueError(f"Cannot fit {clusters} clusters to {len(matrix)} vectors")
+
+    centroids = matrix[rng.choice(len(matrix), clusters, replace=False)].astype(
+        np.float64
+    )
+    for _ in range(iterations):
+        nearest = _nearest_centroids(matrix, centroids, 1)[:, 0]
+        counts = np.bincount(nearest, minlength=clusters)
+        # Sum the rows of each cluster by sorting them by cluster, which is much faster
+        # than unbuffered addition
+        order = np.argsort(nearest, kind="stable")
+        present = np.flatnonzero(counts)
+        sums = np.zeros_like(centroids)
+        sums[present] = np.add.reduceat(
+            matrix[order], np.cumsum(counts)[present] - counts[present], axis=0
+        )
+        empty = counts == 0
+        # Restart empty clusters from random vectors
+        sums[empty] = matrix[rng.choice(len(matrix), int(empty.sum()), replace=False)]
+        counts[empty] = 1
+        new_centroids = sums / counts[:, np.newaxis]
+        if np.array_equal(new_centroids, centroids):
+            break
+        centroids = new_centroids
+    return centroids
+
+
+def _nearest_centroids(
+    matrix: np.ndarray, centroids: np.ndarray, count: int, chunk_size: int = 10000
+) -> np.ndarray:
+    """Return the indices of the count nearest centroids to each row, nearest first."""
+    nearest = np.empty((len(matrix), count), dtype=np.int32)
+    centroid_norms = (centroids ** 2).sum(axis=1)
+    # Process in chunks to bound the size of the distance matrix
+    for start in range(0, len(matrix), chunk_size):
+        chunk = matrix[start : start + chunk_size]
+        # Squared distances without the norms of the rows, which do not affect ranking
+        distances = centroid_norms - 2 * (chunk @ centroids.T)
+        if count == 1:
+            candidates = distances.argmin(axis=1)[:, np.newaxis]
+        elif count < len(centroids):
+            candidates = np.argpartition(distances, count - 1, axis=1)[:, :count]
+        else:
+            candidates = np.tile(np.arange(len(centroids)), (len(chunk), 1))
+        order = np.argsort(np.take_along_axis(distances, candidates, axis=1), axis=1)
+        nearest[start : start + len(chunk)] = np.take_along_axis(
+            candidates, order, axis=1
+        )
+    return nearest
 
 
 def _add_feature_with_value(
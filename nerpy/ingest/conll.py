@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Iterable, List, Optional, Sequence, TextIO, Tuple
+from typing import Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
 
 from attr import attrib, attrs
 
@@ -15,7 +15,10 @@ class CoNLLIngester:
     ignore_comments: bool = attrib(default=False, kw_only=True)
 
     def ingest(self, source: TextIO, document_id_base: str) -> List[Document]:
-        documents = []
+        return list(self.iter_documents(source, document_id_base))
+
+    def iter_documents(self, source: TextIO, document_id_base: str) -> Iterator[Document]:
+        """Yield each document as soon as it has been read from the source."""
         document_counter = 1
         builder = DocumentBuilder(document_id_base + "_" + str(document_counter))
 
@@ -37,8 +40,7 @@ class CoNLLIngester:
                 # We skip this if the builder is empty, which will happen for the very
                 # first document in the corpus (as there is no previous document to end).
                 if builder:
-                    document = builder.build()
-                    documents.append(document)
+                    yield builder.build()
                     document_counter += 1
                     builder = DocumentBuilder(
                         document_id_base + "_" + str(document_counter)
@@ -62,10 +64,7 @@ class CoNLLIngester:
             mentions = self.mention_encoder.decode_mentions(sentence, sentence_labels)
             builder.add_mentions(mentions)
 
-        document = builder.build()
-        documents.append(document)
-
-        return documents
+        yield builder.build()
 
     @classmethod
     def _parse_file(
@@ -153,6 +152,24 @@ def read_conll(
         return ingester.ingest(file, document_id_base)
 
 
+def iter_conll(
+    path: PathType,
+    mention_encoder: MentionEncoder,
+    *,
+    document_id_base: Optional[str] = None,
+    ignore_comments: bool = False,
+) -> Iterator[Document]:
+    """Yield documents from a CoNLL file one at a time, like a streaming read_conll."""
+    ingester = CoNLLIngester(mention_encoder, ignore_comments=ignore_comments)
+
+    # Create document_id_base from filename if needed
+    if document_id_base is None:
+        document_id_base = Path(path).name
+
+    with open(path, encoding="utf8") as file:
+        yield from ingester.iter_documents(file, document_id_base)
+
+
 def write_conll(
     docs: Sequence[Document],
     output_path: PathType,
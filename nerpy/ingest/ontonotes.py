@@ -129,12 +129,12 @@ class OntoNotesIngester:
                                 "No tokens created for ENAMEX: " + repr(token)
                             )
 
-                        entity_type = EntityType(match.group("type"))
+                        entity_type = EntityType.of(match.group("type"))
                         mention = Mention(
                             sentence_index,
                             name_tokens[0].index,
                             name_tokens[-1].index + 1,
-                            MentionType("name"),
+                            MentionType.of("name"),
                             entity_type,
                         )
                         sentence_mentions.append(mention)
@@ -1,15 +1,71 @@
 import json
 import pickle
+import struct
+import sys
+from abc import ABCMeta, abstractmethod
+from array import array
 from os import PathLike
 from pathlib import Path
-from typing import Dict, List, Union
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    overload,
+)
 
-from nerpy.document import Document
+import numpy as np
+from immutabledict import immutabledict
+
+from nerpy.document import (
+    Document,
+    EntityType,
+    Mention,
+    MentionType,
+    Sentence,
+    Token,
+    intern_properties,
+)
 
 # Union[str, Path] isn't enough to appease PyCharm's type checker, so adding Path here
 # avoids warnings.
 PathType = Union[str, Path, PathLike]
 
+_COLUMNAR_FORMAT = "nerpy-columnar"
+_COLUMNAR_VERSION = 1
+_COLUMNAR_TABLES = "tables.pkl"
+# Name of each array in a columnar corpus and its dtype
+_COLUMNAR_ARRAYS = {
+    # Offsets into vocabulary_text for each vocabulary item, one longer than the vocabulary
+    "vocabulary_offsets": np.int64,
+    # UTF-8 encoded text of each vocabulary item, concatenated
+    "vocabulary_text": np.uint8,
+    # Vocabulary ID of the text of each token
+    "token_texts": np.int32,
+    # Index into the property table for each token
+    "token_properties": np.int32,
+    # Offsets into the token arrays for each sentence, one longer than the sentences
+    "sentence_offsets": np.int64,
+    # Offsets into the sentence offsets for each document, one longer than the documents
+    "document_sentence_offsets": np.int64,
+    # Offsets into mentions for each document, one longer than the documents
+    "document_mention_offsets": np.int64,
+    # One row per mention: sentence index, start, end, mention type ID, entity type ID
+    "mentions": np.int32,
+}
+_MENTION_COLUMNS = 5
+
+# Indexed corpus files start with this, followed by one pickled record per document, the
+# pickled index, and the position of the index as an unsigned 64-bit integer
+_INDEXED_MAGIC = b"NERPYIDX1\n"
+_INDEXED_TRAILER = struct.Struct("<Q")
+
 
 def load_pickled_documents(path: PathType) -> List[Document]:
     with open(path, "rb") as file:
@@ -34,3 +90,382 @@ def pickle_document(doc: Document, path: PathType) -> None:
 def load_json(path: PathType) -> Dict:
     with open(path, encoding="utf8") as file:
         return json.load(file)
+
+
+def load_documents(path: PathType) -> Sequence[Document]:
+    """Load documents from a columnar corpus directory, indexed corpus, or pickle file.
+
+    Columnar and indexed corpora are not read until documents are accessed.
+    """
+    if Path(path).is_dir():
+        return load_columnar_documents(path)
+
+    with open(path, "rb") as file:
+        is_indexed = file.read(len(_INDEXED_MAGIC)) == _INDEXED_MAGIC
+    if is_indexed:
+        return load_indexed_documents(path)
+    else:
+        return load_pickled_documents(path)
+
+
+class _LazyCorpus(Sequence[Document], metaclass=ABCMeta):
+    """A read-only sequence of documents that are only created when accessed."""
+
+    def __init__(self, document_ids: Sequence[str]) -> None:
+        self.document_ids: Tuple[str, ...] = tuple(document_ids)
+        # Created on the first lookup by ID
+        self._id_indices: Optional[Dict[str, int]] = None
+
+    @abstractmethod
+    def _document(self, doc_idx: int) -> Document:
+        raise NotImplementedError
+
+    @overload
+    def __getitem__(self, index: int) -> Document:
+        raise NotImplementedError
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Document]:
+        raise NotImplementedError
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[Document, List[Document]]:
+        if isinstance(i, slice):
+            return [self._document(idx) for idx in range(*i.indices(len(self)))]
+
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f"Document index out of range: {i}")
+        return self._document(i)
+
+    def __iter__(self) -> Iterator[Document]:
+        for idx in range(len(self)):
+            yield self._document(idx)
+
+    def __len__(self) -> int:
+        return len(self.document_ids)
+
+    def by_id(self, doc_id: str) -> Document:
+        if self._id_indices is None:
+            self._id_indices = {
+                document_id: idx for idx, document_id in enumerate(self.document_ids)
+            }
+        try:
+            doc_idx = self._id_indices[doc_id]
+        except KeyError:
+            raise KeyError(f"No document with ID {doc_id!r}") from None
+        return self._document(doc_idx)
+
+
+class ColumnarCorpus(_LazyCorpus):
+    """A read-only sequence of documents backed by columnar arrays.
+
+    The arrays are memory-mapped by default, so processes that open the same corpus
+    share its pages. Documents are only created when they are accessed. Pickling a
+    corpus only stores its path, so it can be cheaply sent to other processes.
+    """
+
+    def __init__(self, path: PathType, *, mmap: bool = True) -> None:
+        self.path = Path(path)
+        self.mmap = mmap
+
+        with open(self.path / _COLUMNAR_TABLES, "rb") as file:
+            tables = pickle.load(file)
+        if tables.get("format") != _COLUMNAR_FORMAT:
+            raise ValueError(f"Not a columnar corpus: {path}")
+        if tables["version"] != _COLUMNAR_VERSION:
+            raise ValueError(
+                f"Unsupported columnar corpus version {tables['version']} in {path}"
+            )
+
+        super().__init__(tables["document_ids"])
+        # Documents are created without conversion, so convert mappings once here
+        self._document_properties = _immutabledicts(tables["document_properties"])
+        self._document_metadata = _immutabledicts(tables["document_metadata"])
+        # Shared with tokens created elsewhere, like the token texts
+        self._token_properties = [
+            intern_properties(properties) for properties in tables["token_properties"]
+        ]
+        # Create type instances once so that they are shared by all mentions
+        self._mention_types = [MentionType.of(types) for types in tables["mention_types"]]
+        self._entity_types = [EntityType.of(types) for types in tables["entity_types"]]
+
+        arrays = {
+            name: np.load(self.path / f"{name}.npy", mmap_mode="r" if mmap else None)
+            for name in _COLUMNAR_ARRAYS
+        }
+        self._token_texts = arrays["token_texts"]
+        self._token_properties_ids = arrays["token_properties"]
+        self._sentence_offsets = arrays["sentence_offsets"]
+        self._document_sentence_offsets = arrays["document_sentence_offsets"]
+        self._document_mention_offsets = arrays["document_mention_offsets"]
+        self._mentions = arrays["mentions"]
+        self._vocabulary_offsets = arrays["vocabulary_offsets"]
+        self._vocabulary_text = arrays["vocabulary_text"]
+        # Decoded lazily since not every use needs token text
+        self._vocabulary: List[str] = []
+
+    def __getstate__(self) -> dict:
+        return {"path": self.path, "mmap": self.mmap}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["path"], mmap=state["mmap"])  # type: ignore
+
+    @property
+    def vocabulary(self) -> Sequence[str]:
+        if not self._vocabulary and len(self._vocabulary_offsets) > 1:
+            text = self._vocabulary_text.tobytes()
+            offsets = self._vocabulary_offsets.tolist()
+            self._vocabulary = [
+                sys.intern(text[start:end].decode("utf8"))
+                for start, end in zip(offsets, offsets[1:])
+            ]
+        return self._vocabulary
+
+    def _document(self, doc_idx: int) -> Document:
+        vocabulary = self.vocabulary
+        token_properties = self._token_properties
+
+        first_sentence, last_sentence = self._document_sentence_offsets[
+            doc_idx : doc_idx + 2
+        ].tolist()
+        sentence_offsets = self._sentence_offsets[
+            first_sentence : last_sentence + 1
+        ].tolist()
+        # Read all the token columns for the document at once
+        first_token = sentence_offsets[0]
+        last_token = sentence_offsets[-1]
+        texts = self._token_texts[first_token:last_token].tolist()
+        properties = self._token_properties_ids[first_token:last_token].tolist()
+
+        sentences = []
+        for sentence_idx, (start, end) in enumerate(
+            zip(sentence_offsets, sentence_offsets[1:])
+        ):
+            # The corpus was written from valid documents, so skip checking it again
+            tokens = [
+                Token.create_unchecked(
+                    vocabulary[text_id], token_idx, token_properties[properties_id]
+                )
+                for token_idx, (text_id, properties_id) in enumerate(
+                    zip(
+                        texts[start - first_token : end - first_token],
+                        properties[start - first_token : end - first_token],
+                    )
+                )
+            ]
+            sentences.append(Sentence.create_unchecked(tuple(tokens), sentence_idx))
+
+        first_mention, last_mention = self._document_mention_offsets[
+            doc_idx : doc_idx + 2
+        ].tolist()
+        mention_rows = self._mentions[first_mention:last_mention].tolist()
+        mentions = tuple(
+            Mention.create_unchecked(
+                sentence_idx,
+                start,
+                end,
+                self._mention_types[mention_type_id],
+                self._entity_types[entity_type_id],
+            )
+            for sentence_idx, start, end, mention_type_id, entity_type_id in mention_rows
+        )
+
+        # Mentions were written in sorted order
+        return Document.create_unchecked(
+            self.document_ids[doc_idx],
+            tuple(sentences),
+            mentions,
+            properties=self._document_properties[doc_idx],
+            metadata=self._document_metadata[doc_idx],
+        )
+
+
+def _immutabledicts(mappings: Iterable[Mapping[str, Any]]) -> List[immutabledict]:
+    # Share one instance for all empty mappings, as Document and Token do
+    empty: immutabledict = immutabledict()
+    return [immutabledict(mapping) if mapping else empty for mapping in mappings]
+
+
+def load_columnar_documents(path: PathType, *, mmap: bool = True) -> ColumnarCorpus:
+    return ColumnarCorpus(path, mmap=mmap)
+
+
+def write_columnar_documents(docs: Iterable[Document], path: PathType) -> None:
+    """Write documents to a directory in the columnar corpus format."""
+    # Each distinct token text, token property mapping, and type is stored once
+    vocabulary: Dict[str, int] = {}
+    property_ids: Dict[Mapping[str, Any], int] = {}
+    mention_type_ids: Dict[Tuple[str, ...], int] = {}
+    entity_type_ids: Dict[Tuple[str, ...], int] = {}
+
+    document_ids: List[str] = []
+    document_properties: List[Dict[str, Any]] = []
+    document_metadata: List[Dict[str, Any]] = []
+
+    # Use compact arrays rather than lists while accumulating
+    token_texts = array("i")
+    token_properties = array("i")
+    sentence_offsets = array("q", [0])
+    document_sentence_offsets = array("q", [0])
+    document_mention_offsets = array("q", [0])
+    mentions = array("i")
+
+    for doc in docs:
+        document_ids.append(doc.id)
+        document_properties.append(dict(doc.properties))
+        document_metadata.append(dict(doc.metadata))
+
+        for sentence in doc:
+            for token in sentence:
+                token_texts.append(vocabulary.setdefault(token.text, len(vocabulary)))
+                try:
+                    properties_id = property_ids.setdefault(
+                        token.properties, len(property_ids)
+                    )
+                except TypeError as err:
+                    raise ValueError(
+                        f"Token properties must be hashable: {token.properties!r}"
+                    ) from err
+                token_properties.append(properties_id)
+            sentence_offsets.append(len(token_texts))
+        document_sentence_offsets.append(len(sentence_offsets) - 1)
+
+        for mention in doc.mentions:
+            mentions.extend(
+                (
+                    mention.sentence_index,
+                    mention.start,
+                    mention.end,
+                    mention_type_ids.setdefault(
+                        mention.mention_type.types, len(mention_type_ids)
+                    ),
+                    entity_type_ids.setdefault(
+                        mention.entity_type.types, len(entity_type_ids)
+                    ),
+                )
+            )
+        document_mention_offsets.append(len(mentions) // _MENTION_COLUMNS)
+
+    vocabulary_offsets = array("q", [0])
+    vocabulary_text = bytearray()
+    for text in vocabulary:
+        vocabulary_text.extend(text.encode("utf8"))
+        vocabulary_offsets.append(len(vocabulary_text))
+
+    arrays: Dict[str, Any] = {
+        "vocabulary_offsets": vocabulary_offsets,
+        "vocabulary_text": vocabulary_text,
+        "token_texts": token_texts,
+        "token_properties": token_properties,
+        "sentence_offsets": sentence_offsets,
+        "document_sentence_offsets": document_sentence_offsets,
+        "document_mention_offsets": document_mention_offsets,
+        "mentions": mentions,
+    }
+    tables = {
+        "format": _COLUMNAR_FORMAT,
+        "version": _COLUMNAR_VERSION,
+        "document_ids": document_ids,
+        "document_properties": document_properties,
+        "document_metadata": document_metadata,
+        "token_properties": [dict(properties) for properties in property_ids],
+        "mention_types": list(mention_type_ids),
+        "entity_types": list(entity_type_ids),
+    }
+
+    output_dir = Path(path)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for name, dtype in _COLUMNAR_ARRAYS.items():
+        values = np.frombuffer(arrays[name], dtype=dtype)
+        if name == "mentions":
+            values = values.reshape(-1, _MENTION_COLUMNS)
+        np.save(output_dir / f"{name}.npy", values, allow_pickle=False)
+    with open(output_dir / _COLUMNAR_TABLES, "wb") as file:
+        pickle.dump(tables, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+class IndexedCorpus(_LazyCorpus):
+    """A read-only sequence of documents stored as individually pickled records.
+
+    An offset table allows reading any document without reading the others.
+    """
+
+    def __init__(self, path: PathType) -> None:
+        self.path = Path(path)
+        document_ids, self._offsets = read_record_index(self.path, _INDEXED_MAGIC)
+        super().__init__(document_ids)
+
+    def __getstate__(self) -> dict:
+        return {"path": self.path}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["path"])  # type: ignore
+
+    def __iter__(self) -> Iterator[Document]:
+        return iter_records(self.path, self._offsets)
+
+    def _document(self, doc_idx: int) -> Document:
+        return read_record(self.path, self._offsets, doc_idx)
+
+
+def load_indexed_documents(path: PathType) -> IndexedCorpus:
+    return IndexedCorpus(path)
+
+
+def write_indexed_documents(docs: Iterable[Document], path: PathType) -> None:
+    """Write documents to a file in the indexed corpus format."""
+    write_records(((doc.id, doc) for doc in docs), path, _INDEXED_MAGIC)
+
+
+def write_records(
+    records: Iterable[Tuple[str, Any]], path: PathType, magic: bytes
+) -> None:
+    """Write (key, value) pairs as individually pickled records with an offset table.
+
+    The file starts with magic, followed by one pickled value per record, the pickled
+    index, and the position of the index as an unsigned 64-bit integer.
+    """
+    keys: List[str] = []
+    offsets = array("q")
+    with open(path, "wb") as file:
+        file.write(magic)
+        for key, value in records:
+            offsets.append(file.tell())
+            keys.append(key)
+            pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        index_position = file.tell()
+        offsets.append(index_position)
+        pickle.dump((keys, offsets.tobytes()), file, protocol=pickle.HIGHEST_PROTOCOL)
+        file.write(_INDEXED_TRAILER.pack(index_position))
+
+
+def read_record_index(path: PathType, magic: bytes) -> Tuple[List[str], np.ndarray]:
+    """Return the keys of a file written by write_records and the offsets of its records.
+
+    The offsets are one longer than the keys, ending with the position of the index.
+    """
+    with open(path, "rb") as file:
+        if file.read(len(magic)) != magic:
+            raise ValueError(f"Unexpected file format: {path}")
+        file.seek(-_INDEXED_TRAILER.size, 2)
+        (index_position,) = _INDEXED_TRAILER.unpack(file.read(_INDEXED_TRAILER.size))
+        file.seek(index_position)
+        keys, offsets = pickle.load(file)
+    return keys, np.frombuffer(offsets, dtype=np.int64)
+
+
+def read_record(path: PathType, offsets: np.ndarray, idx: int) -> Any:
+    start, end = offsets[idx : idx + 2].tolist()
+    with open(path, "rb") as file:
+        file.seek(start)
+        return pickle.loads(file.read(end - start))
+
+
+def iter_records(path: PathType, offsets: np.ndarray) -> Iterator[Any]:
+    # Read sequentially from a single open file
+    with open(path, "rb") as file:
+        file.seek(int(offsets[0]))
+        for _ in range(len(offsets) - 1):
+            yield pickle.load(file)
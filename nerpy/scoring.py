@@ -1,13 +1,30 @@
 from collections import defaultdict
 from decimal import ROUND_HALF_UP, Context, Decimal
-from typing import DefaultDict, Dict, Iterable, Mapping, Optional, TextIO
-
+from typing import (
+    DefaultDict,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    Union,
+)
+
+import numpy as np
 from attr import attrib, attrs
 
 from nerpy.document import Document, EntityType, Token
 
 TokenCounter = DefaultDict[EntityType, DefaultDict[str, "ScoringCounter"]]
 
+# Columns of count arrays
+TRUE_POSITIVES = 0
+FALSE_POSITIVES = 1
+FALSE_NEGATIVES = 2
+
 
 @attrs(frozen=True)
 class Score:
@@ -62,19 +79,33 @@ def score_prf(
     *,
     check_docids: bool = False,
 ) -> ScoringResult:
+    scorer = Scorer(check_docids=check_docids)
+    # TODO: Correctly handle the case where number of system and gold docs do not match
+    for gold_doc, system_doc in zip(gold_docs, system_docs):
+        scorer.update(gold_doc, system_doc)
+    return scorer.result()
+
 
-    # Counters for total precision and recall
-    precision_true_positives = 0
-    recall_true_positives = 0
-    total_system_mentions = 0
-    total_gold_mentions = 0
+@attrs
+class Scorer:
+    """Incrementally count true positives, false positives, and false negatives.
 
+    Scorers for separate sets of documents can be merged, so documents can be scored
+    in parallel and only the counts combined.
+    """
+
+    check_docids: bool = attrib(default=False, kw_only=True)
     # Counters for per entity precision and recall
-    entity_counts: DefaultDict[EntityType, ScoringCounter] = defaultdict(ScoringCounter)
+    type_counts: DefaultDict[EntityType, ScoringCounter] = attrib(
+        factory=lambda: defaultdict(ScoringCounter), init=False
+    )
+    # Gold mentions found by the system. This matches the sum of the per entity true
+    # positives, which count system mentions, unless a document repeats a mention.
+    recall_true_positives: int = attrib(default=0, init=False)
 
-    # TODO: Correctly handle the case where number of system and gold docs do not match
-    for gold_doc, system_doc in zip(gold_docs, system_docs):
-        if check_docids and system_doc.id != gold_doc.id:
+    def update(self, gold_doc: Document, system_doc: Document) -> None:
+        """Add the counts for a pair of gold and system documents."""
+        if self.check_docids and system_doc.id != gold_doc.id:
             raise ValueError(
                 "Gold and system document IDs do not match: "
                 + str(gold_doc.id)
@@ -82,58 +113,257 @@ def score_prf(
                 + str(system_doc.id)
             )
 
+        type_counts = self.type_counts
         system_mentions = system_doc.mentions
         gold_mentions = gold_doc.mentions
+        # Sets so that each membership test takes constant time
+        system_mention_set = frozenset(system_mentions)
+        gold_mention_set = frozenset(gold_mentions)
 
-        # Update total and per entity precision counts
+        # Update per entity precision counts
         for mention in system_mentions:
-            if mention in gold_mentions:
-                precision_true_positives += 1
-                entity_counts[mention.entity_type].true_positives += 1
+            if mention in gold_mention_set:
+                type_counts[mention.entity_type].true_positives += 1
             else:
-                entity_counts[mention.entity_type].false_positives += 1
+                type_counts[mention.entity_type].false_positives += 1
 
-        # Update total and per entity recall counts
+        # Update per entity recall counts
         for mention in gold_mentions:
-            if mention in system_mentions:
-                recall_true_positives += 1
+            if mention in system_mention_set:
+                self.recall_true_positives += 1
             else:
-                entity_counts[mention.entity_type].false_negatives += 1
+                type_counts[mention.entity_type].false_negatives += 1
+
+    def merge(self, other: "Scorer") -> None:
+        """Add the counts of another scorer to this one."""
+        for entity_type, counts in other.type_counts.items():
+            type_counter = self.type_counts[entity_type]
+            type_counter.true_positives += counts.true_positives
+            type_counter.false_positives += counts.false_positives
+            type_counter.false_negatives += counts.false_negatives
+        self.recall_true_positives += other.recall_true_positives
+
+    def result(self) -> ScoringResult:
+        """Return the scores for all documents counted so far."""
+        # Counters for total precision and recall
+        precision_true_positives = 0
+        total_system_mentions = 0
+        total_gold_mentions = self.recall_true_positives
+        for counts in self.type_counts.values():
+            precision_true_positives += counts.true_positives
+            total_system_mentions += counts.true_positives + counts.false_positives
+            total_gold_mentions += counts.false_negatives
+
+        # Calculate total precision, recall and fscore
+        total_precision = (
+            precision_true_positives / total_system_mentions
+            if total_system_mentions
+            else 0.0
+        )
+        total_recall = (
+            self.recall_true_positives / total_gold_mentions
+            if total_gold_mentions
+            else 0.0
+        )
+        total_fscore = (
+            (2 * total_precision * total_recall) / (total_precision + total_recall)
+            if (total_precision + total_recall)
+            else 0.0
+        )
+
+        # Calculate per entity precision, recall and fscore
+        type_scores: Dict[EntityType, Score] = {}
+        for entity_type, counts in self.type_counts.items():
+            tp = counts.true_positives
+            fp = counts.false_positives
+            fn = counts.false_negatives
+
+            p = tp / (tp + fp) if (tp + fp) else 0.0
+            r = tp / (tp + fn) if (tp + fn) else 0.0
+            f = (2 * p * r) / (p + r) if (p + r) else 0.0
+
+            score = Score(p, r, f)
+            type_scores[entity_type] = score
+
+        # Return scoring result
+        total_score = Score(total_precision, total_recall, total_fscore)
+        scoring_result = ScoringResult(total_score, type_scores)
+        return scoring_result
+
+
+def document_counts(
+    gold_docs: Iterable[Document],
+    system_docs: Iterable[Document],
+    *,
+    check_docids: bool = False,
+) -> np.ndarray:
+    """Return an array of the true positives, false positives, and false negatives
+    of each document, with a row for each document."""
+    return TypedDocumentCounts.count(
+        gold_docs, system_docs, check_docids=check_docids
+    ).totals()
 
-        total_system_mentions += len(system_mentions)
-        total_gold_mentions += len(gold_mentions)
 
-    # Calculate total precision, recall and fscore
-    total_precision = (
-        precision_true_positives / total_system_mentions if total_system_mentions else 0.0
-    )
-    total_recall = (
-        recall_true_positives / total_gold_mentions if total_gold_mentions else 0.0
-    )
-    total_fscore = (
-        (2 * total_precision * total_recall) / (total_precision + total_recall)
-        if (total_precision + total_recall)
-        else 0.0
-    )
+@attrs(frozen=True)
+class TypedDocumentCounts:
+    """Counts of true positives, false positives, and false negatives for each
+    document and entity type.
 
-    # Calculate per entity precision, recall and fscore
-    type_scores: Dict[EntityType, Score] = {}
-    for entity_type in entity_counts:
-        tp = entity_counts[entity_type].true_positives
-        fp = entity_counts[entity_type].false_positives
-        fn = entity_counts[entity_type].false_negatives
+    The counts array is indexed by document, entity type, and then count, in the
+    column order of document_counts. Scores for any subset of documents or types
+    can be computed from it without scoring documents again.
+    """
 
-        p = tp / (tp + fp) if (tp + fp) else 0.0
-        r = tp / (tp + fn) if (tp + fn) else 0.0
-        f = (2 * p * r) / (p + r) if (p + r) else 0.0
+    document_ids: Tuple[str, ...] = attrib()
+    entity_types: Tuple[EntityType, ...] = attrib()
+    counts: np.ndarray = attrib(eq=False)
 
-        score = Score(p, r, f)
-        type_scores[entity_type] = score
+    @classmethod
+    def count(
+        cls,
+        gold_docs: Iterable[Document],
+        system_docs: Iterable[Document],
+        *,
+        check_docids: bool = False,
+    ) -> "TypedDocumentCounts":
+        document_ids: List[str] = []
+        type_ids: Dict[EntityType, int] = {}
+        # Document, type ID, and column of each count
+        doc_indices: List[int] = []
+        count_type_ids: List[int] = []
+        columns: List[int] = []
+        for doc_idx, (gold_doc, system_doc) in enumerate(zip(gold_docs, system_docs)):
+            if check_docids and system_doc.id != gold_doc.id:
+                raise ValueError(
+                    "Gold and system document IDs do not match: "
+                    + str(gold_doc.id)
+                    + ","
+                    + str(system_doc.id)
+                )
+            document_ids.append(gold_doc.id)
 
-    # Return scoring result
-    total_score = Score(total_precision, total_recall, total_fscore)
-    scoring_result = ScoringResult(total_score, type_scores)
-    return scoring_result
+            system_mentions = system_doc.mentions
+            gold_mentions = gold_doc.mentions
+            system_mention_set = frozenset(system_mentions)
+            gold_mention_set = frozenset(gold_mentions)
+            for mention in system_mentions:
+                doc_indices.append(doc_idx)
+                count_type_ids.append(
+                    type_ids.setdefault(mention.entity_type, len(type_ids))
+                )
+                columns.append(
+                    TRUE_POSITIVES if mention in gold_mention_set else FALSE_POSITIVES
+                )
+            for mention in gold_mentions:
+                if mention not in system_mention_set:
+                    doc_indices.append(doc_idx)
+                    count_type_ids.append(
+                        type_ids.setdefault(mention.entity_type, len(type_ids))
+                    )
+                    columns.append(FALSE_NEGATIVES)
+
+        # Order types consistently regardless of the order they were seen
+        entity_types = tuple(sorted(type_ids))
+        type_order = np.empty(len(type_ids), dtype=np.int64)
+        type_order[[type_ids[entity_type] for entity_type in entity_types]] = np.arange(
+            len(entity_types)
+        )
+        shape = (len(document_ids), len(entity_types), 3)
+        flat_indices = np.ravel_multi_index(
+            (
+                np.array(doc_indices, dtype=np.int64),
+                type_order[np.array(count_type_ids, dtype=np.int64)],
+                np.array(columns, dtype=np.int64),
+            ),
+            shape,
+        )
+        counts = np.bincount(flat_indices, minlength=int(np.prod(shape))).reshape(shape)
+        return cls(tuple(document_ids), entity_types, counts)
+
+    def __len__(self) -> int:
+        return len(self.document_ids)
+
+    def subset(
+        self, documents: Union[Sequence[int], np.ndarray]
+    ) -> "TypedDocumentCounts":
+        """Return the counts for a subset of documents, given as indices or a mask."""
+        indices = np.arange(len(self.document_ids))[documents]
+        return TypedDocumentCounts(
+            tuple(self.document_ids[idx] for idx in indices),
+            self.entity_types,
+            self.counts[indices],
+        )
+
+    def totals(self) -> np.ndarray:
+        """Return the counts of each document summed over entity types."""
+        return self.counts.sum(axis=1)
+
+    def type_totals(self, weights: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return the counts of each entity type summed over documents.
+
+        If given, weights are the number of times to count each document, with any
+        leading axes giving separate sums, such as the draws of bootstrap replicates.
+        """
+        if weights is None:
+            return self.counts.sum(axis=0)
+        return np.tensordot(weights, self.counts, axes=1)
+
+    def result(
+        self, documents: Optional[Union[Sequence[int], np.ndarray]] = None
+    ) -> ScoringResult:
+        """Return the scores for all documents or a subset of them."""
+        counts = self.counts if documents is None else self.counts[documents]
+        type_counts = counts.sum(axis=0)
+        total_counts = type_counts.sum(axis=0)
+        precisions, recalls, type_fscores = _prf(type_counts)
+        total_precision, total_recall, total_fscore = _prf(total_counts)
+        # Like score_prf, only include types with mentions in the documents
+        type_scores = {
+            entity_type: Score(float(p), float(r), float(f))
+            for entity_type, p, r, f, type_count in zip(
+                self.entity_types, precisions, recalls, type_fscores, type_counts
+            )
+            if type_count.any()
+        }
+        return ScoringResult(
+            Score(float(total_precision), float(total_recall), float(total_fscore)),
+            type_scores,
+        )
+
+
+def fscores(counts: np.ndarray) -> np.ndarray:
+    """Return the F1 for counts of true positives, false positives, and false
+    negatives in the last axis of an array.
+
+    As in score_prf, precision and recall are zero when undefined.
+    """
+    return _prf(counts)[2]
+
+
+def _prf(counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    counts = np.asarray(counts, dtype=np.float64)
+    true_positives = counts[..., TRUE_POSITIVES]
+    system_total = true_positives + counts[..., FALSE_POSITIVES]
+    gold_total = true_positives + counts[..., FALSE_NEGATIVES]
+    precision = np.divide(
+        true_positives,
+        system_total,
+        out=np.zeros_like(true_positives),
+        where=system_total > 0,
+    )
+    recall = np.divide(
+        true_positives,
+        gold_total,
+        out=np.zeros_like(true_positives),
+        where=gold_total > 0,
+    )
+    fscore = np.divide(
+        2 * precision * recall,
+        precision + recall,
+        out=np.zeros_like(true_positives),
+        where=(precision + recall) > 0,
+    )
+    return precision, recall, fscore
 
 
 class ScoringCounts:
@@ -159,13 +389,15 @@ class ScoringCounts:
 
             system_mentions = system_doc.mentions
             gold_mentions = gold_doc.mentions
+            system_mention_set = frozenset(system_mentions)
+            gold_mention_set = frozenset(gold_mentions)
 
             for mention in system_mentions:
                 entity_type = mention.entity_type
                 tokens = mention.tokens(system_doc)
                 token_text = ScoringCounts._extract_token_text(tokens)
 
-                if mention not in gold_mentions:
+                if mention not in gold_mention_set:
                     # False positive
                     scoring_counts[entity_type][token_text].false_positives += 1
                 else:
@@ -177,7 +409,7 @@ class ScoringCounts:
                 tokens = mention.tokens(system_doc)
                 token_text = ScoringCounts._extract_token_text(tokens)
 
-                if mention not in system_mentions:
+                if mention not in system_mention_set:
                     # False negative
                     scoring_counts[entity_type][token_text].false_negatives += 1
 
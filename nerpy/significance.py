@@ -0,0 +1,164 @@
+"""Significance tests for differences in F1 between two systems.
+
+Both tests resample the per-document counts of true positives, false positives, and
+false negatives produced by document_counts, so no documents are scored again.
+"""
+
+import multiprocessing
+from typing import Callable, List, Optional
+
+import numpy as np
+from attr import attrib, attrs
+
+from nerpy.scoring import fscores
+
+# Limit on documents times resamples computed at once, which bounds the size of the
+# resampling matrices
+_BATCH_ELEMENTS = 10_000_000
+
+
+@attrs(frozen=True)
+class SignificanceResult:
+    fscore1: float = attrib()
+    fscore2: float = attrib()
+    p_value: float = attrib()
+    samples: int = attrib()
+
+    @property
+    def difference(self) -> float:
+        return self.fscore2 - self.fscore1
+
+
+def paired_bootstrap_test(
+    counts1: np.ndarray,
+    counts2: np.ndarray,
+    *,
+    samples: int = 10000,
+    seed: Optional[int] = None,
+    workers: int = 1,
+) -> SignificanceResult:
+    """Test whether two systems differ in F1 using a paired bootstrap.
+
+    Documents are resampled with replacement, and the p-value is the proportion of
+    resamples where the difference in F1 moves away from the observed difference by
+    at least as much as the observed difference.
+    """
+    fscore1, fscore2 = _check_counts(counts1, counts2)
+    observed = fscore2 - fscore1
+    differences = _run_samples(
+        _bootstrap_differences, counts1, counts2, samples, seed, workers
+    )
+    extreme = np.count_nonzero(np.abs(differences - observed) >= abs(observed))
+    return SignificanceResult(
+        fscore1, fscore2, float(extreme + 1) / (samples + 1), samples
+    )
+
+
+def approximate_randomization_test(
+    counts1: np.ndarray,
+    counts2: np.ndarray,
+    *,
+    samples: int = 10000,
+    seed: Optional[int] = None,
+    workers: int = 1,
+) -> SignificanceResult:
+    """Test whether two systems differ in F1 using approximate randomization.
+
+    Each document's counts are swapped between the systems with probability 0.5,
+    and the p-value is the proportion of shuffles where the absolute difference in
+    F1 is at least the observed one.
+    """
+    fscore1, fscore2 = _check_counts(counts1, counts2)
+    observed = abs(fscore2 - fscore1)
+    differences = _run_samples(
+        _randomization_differences, counts1, counts2, samples, seed, workers
+    )
+    extreme = np.count_nonzero(np.abs(differences) >= observed)
+    return SignificanceResult(
+        fscore1, fscore2, float(extreme + 1) / (samples + 1), samples
+    )
+
+
+def _check_counts(counts1: np.ndarray, counts2: np.ndarray) -> List[float]:
+    if counts1.shape != counts2.shape:
+        raise ValueError(
+            f"Counts must have the same shape: {counts1.shape} and {counts2.shape}"
+        )
+    if counts1.ndim != 2 or counts1.shape[1] != 3 or not len(counts1):
+        raise ValueError("Counts must be a non-empty array of shape (documents, 3)")
+    return fscores(np.stack([counts1.sum(axis=0), counts2.sum(axis=0)])).tolist()
+
+
+_SampleFunction = Callable[
+    [np.ndarray, np.ndarray, int, np.random.SeedSequence], np.ndarray
+]
+
+
+def _run_samples(
+    sample_function: _SampleFunction,
+    counts1: np.ndarray,
+    counts2: np.ndarray,
+    samples: int,
+    seed: Optional[int],
+    workers: int,
+) -> np.ndarray:
+    if samples < 1:
+        raise ValueError(f"Number of samples must be positive: {samples}")
+    if workers < 1:
+        raise ValueError(f"Number of workers must be positive: {workers}")
+
+    # Each worker gets an independent random stream
+    workers = min(workers, samples)
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    worker_samples = [
+        samples // workers + (idx < samples % workers) for idx in range(workers)
+    ]
+    args = [
+        (counts1, counts2, n_samples, worker_seed)
+        for n_samples, worker_seed in zip(worker_samples, seeds)
+    ]
+    if workers == 1:
+        results = [sample_function(*arg) for arg in args]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.starmap(sample_function, args)
+    return np.concatenate(results)
+
+
+def _bootstrap_differences(
+    counts1: np.ndarray, counts2: np.ndarray, samples: int, seed: np.random.SeedSequence,
+) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    n_docs = len(counts1)
+    # Counts for both systems side by side, so one product sums both
+    paired = np.concatenate([counts1, counts2], axis=1).astype(np.float64)
+    differences = []
+    max_batch_size = max(1, _BATCH_ELEMENTS // len(counts1))
+    for start in range(0, samples, max_batch_size):
+        batch_size = min(max_batch_size, samples - start)
+        # How many times each document is drawn in each resample, counting draws in
+        # one pass by giving each resample its own range of bins
+        draws = rng.integers(n_docs, size=(batch_size, n_docs))
+        draws += np.arange(batch_size)[:, np.newaxis] * n_docs
+        weights = np.bincount(draws.ravel(), minlength=batch_size * n_docs)
+        sums = weights.reshape(batch_size, n_docs) @ paired
+        differences.append(fscores(sums[:, 3:]) - fscores(sums[:, :3]))
+    return np.concatenate(differences)
+
+
+def _randomization_differences(
+    counts1: np.ndarray, counts2: np.ndarray, samples: int, seed: np.random.SeedSequence,
+) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    totals1 = counts1.sum(axis=0).astype(np.float64)
+    totals2 = counts2.sum(axis=0).astype(np.float64)
+    # Change to each system's counts when a document is swapped
+    swap_deltas = (counts2 - counts1).astype(np.float64)
+    differences = []
+    max_batch_size = max(1, _BATCH_ELEMENTS // len(counts1))
+    for start in range(0, samples, max_batch_size):
+        batch_size = min(max_batch_size, samples - start)
+        swaps = rng.random((batch_size, len(counts1))) < 0.5
+        deltas = swaps @ swap_deltas
+        differences.append(fscores(totals2 - deltas) - fscores(totals1 + deltas))
+    return np.concatenate(differences)
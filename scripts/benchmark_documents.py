@@ -0,0 +1,116 @@
+#! /usr/bin/env python
+"""Time building documents with and without validation on a CoNLL-sized corpus."""
+
+import argparse
+import random
+import time
+from typing import List, Sequence, Tuple
+
+from nerpy import DocumentBuilder, EntityType, Mention, MentionType, Token
+from nerpy.document import Document
+
+NAME = MentionType("name")
+ENTITY_TYPES = (
+    EntityType("PER"),
+    EntityType("LOC"),
+    EntityType("ORG"),
+    EntityType("MISC"),
+)
+# Roughly the size of the CoNLL 2003 English training set
+DOCUMENTS = 946
+SENTENCES_PER_DOCUMENT = 15
+SENTENCE_LENGTH = 14
+MENTIONS_PER_SENTENCE = 2
+
+# Sentences of (token text, mention spans with entity types)
+_SentenceData = Tuple[List[str], List[Tuple[int, int, EntityType]]]
+
+
+def create_corpus_data(
+    n_docs: int, rng: random.Random
+) -> List[Tuple[str, List[_SentenceData]]]:
+    """Create random token texts and mention spans to build documents from."""
+    corpus = []
+    for doc_idx in range(n_docs):
+        sentences = []
+        for _ in range(SENTENCES_PER_DOCUMENT):
+            texts = [f"token{rng.randrange(20000)}" for _ in range(SENTENCE_LENGTH)]
+            # Non-overlapping mentions of one or two tokens
+            starts = rng.sample(range(0, SENTENCE_LENGTH, 2), MENTIONS_PER_SENTENCE)
+            spans = [
+                (start, start + rng.randint(1, 2), rng.choice(ENTITY_TYPES))
+                for start in sorted(starts)
+            ]
+            sentences.append((texts, spans))
+        corpus.append((f"doc{doc_idx}", sentences))
+    return corpus
+
+
+def build_documents(
+    corpus: Sequence[Tuple[str, List[_SentenceData]]], trusted: bool
+) -> List[Document]:
+    if trusted:
+        create_token = Token.create_unchecked
+        create_mention = Mention.create_unchecked
+    else:
+        create_token = Token
+        create_mention = Mention
+
+    docs = []
+    for doc_id, sentences in corpus:
+        builder = DocumentBuilder(doc_id, trusted=trusted)
+        for texts, spans in sentences:
+            sentence = builder.create_sentence(
+                [create_token(text, idx) for idx, text in enumerate(texts)]
+            )
+            for start, end, entity_type in spans:
+                builder.add_mention(
+                    create_mention(sentence.index, start, end, NAME, entity_type)
+                )
+        docs.append(builder.build())
+    return docs
+
+
+def benchmark(n_docs: int, repeats: int, seed: int) -> None:
+    corpus = create_corpus_data(n_docs, random.Random(seed))
+    times = {}
+    results = {}
+    for trusted in (False, True):
+        elapsed = []
+        for _ in range(repeats):
+            start_time = time.perf_counter()
+            results[trusted] = build_documents(corpus, trusted)
+            elapsed.append(time.perf_counter() - start_time)
+        times[trusted] = min(elapsed)
+
+    if results[False] != results[True]:
+        raise ValueError("Checked and trusted documents differ")
+
+    docs = results[True]
+    n_sentences = sum(len(doc) for doc in docs)
+    n_tokens = sum(len(sentence) for doc in docs for sentence in doc)
+    n_mentions = sum(len(doc.mentions) for doc in docs)
+    print(
+        f"{len(docs)} documents, {n_sentences} sentences, "
+        f"{n_tokens} tokens, {n_mentions} mentions"
+    )
+    print(f"Checked: {times[False]:.3f}s")
+    print(f"Trusted: {times[True]:.3f}s ({times[False] / times[True]:.1f}x faster)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-n", "--documents", type=int, default=DOCUMENTS, help="number of documents"
+    )
+    parser.add_argument(
+        "-r", "--repeats", type=int, default=3, help="times to repeat each measurement"
+    )
+    parser.add_argument("-s", "--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args()
+
+    benchmark(args.documents, args.repeats, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#! /usr/bin/env python
+"""Time scoring on single documents with increasing numbers of mentions."""
+
+import argparse
+import random
+import time
+from typing import List, Sequence, Tuple
+
+from nerpy import DocumentBuilder, EntityType, Mention, MentionType, Token, score_prf
+from nerpy.document import Document
+from nerpy.scoring import ScoringCounts
+
+NAME = MentionType("name")
+ENTITY_TYPES = (EntityType("PER"), EntityType("LOC"), EntityType("ORG"))
+SENTENCE_LENGTH = 20
+MENTIONS_PER_SENTENCE = 4
+
+
+def create_docs(mention_count: int, rng: random.Random) -> Tuple[Document, Document]:
+    """Create gold and system documents where about half of the mentions match."""
+    gold = DocumentBuilder("gold")
+    system = DocumentBuilder("system")
+    for _ in range(mention_count // MENTIONS_PER_SENTENCE):
+        tokens = [Token(f"token{idx}", idx) for idx in range(SENTENCE_LENGTH)]
+        gold_sentence = gold.create_sentence(tokens)
+        system.create_sentence(tokens)
+        # Non-overlapping two-token mentions
+        for start in rng.sample(range(0, SENTENCE_LENGTH, 2), MENTIONS_PER_SENTENCE):
+            mention = Mention(
+                gold_sentence.index, start, start + 2, NAME, rng.choice(ENTITY_TYPES)
+            )
+            gold.add_mention(mention)
+            if rng.random() < 0.5:
+                system.add_mention(mention)
+            else:
+                # Same span, possibly a different type
+                system.add_mention(
+                    Mention(
+                        mention.sentence_index,
+                        mention.start,
+                        mention.end,
+                        NAME,
+                        rng.choice(ENTITY_TYPES),
+                    )
+                )
+    return gold.build(), system.build()
+
+
+def benchmark(mention_counts: Sequence[int], repeats: int, seed: int) -> None:
+    rng = random.Random(seed)
+    print("Mentions\tscore_prf (s)\tScoringCounts (s)")
+    for mention_count in mention_counts:
+        gold_doc, system_doc = create_docs(mention_count, rng)
+        score_times: List[float] = []
+        count_times: List[float] = []
+        for _ in range(repeats):
+            start_time = time.perf_counter()
+            score_prf([gold_doc], [system_doc])
+            score_times.append(time.perf_counter() - start_time)
+
+            start_time = time.perf_counter()
+            ScoringCounts().count([system_doc], [gold_doc])
+            count_times.append(time.perf_counter() - start_time)
+        print(f"{len(gold_doc.mentions)}\t{min(score_times):.6f}\t{min(count_times):.6f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "mention_counts",
+        nargs="*",
+        type=int,
+        default=[100, 1000, 5000, 10000],
+        help="numbers of mentions per document",
+    )
+    parser.add_argument(
+        "-r", "--repeats", type=int, default=3, help="times to repeat each measurement"
+    )
+    parser.add_argument("-s", "--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args()
+
+    benchmark(args.mention_counts, args.repeats, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#! /usr/bin/env python
+"""Measure the memory used by documents ingested from a synthetic CoNLL corpus."""
+
+import argparse
+import io
+import random
+import time
+import tracemalloc
+
+from nerpy import BIO, CoNLLIngester, TokenVocabulary
+
+POS_TAGS = ("NNP", "NN", "NNS", "VBD", "VBZ", "DT", "IN", "JJ", "CD", ",", ".")
+CHUNK_TAGS = ("B-NP", "I-NP", "B-VP", "I-VP", "B-PP", "O")
+NE_TAGS = ("O",) * 8 + ("B-PER", "B-LOC", "B-ORG", "B-MISC")
+SENTENCE_LENGTH = 14
+SENTENCES_PER_DOCUMENT = 15
+
+
+def create_conll_text(n_tokens: int, vocabulary_size: int, rng: random.Random) -> str:
+    """Create CoNLL 2003 formatted text with random words and tags."""
+    lines = []
+    n_sentences = n_tokens // SENTENCE_LENGTH
+    for sentence_idx in range(n_sentences):
+        if sentence_idx % SENTENCES_PER_DOCUMENT == 0:
+            lines.append("-DOCSTART- -X- -X- O")
+            lines.append("")
+        for _ in range(SENTENCE_LENGTH):
+            lines.append(
+                " ".join(
+                    [
+                        f"word{rng.randrange(vocabulary_size)}",
+                        rng.choice(POS_TAGS),
+                        rng.choice(CHUNK_TAGS),
+                        rng.choice(NE_TAGS),
+                    ]
+                )
+            )
+        lines.append("")
+    return "\n".join(lines) + "\n"
+
+
+def measure(n_tokens: int, vocabulary_size: int, seed: int, compact: bool) -> None:
+    text = create_conll_text(n_tokens, vocabulary_size, random.Random(seed))
+    ingester = CoNLLIngester(BIO())
+
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    docs = ingester.ingest(io.StringIO(text), "synthetic")
+    if compact:
+        vocabulary = TokenVocabulary()
+        docs = [vocabulary.compact_document(doc) for doc in docs]
+    elapsed = time.perf_counter() - start_time
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tokens = [token for doc in docs for sentence in doc for token in sentence]
+    print(f"{len(docs)} documents, {len(tokens)} tokens")
+    print(f"Distinct property mappings: {len({id(tok.properties) for tok in tokens})}")
+    print(f"Distinct text objects: {len({id(tok.text) for tok in tokens})}")
+    print(f"Retained: {current / 2 ** 20:.1f} MiB, peak: {peak / 2 ** 20:.1f} MiB")
+    print(f"Ingest time: {elapsed:.2f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-n", "--tokens", type=int, default=300_000, help="number of tokens"
+    )
+    parser.add_argument(
+        "-v", "--vocabulary-size", type=int, default=20_000, help="number of words"
+    )
+    parser.add_argument("-s", "--seed", type=int, default=0, help="random seed")
+    parser.add_argument(
+        "-c", "--compact", action="store_true", help="convert to compact sentences"
+    )
+    args = parser.parse_args()
+
+    measure(args.tokens, args.vocabulary_size, args.seed, args.compact)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#! /usr/bin/env python
+"""Test whether two systems' predictions differ significantly in F1."""
+
+import argparse
+from typing import Optional
+
+from nerpy import load_documents
+from nerpy.scoring import document_counts
+from nerpy.significance import approximate_randomization_test, paired_bootstrap_test
+
+
+def compare_systems(
+    gold_path: str,
+    system1_path: str,
+    system2_path: str,
+    *,
+    samples: int,
+    seed: Optional[int],
+    workers: int,
+) -> None:
+    gold_docs = list(load_documents(gold_path))
+    # Only the counts for each document are needed from each system
+    counts1 = document_counts(gold_docs, load_documents(system1_path), check_docids=True)
+    counts2 = document_counts(gold_docs, load_documents(system2_path), check_docids=True)
+    if len(counts1) != len(gold_docs) or len(counts2) != len(gold_docs):
+        raise ValueError("Systems must have predictions for every gold document")
+
+    for name, test in (
+        ("Paired bootstrap", paired_bootstrap_test),
+        ("Approximate randomization", approximate_randomization_test),
+    ):
+        result = test(counts1, counts2, samples=samples, seed=seed, workers=workers)
+        print(f"***** {name} *****")
+        print(f"System 1 F1-score: {result.fscore1 * 100:0.2f}")
+        print(f"System 2 F1-score: {result.fscore2 * 100:0.2f}")
+        print(f"Difference: {result.difference * 100:0.2f}")
+        print(f"p-value: {result.p_value:0.4f} ({result.samples} samples)")
+        print()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("gold", help="path to gold documents")
+    parser.add_argument("system1", help="path to first system's predicted documents")
+    parser.add_argument("system2", help="path to second system's predicted documents")
+    parser.add_argument(
+        "-n", "--samples", type=int, default=10000, help="number of resamples"
+    )
+    parser.add_argument("-s", "--seed", type=int, help="random seed")
+    parser.add_argument(
+        "-w", "--workers", type=int, default=1, help="number of worker processes"
+    )
+    args = parser.parse_args()
+
+    compare_systems(
+        args.gold,
+        args.system1,
+        args.system2,
+        samples=args.samples,
+        seed=args.seed,
+        workers=args.workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
 #! /usr/bin/env python
 
 import argparse
+from itertools import islice
 
-from nerpy import CoNLLIngester, get_mention_encoder
+from nerpy import get_mention_encoder
+from nerpy.ingest.conll import iter_conll
+
+# Number of documents encoded together
+CHUNK_DOCUMENTS = 1000
 
 
 def convert_conll(
@@ -12,25 +17,35 @@ def convert_conll(
     output_encoding: str,
     ignore_comments: bool,
 ) -> None:
-
-    with open(input_path, encoding="utf8") as input_file:
-        input_mention_encoding = get_mention_encoder(input_encoding)
-        input_docs = CoNLLIngester(
-            input_mention_encoding(), ignore_comments=ignore_comments
-        ).ingest(input_file, "input")
+    input_mention_encoding = get_mention_encoder(input_encoding)
+    # Documents are converted as they are read
+    input_docs = iter_conll(
+        input_path,
+        input_mention_encoding(),
+        document_id_base="input",
+        ignore_comments=ignore_comments,
+    )
 
     output_mention_encoding = get_mention_encoder(output_encoding)()
+    inventory = output_mention_encoding.label_inventory
     # TODO: This should use the same code as write_conll.py
     with open(output_path, "w", encoding="utf8") as output_file:
-        for input_doc in input_docs:
-            output_file.write("-DOCSTART- -X- -X- O\n\n")
-            for sentence, mentions in input_doc.sentences_with_mentions():
-                tokens = sentence.tokens
-                labels = output_mention_encoding.encode_mentions(sentence, mentions)
-                for token, label in zip(tokens, labels):
-                    line = " ".join([token.text, token.pos_tag, "None", label])
-                    output_file.write(line + "\n")
-                output_file.write("\n")
+        # Encode a bounded number of documents at a time so memory use does not grow
+        # with the size of the input
+        while True:
+            chunk = list(islice(input_docs, CHUNK_DOCUMENTS))
+            if not chunk:
+                break
+            label_ids, offsets = output_mention_encoding.encode_corpus(chunk)
+            labels = inventory.label_array(label_ids)
+            sentence_spans = zip(offsets[:-1], offsets[1:])
+            for input_doc in chunk:
+                output_file.write("-DOCSTART- -X- -X- O\n\n")
+                for sentence, (start, end) in zip(input_doc, sentence_spans):
+                    for token, label in zip(sentence.tokens, labels[start:end]):
+                        line = " ".join([token.text, token.pos_tag, "None", label])
+                        output_file.write(line + "\n")
+                    output_file.write("\n")
 
 
 def main() -> None:
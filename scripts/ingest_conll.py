@@ -10,10 +10,17 @@ from nerpy import (
     get_mention_encoder,
     pickle_documents,
 )
+from nerpy.io import write_columnar_documents, write_indexed_documents
 
 
 def ingest_conll(
-    input_path: str, output_path: str, encoding_name: str, ignore_comments: bool
+    input_path: str,
+    output_path: str,
+    encoding_name: str,
+    ignore_comments: bool,
+    *,
+    columnar: bool = False,
+    indexed: bool = False,
 ) -> None:
     encoder = get_mention_encoder(encoding_name)
 
@@ -28,7 +35,12 @@ def ingest_conll(
     )
 
     start_time = time.perf_counter()
-    pickle_documents(input_docs, output_path)
+    if columnar:
+        write_columnar_documents(input_docs, output_path)
+    elif indexed:
+        write_indexed_documents(input_docs, output_path)
+    else:
+        pickle_documents(input_docs, output_path)
     print(f"Wrote output to {output_path} in {time.perf_counter() - start_time} seconds")
 
 
@@ -40,13 +52,31 @@ def main() -> None:
         help="mention encoding of input file",
         choices=SUPPORTED_ENCODINGS,
     )
-    parser.add_argument("output", help="output pickle file")
+    parser.add_argument("output", help="output pickle file or columnar corpus directory")
     parser.add_argument(
         "--ignore-comments", action="store_true", help="ignore comment lines"
     )
+    output_format = parser.add_mutually_exclusive_group()
+    output_format.add_argument(
+        "--columnar",
+        action="store_true",
+        help="write a memory-mappable columnar corpus directory instead of a pickle",
+    )
+    output_format.add_argument(
+        "--indexed",
+        action="store_true",
+        help="write an indexed corpus that allows reading individual documents",
+    )
     args = parser.parse_args()
 
-    ingest_conll(args.input, args.output, args.mention_encoding, args.ignore_comments)
+    ingest_conll(
+        args.input,
+        args.output,
+        args.mention_encoding,
+        args.ignore_comments,
+        columnar=args.columnar,
+        indexed=args.indexed,
+    )
 
 
 if __name__ == "__main__":
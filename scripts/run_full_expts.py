@@ -13,10 +13,15 @@ from typing import Optional, Tuple
 
 from attr import attrs
 
-from nerpy import load_json
+from nerpy import load_documents, load_json
+from nerpy.features import CorpusFeatureCache
+from nerpy.io import write_columnar_documents
 from nerpy.scoring import ScoringResult
 from scripts.train_test import train_test
 
+# Written in each shared columnar corpus to record the file it was converted from
+SHARED_CORPUS_SOURCE = "source.txt"
+
 
 @attrs(auto_attribs=True)
 class ExperimentConfiguration:
@@ -29,6 +34,7 @@ class ExperimentConfiguration:
     ablation_size: int
     random_seed: Optional[int]
     output_dir: str
+    feature_cache_path: Optional[str]
 
 
 def run_expts(
@@ -42,6 +48,8 @@ def run_expts(
     random_seed_path: str,
     workers: int,
     output_base: str,
+    *,
+    cache_features: bool = False,
 ) -> None:
     # Load experiment conditions
     mention_encodings = load_json(mention_encodings_path)
@@ -49,6 +57,26 @@ def run_expts(
     assert isinstance(ablation_sizes, list)
     random_seeds = load_json(random_seed_path)
 
+    # Convert the data once so every worker memory-maps the same copy rather than
+    # each loading its own
+    shared_dir = Path(output_base) / "shared_data"
+    train_path = _shared_corpus(train_path, shared_dir / "train")
+    test_path = _shared_corpus(test_path, shared_dir / "test")
+    feature_cache_path = None
+    if cache_features:
+        # Features do not depend on the mention encoding or the documents selected, so
+        # extract them once for all configurations. Workers open the cache by path so
+        # they do not need to fingerprint the corpus again.
+        feature_cache_dir = shared_dir / "features"
+        print(f"Caching training features in {feature_cache_dir}")
+        feature_cache_path = str(
+            CorpusFeatureCache.open_or_build(
+                feature_cache_dir,
+                load_json(feature_params_path),
+                load_documents(train_path),
+            ).path
+        )
+
     # Create configurations
     configs = []
     for random_seed in random_seeds:
@@ -79,6 +107,7 @@ def run_expts(
                     int(ablation_size),
                     random_seed,
                     output_dir,
+                    feature_cache_path,
                 )
                 configs.append(config)
 
@@ -124,15 +153,39 @@ def run_expts(
                     config.ablation_size,
                     config.random_seed if config.random_seed is not None else -1,
                     config.mention_encoding_name,
-                    score.precision,
-                    score.recall,
-                    score.fscore,
+                    score.score.precision,
+                    score.score.recall,
+                    score.score.fscore,
                 ]
             )
 
     pool.join()
 
 
+def _shared_corpus(path: str, columnar_path: Path) -> str:
+    # Columnar corpora can already be shared
+    if Path(path).is_dir():
+        return path
+
+    # Reuse the copy made by an earlier run if the source has not changed since
+    source_stat = os.stat(path)
+    source = (
+        f"{os.path.abspath(path)}\n{source_stat.st_size}\n{source_stat.st_mtime_ns}\n"
+    )
+    source_path = columnar_path / SHARED_CORPUS_SOURCE
+    if source_path.exists() and source_path.read_text(encoding="utf8") == source:
+        print(f"Using existing columnar corpus at {columnar_path}")
+        return str(columnar_path)
+
+    print(f"Converting {path} to a columnar corpus at {columnar_path}")
+    # Remove the record of the old source first so a partial copy is never reused
+    if source_path.exists():
+        source_path.unlink()
+    write_columnar_documents(load_documents(path), columnar_path)
+    source_path.write_text(source, encoding="utf8")
+    return str(columnar_path)
+
+
 def run_configuration(
     config: ExperimentConfiguration,
 ) -> Tuple[ExperimentConfiguration, ScoringResult]:
@@ -154,6 +207,7 @@ def run_configuration(
             truncate=config.ablation_size,
             log_file=log_file,
             random_seed=config.random_seed,
+            feature_cache_path=config.feature_cache_path,
         )
         pickle.dump(score, score_file, protocol=pickle.HIGHEST_PROTOCOL)
         return (config, score)
@@ -173,6 +227,12 @@ def main() -> None:
     parser.add_argument(
         "-n", "--num_workers", type=int, default=1, help="number of workers"
     )
+    parser.add_argument(
+        "-f",
+        "--feature-cache",
+        action="store_true",
+        help="extract training features once and share them between configurations",
+    )
     args = parser.parse_args()
 
     run_expts(
@@ -186,6 +246,7 @@ def main() -> None:
         args.random_seed_path,
         args.num_workers,
         args.output_base,
+        cache_features=args.feature_cache,
     )
 
 
@@ -1,9 +1,9 @@
 #! /usr/bin/env python
 
 import argparse
-import os
 
-from nerpy import SUPPORTED_ENCODINGS, CoNLLIngester, get_mention_encoder, score_prf
+from nerpy import SUPPORTED_ENCODINGS, get_mention_encoder, score_prf
+from nerpy.ingest.conll import iter_conll
 
 
 def score_conll(
@@ -11,15 +11,11 @@ def score_conll(
 ) -> None:
     encoder = get_mention_encoder(encoding_name)
 
-    with open(reference_path, encoding="utf8") as reference_file:
-        reference_docs = CoNLLIngester(encoder(), ignore_comments=ignore_comments).ingest(
-            reference_file, os.path.basename(reference_path)
-        )
-
-    with open(prediction_path, encoding="utf8") as prediction_file:
-        pred_docs = CoNLLIngester(encoder(), ignore_comments=ignore_comments).ingest(
-            prediction_file, os.path.basename(prediction_path)
-        )
+    # Stream both files so that only one document from each is in memory at a time
+    reference_docs = iter_conll(
+        reference_path, encoder(), ignore_comments=ignore_comments
+    )
+    pred_docs = iter_conll(prediction_path, encoder(), ignore_comments=ignore_comments)
 
     res = score_prf(reference_docs, pred_docs)
     print(res)
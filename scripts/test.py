@@ -2,14 +2,15 @@
 
 import argparse
 import csv
+import time
 from collections import defaultdict
 from typing import DefaultDict
 
 from nerpy import (
     EntityType,
     SequenceMentionAnnotator,
+    load_documents,
     load_json,
-    load_pickled_documents,
     pickle_documents,
     score_prf,
 )
@@ -30,6 +31,9 @@ def test(
     output_file: str,
     system_counts_file: str,
     gold_counts_file: str,
+    *,
+    workers: int = 1,
+    constrained_decoding: bool = False,
 ) -> None:
     # TODO: Figure out how to load features using this
     _ = load_json(feature_params_path)
@@ -38,19 +42,25 @@ def test(
     if backend == BACKEND_CRFSUITE:
         from nerpy.annotators.crfsuite import CRFSuiteAnnotator
 
-        annotator = CRFSuiteAnnotator.from_path(model_path)
+        crfsuite_annotator = CRFSuiteAnnotator.from_path(model_path)
+        crfsuite_annotator.constrained_decoding = constrained_decoding
+        annotator = crfsuite_annotator
     elif backend == BACKEND_SEQUENCEMODELS:
         from nerpy.annotators.seqmodels import SequenceModelsAnnotator
 
+        if constrained_decoding:
+            raise ValueError(f"Constrained decoding is not supported for {backend}")
         annotator = SequenceModelsAnnotator.from_path(model_path)
     else:
         raise ValueError(f"Unrecognized backend: {backend}")
 
-    test_docs = load_pickled_documents(test_path)
+    test_docs = load_documents(test_path)
 
-    pred_docs = [
-        annotator.add_mentions(test_doc.copy_without_mentions()) for test_doc in test_docs
-    ]
+    start_time = time.perf_counter()
+    pred_docs = annotator.annotate_batch(
+        (test_doc.copy_without_mentions() for test_doc in test_docs), workers=workers
+    )
+    print(f"Annotation took {time.perf_counter() - start_time} seconds")
     pickle_documents(pred_docs, test_pred_path)
 
     res = score_prf(test_docs, pred_docs)
@@ -157,6 +167,15 @@ def main() -> None:
     parser.add_argument("-o", "--output_file", help="Path to scoring counts output")
     parser.add_argument("-s", "--system_counts_file", help="Path to system counts output")
     parser.add_argument("-g", "--gold_counts_file", help="Path to gold counts output")
+    parser.add_argument(
+        "-w", "--workers", type=int, default=1, help="Number of annotation workers"
+    )
+    parser.add_argument(
+        "-c",
+        "--constrained-decoding",
+        action="store_true",
+        help="Only predict label sequences that are valid for the mention encoding",
+    )
     args = parser.parse_args()
 
     test(
@@ -168,6 +187,8 @@ def main() -> None:
         args.output_file,
         args.system_counts_file,
         args.gold_counts_file,
+        workers=args.workers,
+        constrained_decoding=args.constrained_decoding,
     )
 
 
@@ -7,8 +7,8 @@ from nerpy import (
     MentionType,
     SequenceMentionAnnotator,
     get_mention_encoder,
+    load_documents,
     load_json,
-    load_pickled_documents,
 )
 from nerpy.features import SentenceFeatureExtractor
 
@@ -29,9 +29,9 @@ def train(
     mention_encoder = get_mention_encoder(mention_encoding_name)
     feature_params = load_json(feature_params_path)
     train_config = load_json(train_params_path)
-    train_docs = load_pickled_documents(train_path)
+    train_docs = load_documents(train_path)
 
-    mention_type = MentionType("name")
+    mention_type = MentionType.of("name")
     encoder_instance = mention_encoder()
     feature_extractor = SentenceFeatureExtractor(feature_params)
 
@@ -11,13 +11,13 @@ from nerpy import (
     MentionType,
     ScoringResult,
     get_mention_encoder,
+    load_documents,
     load_json,
-    load_pickled_documents,
     pickle_documents,
     score_prf,
 )
 from nerpy.annotator import SequenceMentionAnnotator
-from nerpy.features import SentenceFeatureExtractor
+from nerpy.features import CorpusFeatureCache, SentenceFeatureExtractor
 
 BACKEND_CRFSUITE = "crfsuite"
 BACKEND_SEQUENCEMODELS = "sequencemodels"
@@ -36,6 +36,8 @@ def train_test(
     truncate: Optional[int] = None,
     log_file: Optional[TextIO] = None,
     random_seed: Optional[int] = None,
+    workers: int = 1,
+    feature_cache_path: Optional[Union[Path, str]] = None,
 ) -> ScoringResult:
     annotator = train(
         feature_params_path,
@@ -46,10 +48,11 @@ def train_test(
         truncate,
         log_file,
         random_seed,
+        feature_cache_path=feature_cache_path,
     )
     annotator.to_path(model_path)
 
-    res = test(annotator, log_file, output_path, test_path)
+    res = test(annotator, log_file, output_path, test_path, workers=workers)
 
     return res
 
@@ -63,19 +66,27 @@ def train(
     truncate: Optional[int] = None,
     log_file: Optional[IO[str]] = None,
     random_seed: Optional[int] = None,
+    *,
+    feature_cache_path: Optional[Union[Path, str]] = None,
 ) -> SequenceMentionAnnotator:
     mention_encoder = get_mention_encoder(mention_encoding_name)
     feature_params = load_json(feature_params_path)
     train_config = load_json(train_params_path)
     print("Loading training data", file=log_file)
-    train_docs = load_pickled_documents(train_path)
+    all_train_docs = load_documents(train_path)
+    # Select documents by index so that indexed and columnar corpora only read the
+    # documents that are used. Shuffling indices gives the same order as shuffling
+    # the documents themselves.
+    train_indices = list(range(len(all_train_docs)))
     if random_seed is not None:
         print(f"Shuffling documents with random seed {random_seed}", file=log_file)
         random.seed(random_seed)
-        random.shuffle(train_docs)
+        random.shuffle(train_indices)
     if truncate is not None:
         print(f"Truncating training to {truncate} documents", file=log_file)
-        train_docs = train_docs[:truncate]
+        train_indices = train_indices[:truncate]
+    # Create documents as training consumes them rather than holding all of them
+    train_docs = (all_train_docs[idx] for idx in train_indices)
     print(
         f"Training using {mention_encoder.__name__} with configuration:\n"
         f"{train_config}",
@@ -83,12 +94,84 @@ def train(
     )
     print(f"Feature configuration:\n{feature_params}", file=log_file)
 
-    mention_type = MentionType("name")
+    mention_type = MentionType.of("name")
     encoder_instance = mention_encoder()
     feature_extractor = SentenceFeatureExtractor(feature_params)
 
     backend = train_config["backend"]
     train_params = train_config["train_params"]
+    if backend not in (BACKEND_CRFSUITE, BACKEND_SEQUENCEMODELS):
+        raise ValueError(f"Unrecognized backend: {backend}")
+
+    if feature_cache_path is not None:
+        # The cache must have been built from the training data with these parameters
+        print(f"Loading cached features from {feature_cache_path}", file=log_file)
+        feature_cache = CorpusFeatureCache(feature_cache_path)
+        # Sentences are read from the cache as training consumes them
+        training_data = feature_cache.extracted_features(
+            all_train_docs, encoder_instance, train_indices
+        )
+        if backend == BACKEND_CRFSUITE:
+            from nerpy.annotators.crfsuite import train_crfsuite_sequences
+
+            return train_crfsuite_sequences(
+                encoder_instance,
+                feature_extractor,
+                mention_type,
+                training_data,
+                train_params,
+                verbose=verbose,
+            )
+        else:
+            from nerpy.annotators.seqmodels import train_seqmodels_sequences
+
+            return train_seqmodels_sequences(
+                encoder_instance,
+                feature_extractor,
+                mention_type,
+                training_data,
+                train_params,
+                verbose=verbose,
+            )
+
+    if feature_extractor.vocabulary is not None:
+        # Hold the extracted features as IDs, which take less memory than names
+        print("Extracting features as feature IDs", file=log_file)
+        if backend == BACKEND_CRFSUITE:
+            from nerpy.annotators.crfsuite import (
+                CRFSuiteAnnotator,
+                train_crfsuite_featurized,
+            )
+
+            training_data = CRFSuiteAnnotator.for_training(
+                mention_type, feature_extractor, encoder_instance
+            ).extract_features(train_docs)
+            return train_crfsuite_featurized(
+                encoder_instance,
+                feature_extractor,
+                mention_type,
+                training_data,
+                train_params,
+                verbose=verbose,
+            )
+        else:
+            from nerpy.annotators.seqmodels import (
+                SequenceModelsAnnotator,
+                train_seqmodels_featurized,
+            )
+
+            training_data = SequenceModelsAnnotator.for_training(
+                mention_type, feature_extractor, encoder_instance
+            ).extract_features(train_docs)
+            return train_seqmodels_featurized(
+                encoder_instance,
+                feature_extractor,
+                mention_type,
+                training_data,
+                train_params,
+                verbose=verbose,
+            )
+
     if backend == BACKEND_CRFSUITE:
         from nerpy.annotators.crfsuite import train_crfsuite
 
@@ -100,7 +183,7 @@ def train(
             train_params,
             verbose=verbose,
         )
-    elif backend == BACKEND_SEQUENCEMODELS:
+    else:
         from nerpy.annotators.seqmodels import train_seqmodels
 
         return train_seqmodels(
@@ -111,8 +194,6 @@ def train(
             train_params,
             verbose=verbose,
         )
-    else:
-        raise ValueError(f"Unrecognized backend: {backend}")
 
 
 def test(
@@ -120,12 +201,14 @@ def test(
     log_file: Optional[TextIO],
     output_path: Union[Path, str],
     test_path: Union[Path, str],
+    *,
+    workers: int = 1,
 ) -> ScoringResult:
     print("Loading test data", file=log_file)
-    test_docs = load_pickled_documents(test_path)
-    pred_docs = [
-        annotator.add_mentions(test_doc.copy_without_mentions()) for test_doc in test_docs
-    ]
+    test_docs = load_documents(test_path)
+    pred_docs = annotator.annotate_batch(
+        (test_doc.copy_without_mentions() for test_doc in test_docs), workers=workers
+    )
     print("Scoring", file=log_file)
     res = score_prf(test_docs, pred_docs)
     res.print(file=log_file)
@@ -153,8 +236,22 @@ def main() -> None:
     parser.add_argument(
         "-s", "--seed", type=int, help="random seed to use to shuffle data"
     )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=1, help="number of workers for testing"
+    )
+    parser.add_argument(
+        "-f", "--feature-cache", help="directory for caching training features"
+    )
     args = parser.parse_args()
 
+    feature_cache_path = None
+    if args.feature_cache:
+        feature_cache_path = CorpusFeatureCache.open_or_build(
+            args.feature_cache,
+            load_json(args.feature_params),
+            load_documents(args.train),
+        ).path
+
     train_test(
         args.train,
         args.model,
@@ -166,6 +263,8 @@ def main() -> None:
         verbose=args.verbose,
         truncate=args.truncate,
         random_seed=args.seed,
+        workers=args.workers,
+        feature_cache_path=feature_cache_path,
     )
 
 
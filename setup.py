@@ -15,11 +15,11 @@ def setup_package() -> None:
         license="MIT",
         long_description="Python library for named entity recognition (NER)",
         install_requires=[
-            "attrs>=19.2.0",
+            "attrs>=20.1.0",
             "python-crfsuite>=0.9.6",
             "regex",
             "immutabledict",
-            "numpy",
+            "numpy>=1.17",
             "quickvec @ https://github.com/ConstantineLignos/quickvec/archive/fef37d56af03288cee758a2ab6f9d70cc035f0d5.zip#egg=quickvec-0.2.0-dev",
         ],
         extras_require={
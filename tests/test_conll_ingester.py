@@ -19,7 +19,7 @@ from nerpy import (
     MentionType,
     Token,
 )
-from nerpy.ingest.conll import read_conll, write_conll
+from nerpy.ingest.conll import iter_conll, read_conll, write_conll
 from nerpy.io import PathType
 
 TEST_DATA_DIR = os.path.join("tests", "test_data")
@@ -66,6 +66,35 @@ def test_ingest():
         assert doc1.mentions == doc2.mentions
 
 
+def test_iter_documents():
+    text = """-DOCSTART- -X- -X- O
+
+EU NNP B-NP B-ORG
+rejects VBZ B-VP O
+
+-DOCSTART- -X- -X- O
+
+German JJ B-NP B-MISC
+"""
+    ingest = CoNLLIngester(BIO())
+    source = io.StringIO(text)
+    docs = ingest.iter_documents(source, "test")
+    # The first document is returned before the rest of the input is read
+    doc1 = next(docs)
+    assert doc1.id == "test_1"
+    assert str(doc1) == "EU rejects"
+    assert source.readline() == "\n"
+    assert source.readline() == "German JJ B-NP B-MISC\n"
+
+    source = io.StringIO(text)
+    assert list(ingest.iter_documents(source, "test")) == ingest.ingest(
+        io.StringIO(text), "test"
+    )
+
+    en_bio_path = Path(TEST_DATA_DIR, "en_bio.txt")
+    assert list(iter_conll(en_bio_path, BIO())) == read_conll(en_bio_path, BIO())
+
+
 def test_bad_line():
     # DOCSTART is part of sentence, should only be between sentences
     text = io.StringIO(
@@ -2,11 +2,19 @@ import os
 import tempfile
 from typing import Mapping
 
+import numpy as np
 import pytest
 
 from nerpy import BILOU, BIO, DocumentBuilder, EntityType, Mention, MentionType, Token
-from nerpy.annotators.crfsuite import CRFSuiteAnnotator, train_crfsuite
+from nerpy.annotators.crfsuite import (
+    ConstrainedDecoder,
+    CRFSuiteAnnotator,
+    train_crfsuite,
+    train_crfsuite_sequences,
+    viterbi,
+)
 from nerpy.features import SentenceFeatureExtractor
+from nerpy.scoring import score_prf
 
 NAME = MentionType("name")
 ORG = EntityType(types=("ORG",))
@@ -52,6 +60,19 @@ def test_annotator():
     pred_doc = deserialized_annotator1.add_mentions(doc.copy_without_mentions())
     assert pred_doc.mentions == (m0, m1, m2)
 
+    # Test batch annotation, both in this process and using a pool of workers
+    docs = [doc.copy_without_mentions(), doc.copy_without_mentions()]
+    for workers in (1, 2):
+        pred_docs = annotator1.annotate_batch(docs, workers=workers)
+        assert [pred_doc.mentions for pred_doc in pred_docs] == [(m0, m1, m2)] * 2
+    # Scoring in a pool of workers gives the same result as annotating and scoring
+    expected = score_prf([doc] * 3, annotator1.annotate_batch(docs[:1] * 3))
+    for workers in (1, 2):
+        scorer = annotator1.score_batch([doc] * 3, workers=workers, chunksize=2)
+        assert scorer.result() == expected
+    with pytest.raises(ValueError):
+        annotator1.annotate_batch(docs, workers=0)
+
     # Test that untrained models can't be serialized
     untrained = _create_annotator(feature_params)
     with pytest.raises(ValueError):
@@ -95,6 +116,50 @@ def test_annotator():
     pred_doc = annotator3.add_mentions(doc.copy_without_mentions())
     assert pred_doc.mentions == (m0, m1, m2)
 
+    # Test separate feature extraction using feature IDs
+    annotator5 = CRFSuiteAnnotator.for_training(
+        MentionType("name"),
+        SentenceFeatureExtractor(feature_params, use_feature_ids=True),
+        BILOU(),
+    )
+    features = annotator5.extract_features([doc])
+    assert features.feature_ids
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        model_path = tmpdirname + "/model"
+        annotator5.train_featurized(
+            features, model_path=model_path, algorithm="ap", train_params=train_params,
+        )
+    pred_doc = annotator5.add_mentions(doc.copy_without_mentions())
+    assert pred_doc.mentions == (m0, m1, m2)
+    # Training freezes the vocabulary, so features of unseen test data get no IDs
+    vocabulary = annotator5.feature_extractor.vocabulary
+    assert vocabulary.frozen
+    vocabulary_size = len(vocabulary)
+    test_builder = DocumentBuilder("unseen")
+    test_builder.create_sentence([Token("Brussels", 0)])
+    test_features = annotator5.extract_features([test_builder.build()])
+    assert vocabulary.feature_id("tkn[0]=Brussels") is None
+    assert len(vocabulary) == vocabulary_size
+    assert list(test_features.sequence_features()) == [[{"b": 1.0}]]
+    # The vocabulary is only for storing features, so it is not saved with the model
+    loaded5 = CRFSuiteAnnotator.from_bytes(annotator5.to_bytes())
+    assert loaded5.feature_extractor.vocabulary is None
+    assert annotator5.feature_extractor.vocabulary is not None
+    pred_doc = loaded5.add_mentions(doc.copy_without_mentions())
+    assert pred_doc.mentions == (m0, m1, m2)
+
+    # Test typical training with an extractor that has a vocabulary
+    annotator6 = CRFSuiteAnnotator.for_training(
+        MentionType("name"),
+        SentenceFeatureExtractor(feature_params, use_feature_ids=True),
+        BILOU(),
+    )
+    annotator6.train([doc], algorithm="ap", train_params=train_params)
+    # Training extracts features by name without going through the vocabulary
+    assert len(annotator6.feature_extractor.vocabulary) == 0
+    pred_doc = annotator6.add_mentions(doc.copy_without_mentions())
+    assert pred_doc.mentions == (m0, m1, m2)
+
     # Test training wrapper
     train_params_with_alg = dict(train_params)
     train_params_with_alg["algorithm"] = "ap"
@@ -112,6 +177,71 @@ def test_annotator():
     pred_doc = annotator4.add_mentions(doc.copy_without_mentions())
     assert pred_doc.mentions == (m0, m1, m2)
 
+    # Test training on a stream of already extracted sentences
+    sequences = (
+        (
+            feature_extractor.extract(sentence, doc),
+            mention_encoder.encode_mentions(sentence, mentions),
+        )
+        for sentence, mentions in doc.sentences_with_mentions()
+    )
+    train_params_with_alg["algorithm"] = "ap"
+    annotator7 = train_crfsuite_sequences(
+        mention_encoder, feature_extractor, mention_type, sequences, train_params_with_alg
+    )
+    pred_doc = annotator7.add_mentions(doc.copy_without_mentions())
+    assert pred_doc.mentions == (m0, m1, m2)
+
+
+def test_constrained_decoding():
+    builder = DocumentBuilder("test")
+    tokens = [
+        Token(text, idx)
+        for idx, text in enumerate(["The", "European", "Union", "met", "in", "Paris"])
+    ]
+    sentence = builder.create_sentence(tokens)
+    m0 = Mention.create(sentence, tokens[1:3], NAME, ORG)
+    m1 = Mention.create(sentence, tokens[5:6], NAME, LOC)
+    builder.add_mentions([m0, m1])
+    doc = builder.build()
+
+    feature_params = {"baseline": {"window": [-1, 0, 1], "token_identity": {}}}
+    annotator = _create_annotator(feature_params)
+    annotator.train([doc], algorithm="ap", train_params={"max_iterations": 20})
+    assert not annotator.constrained_decoding
+
+    # Same predictions as the tagger when its output is valid
+    decoder = ConstrainedDecoder(annotator._tagger, annotator.mention_encoder)
+    sent_x = annotator.feature_extractor.extract(sentence, doc)
+    assert decoder.decode(sent_x) == annotator._tagger.tag(sent_x)
+    assert decoder.decode([]) == []
+    annotator.constrained_decoding = True
+    pred_doc = annotator.add_mentions(doc.copy_without_mentions())
+    assert pred_doc.mentions == (m0, m1)
+
+    # The setting is kept when serializing
+    deserialized_annotator = CRFSuiteAnnotator.from_bytes(annotator.to_bytes())
+    assert deserialized_annotator.constrained_decoding
+    pred_doc = deserialized_annotator.add_mentions(doc.copy_without_mentions())
+    assert pred_doc.mentions == (m0, m1)
+
+
+def test_viterbi():
+    # Labels are O, B, I. The best unconstrained path starts with I.
+    state_scores = np.array([[0.0, 1.0, 2.0], [0.0, 0.0, 1.0]])
+    transition_scores = np.zeros((3, 3))
+    no_constraints = np.zeros(3)
+    assert list(
+        viterbi(state_scores, transition_scores, no_constraints, no_constraints)
+    ) == [2, 2]
+
+    # Inside cannot start a sentence or follow outside
+    start_scores = np.array([0.0, 0.0, -np.inf])
+    transition_scores[0, 2] = -np.inf
+    assert list(
+        viterbi(state_scores, transition_scores, start_scores, no_constraints)
+    ) == [1, 2]
+
 
 def _create_annotator(feature_params: Mapping) -> CRFSuiteAnnotator:
     return CRFSuiteAnnotator.for_training(
@@ -1,9 +1,23 @@
 import os
+import pickle
 from tempfile import TemporaryDirectory
 
+import attr
 import pytest
-
-from nerpy import DocumentBuilder, EntityType, Mention, MentionType, Sentence, Token
+from attr.exceptions import FrozenInstanceError
+from immutabledict import immutabledict
+
+from nerpy import (
+    CompactSentence,
+    Document,
+    DocumentBuilder,
+    EntityType,
+    Mention,
+    MentionType,
+    Sentence,
+    Token,
+    TokenVocabulary,
+)
 from nerpy.io import (
     load_pickled_document,
     load_pickled_documents,
@@ -161,6 +175,179 @@ def test_sentence_mentions() -> None:
         m2.tokenized_text(s2)
 
 
+def test_unchecked_document() -> None:
+    def build(trusted: bool) -> Document:
+        builder = DocumentBuilder("test", trusted=trusted)
+        s1 = builder.create_sentence([Token("a", 0), Token("b", 1), Token("c", 2)])
+        s2 = builder.create_sentence([Token("d", 0)])
+        # Out of order, since the builder sorts them
+        builder.add_mention(Mention(s2.index, 0, 1, NAME, PER))
+        builder.add_mention(Mention(s1.index, 1, 3, NAME, MISC))
+        builder.add_mention(Mention(s1.index, 0, 1, NAME, PER))
+        return builder.build()
+
+    checked = build(False)
+    trusted = build(True)
+    assert trusted == checked
+    assert trusted.mentions == checked.mentions
+    assert list(trusted.sentences_with_mentions()) == list(
+        checked.sentences_with_mentions()
+    )
+    assert isinstance(trusted.sentences, tuple)
+    assert isinstance(trusted.properties, immutabledict)
+
+    tok = Token.create_unchecked("a", 0, immutabledict({"pos": "DT"}))
+    assert tok == Token("a", 0, {"pos": "DT"})
+    assert hash(tok) == hash(Token("a", 0, {"pos": "DT"}))
+    mention = Mention.create_unchecked(0, 0, 1, NAME, PER)
+    assert mention == Mention(0, 0, 1, NAME, PER)
+    assert hash(mention) == hash(Mention(0, 0, 1, NAME, PER))
+    # Still immutable
+    with pytest.raises(FrozenInstanceError):
+        mention.start = 1  # type: ignore
+
+    # Copies sort their mentions
+    copy = checked.copy_with_mentions(reversed(checked.mentions))
+    assert copy == checked
+    assert copy.mentions_for_sentence(checked[1]) == checked.mentions[2:]
+    assert checked.copy_without_mentions().mentions == ()
+    assert checked.copy_without_mentions().mentions_for_sentence(checked[0]) == ()
+
+
+def test_sentence_mentions_storage() -> None:
+    builder = DocumentBuilder("test")
+    s1 = builder.create_sentence([Token("a", 0), Token("b", 1), Token("c", 2)])
+    s2 = builder.create_sentence([Token("d", 0)])
+    m1 = Mention(s1.index, 0, 1, NAME, PER)
+    m2 = Mention(s1.index, 1, 3, NAME, MISC)
+    m3 = Mention(s2.index, 0, 1, NAME, PER)
+    doc = Document("test", [s1, s2], [m3, m2, m1])
+    assert doc.mentions == (m1, m2, m3)
+    assert doc == Document("test", [s1, s2], [m1, m2, m3])
+    assert "mentions=" in repr(doc)
+    with pytest.raises(ValueError):
+        Document("test", [s1], [m3])
+
+    # Mentions given by sentence are sorted within each sentence
+    copy = doc.copy_without_mentions().copy_with_sentence_mentions([[m2, m1], [m3]])
+    assert copy == doc
+    assert copy.mentions_for_sentence(s1) == (m1, m2)
+    # Wrong sentence or number of sentences
+    with pytest.raises(ValueError):
+        doc.copy_with_sentence_mentions([[m3], []])
+    with pytest.raises(ValueError):
+        doc.copy_with_sentence_mentions([[m1, m2]])
+
+    copy = pickle.loads(pickle.dumps(doc))
+    assert copy == doc
+    assert copy.mentions_for_sentence(s2) == (m3,)
+
+    # Mentions round-trip through copies and attr.evolve
+    assert doc.copy_without_mentions().copy_with_mentions(doc.mentions) == doc
+    assert attr.evolve(doc) == doc
+    evolved = attr.evolve(doc, properties={"source": "test"})
+    assert evolved.mentions == doc.mentions
+    assert evolved.mentions_for_sentence(s2) == (m3,)
+    assert evolved.properties == {"source": "test"}
+    assert Document("test", [s1, s2], sentence_mentions=[[m2, m1], [m3]]) == doc
+    # Mentions are replaced with copy_with_mentions rather than attr.evolve
+    with pytest.raises(ValueError):
+        attr.evolve(doc, mentions=[m1])
+    # Including empty mentions, which must not leave the old mentions in place
+    with pytest.raises(ValueError):
+        attr.evolve(doc, mentions=())
+    with pytest.raises(ValueError):
+        attr.evolve(doc, mentions=[])
+    assert Document("test", [s1, s2], None) == doc.copy_without_mentions()
+    with pytest.raises(ValueError):
+        Document("test", [s1, s2], sentence_mentions=[[m1, m2]])
+
+    # Documents pickled when mentions were also stored in one tuple
+    old_doc = Document.__new__(Document)
+    old_doc.__setstate__(
+        (
+            doc.id,
+            doc.sentences,
+            doc.mentions,
+            doc.properties,
+            doc.metadata,
+            ((m1, m2), (m3,)),
+        )
+    )
+    assert old_doc == doc
+    assert old_doc.mentions == doc.mentions
+
+
+def test_compact_sentence() -> None:
+    builder = DocumentBuilder("test", properties={"foo": "bar"})
+    s1 = builder.create_sentence(
+        [
+            Token.create("The", 0, pos_tag="DT", chunk_tag="B-NP"),
+            Token.create("dog", 1, pos_tag="NN", chunk_tag="I-NP"),
+            Token("barked", 2),
+        ]
+    )
+    s2 = builder.create_sentence([Token.create("The", 0, pos_tag="DT")])
+    m1 = Mention(s1.index, 1, 2, NAME, PER)
+    builder.add_mention(m1)
+    doc = builder.build()
+
+    vocabulary = TokenVocabulary()
+    compact_doc = vocabulary.compact_document(doc)
+    c1, c2 = compact_doc
+    assert isinstance(c1, CompactSentence)
+    assert isinstance(c2, CompactSentence)
+    assert compact_doc == doc
+    assert c1 == s1 and s1 == c1
+    assert c1 != s2
+    assert hash(c1) == hash(s1)
+    assert c1.index == s1.index
+    assert c2.index == s2.index
+    assert len(c1) == 3
+    assert c1.tokens == s1.tokens
+    assert list(c1) == list(s1)
+    assert c1[-1] == s1[-1]
+    assert c1[1].index == 1
+    assert c1[1:] == s1[1:]
+    assert c1[::-1] == s1[::-1]
+    assert c1[5:] == ()
+    with pytest.raises(IndexError):
+        c1[3]
+    assert str(c1) == str(s1)
+    assert c1.texts == ["The", "dog", "barked"]
+    # Vocabularies are shared between sentences
+    assert c1.text_ids.tolist() == [0, 1, 2]
+    assert c2.text_ids.tolist() == [0]
+    assert c1[0].text is c2[0].text
+    with pytest.raises(ValueError):
+        c1.ids[0, 0] = 1
+
+    # Mentions work the same way on compact documents
+    assert compact_doc.mentions_for_sentence(c1) == (m1,)
+    assert m1.tokens(compact_doc) == m1.tokens(doc)
+    assert m1.tokenized_text(c1) == "dog"
+
+    # Pickled sentences share their vocabulary
+    c1_copy, c2_copy = pickle.loads(pickle.dumps(compact_doc)).sentences
+    assert isinstance(c1_copy, CompactSentence)
+    assert c1_copy == c1
+    assert c1_copy.vocabulary is c2_copy.vocabulary
+
+    # Sentences can also be created from texts and tags
+    c3 = vocabulary.create_sentence(["The", "cat"], 0, pos_tags=["DT", "NN"])
+    assert c3 == Sentence(
+        [Token.create("The", 0, pos_tag="DT"), Token.create("cat", 1, pos_tag="NN")], 0
+    )
+    with pytest.raises(ValueError):
+        vocabulary.create_sentence(["The", ""], 0)
+    with pytest.raises(ValueError):
+        vocabulary.create_sentence(["The"], 0, chunk_tags=["B-NP", "I-NP"])
+    with pytest.raises(ValueError):
+        vocabulary.compact_sentence(
+            Sentence([Token.create("dogs", 0, lemmas=["dog"])], 0)
+        )
+
+
 def test_token_properties() -> None:
     # Exercise all token fields
     tok = Token.create(
@@ -179,6 +366,24 @@ def test_token_properties() -> None:
     assert tok.properties["foo"] == "bar"
 
 
+def test_interned_tokens() -> None:
+    tok1 = Token.create("".join(["do", "gs"]), 0, pos_tag="NNS", chunk_tag="B-NP")
+    tok2 = Token.create("dogs", 1, pos_tag="NNS", chunk_tag="B-NP")
+    assert tok1.text is tok2.text
+    assert tok1.properties is tok2.properties
+    assert Token("cats", 0, tok1.properties).properties is tok1.properties
+    assert Token("dogs", 0).properties is Token("cats", 0, {}).properties
+
+    # Different values, including equal values of different types, are not shared
+    assert Token("dogs", 0, {"pos": "NN"}).properties != tok1.properties
+    int_properties = Token("dogs", 0, {"n": 1}).properties
+    bool_properties = Token("dogs", 0, {"n": True}).properties
+    assert int_properties is not bool_properties
+    assert bool_properties["n"] is True
+    # Unhashable values are still allowed
+    assert Token("dogs", 0, {"senses": ["dog.n.01"]}).properties["senses"] == ["dog.n.01"]
+
+
 def test_entity_type() -> None:
     for type_class in (EntityType, MentionType):
         # Simple type, by string or iterable
@@ -210,6 +415,19 @@ def test_entity_type() -> None:
         with pytest.raises(TypeError):
             type_class(7)  # type: ignore
 
+        # Shared instances
+        t4 = type_class.of("foo")
+        assert t4 is type_class.of(["foo"])
+        assert t4 == t1
+        assert hash(t4) == hash(t1)
+        assert type(t4) is type_class
+        assert pickle.loads(pickle.dumps(t1)) is t4
+        with pytest.raises(ValueError):
+            type_class.of("")
+
+    # Each class has its own instances
+    assert MentionType.of("foo") is not EntityType.of("foo")
+
 
 def test_bad_token() -> None:
     with pytest.raises(ValueError):
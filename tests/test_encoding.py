@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 
 from nerpy import (
@@ -369,3 +370,128 @@ def test_get_mention_encoder():
     assert get_mention_encoder("IOBES") == BIOES
     with pytest.raises(ValueError):
         get_mention_encoder("unknown")
+
+
+def test_label_ids():
+    encoder = BILOU()
+    inventory = encoder.label_inventory
+    assert inventory.labels == ["O"]
+
+    m1 = Mention.create(s1, [t1, t2, t3], NAME, PER)
+    m2 = Mention.create(s1, [t5], NAME, LOC)
+    label_ids = encoder.encode_mention_ids(s1, [m1, m2])
+    assert [inventory.labels[label_id] for label_id in label_ids] == [
+        "B-PER",
+        "I-PER",
+        "L-PER",
+        "O",
+        "U-LOC",
+        "O",
+        "O",
+    ]
+    assert encoder.decode_mention_ids(s1, label_ids) == [m1, m2]
+
+    # Label IDs are stable and shared with string labels
+    assert inventory.label_id("B-PER") == label_ids[0]
+    assert inventory.label_id("O") == 0
+    assert encoder.encode_mention_ids(s1, [m1, m2]) == label_ids
+    assert len(inventory) == 5
+
+    # Decoded mentions share a single instance of each entity type
+    decoded = encoder.decode_mentions(s1, ["U-PER", "O", "B-PER", "L-PER", "O", "O", "O"])
+    assert decoded[0].entity_type is decoded[1].entity_type
+
+    # Bad labels are not added
+    with pytest.raises(ValueError):
+        inventory.label_id("X-PER")
+    assert len(inventory) == 6
+
+
+def test_corpus_label_ids():
+    builder1 = DocumentBuilder("doc1")
+    s1_1 = builder1.create_sentence([t1, t2, t3])
+    s1_2 = builder1.create_sentence([t1, t2])
+    m1 = Mention.create(s1_1, [t1], NAME, PER)
+    m2 = Mention.create(s1_1, [t2, t3], NAME, PER)
+    m3 = Mention.create(s1_2, [t1, t2], NAME, LOC)
+    doc1 = builder1.add_mentions([m1, m2, m3]).build()
+    builder2 = DocumentBuilder("doc2")
+    builder2.create_sentence([t1, t2, t3, t4])
+    doc2 = builder2.build()
+    docs = [doc1, doc2]
+
+    for encoder in (IOB(), BILOU()):
+        label_ids, offsets = encoder.encode_corpus(docs)
+        assert label_ids.dtype == np.int32
+        assert list(offsets) == [0, 3, 5, 9]
+        # Same labels as encoding each sentence
+        expected = [
+            label
+            for doc in docs
+            for sentence, mentions in doc.sentences_with_mentions()
+            for label in encoder.encode_mentions(sentence, mentions)
+        ]
+        inventory = encoder.label_inventory
+        assert list(inventory.label_array(label_ids)) == expected
+        assert inventory.label_counts(label_ids)["O"] == 4
+        decoded = encoder.decode_corpus(
+            [doc.copy_without_mentions() for doc in docs], label_ids, offsets
+        )
+        assert decoded == docs
+
+    encoder = IOB()
+    label_ids, offsets = encoder.encode_corpus(docs)
+    assert list(encoder.label_inventory.label_array(label_ids[:3])) == [
+        "I-PER",
+        "B-PER",
+        "I-PER",
+    ]
+    # Labels added after the array of labels was created are included
+    new_id = encoder.label_inventory.label_id("B-MISC")
+    assert list(encoder.label_inventory.label_array(np.array([new_id, 0]))) == [
+        "B-MISC",
+        "O",
+    ]
+
+    # Offsets must match the documents
+    with pytest.raises(ValueError):
+        encoder.decode_corpus([doc1], label_ids, offsets)
+    with pytest.raises(ValueError):
+        encoder.decode_corpus([doc2, doc1], label_ids, offsets)
+
+    # Nested mentions cannot be encoded
+    builder = DocumentBuilder("nested")
+    sentence = builder.create_sentence([t1, t2])
+    builder.add_mentions(
+        [
+            Mention.create(sentence, [t1, t2], NAME, PER),
+            Mention.create(sentence, [t2], NAME, PER),
+        ]
+    )
+    with pytest.raises(ValueError):
+        encoder.encode_corpus([builder.build()])
+
+
+def test_transition_constraints():
+    labels = ["O", "B-PER", "I-PER", "I-LOC"]
+    starts, transitions, ends = BIO().transition_constraints(labels)
+    assert list(starts) == [True, True, False, False]
+    assert list(ends) == [True, True, True, True]
+    assert list(transitions[0]) == [True, True, False, False]
+    assert list(transitions[1]) == [True, True, True, False]
+    assert list(transitions[3]) == [True, True, False, True]
+
+    labels = ["O", "B-PER", "I-PER", "L-PER", "U-PER", "L-LOC"]
+    starts, transitions, ends = BILOU().transition_constraints(labels)
+    assert list(starts) == [True, True, False, False, True, False]
+    assert list(ends) == [True, False, False, True, True, True]
+    assert list(transitions[1]) == [False, False, True, True, False, False]
+    assert list(transitions[4]) == [True, True, False, False, True, False]
+
+    labels = ["O", "B-PER", "I-PER", "I-LOC"]
+    starts, transitions, ends = IOB().transition_constraints(labels)
+    assert list(starts) == [True, False, True, True]
+    assert list(transitions[:, 1]) == [False, True, True, False]
+
+    starts, transitions, ends = IO().transition_constraints(["O", "I-PER", "I-LOC"])
+    assert starts.all() and transitions.all() and ends.all()
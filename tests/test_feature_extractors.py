@@ -1,12 +1,21 @@
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
 import pytest
+from quickvec import SqliteWordEmbedding
 
-from nerpy import DocumentBuilder, Token
+from nerpy import BIO, IO, DocumentBuilder, Token, TokenVocabulary
 from nerpy.features import (
     POS,
     AllCaps,
     AllNumeric,
     BrownClusterFeatures,
     ContainsNumber,
+    CorpusFeatureCache,
+    EmbeddingClusterFeatures,
     IsCapitalized,
     IsPunc,
     LengthValue,
@@ -18,6 +27,7 @@ from nerpy.features import (
     WordEmbeddingFeatures,
     WordShape,
 )
+from nerpy.ingest.conll import read_conll
 
 
 def test_word_vectors():
@@ -29,7 +39,8 @@ def test_word_vectors():
 
     token_features = {}
 
-    extractor = WordEmbeddingFeatures("tests/test_data/word_vectors.sqlite")
+    vectors_path = "tests/test_data/word_vectors.sqlite"
+    extractor = WordEmbeddingFeatures(vectors_path)
     extractor.extract(t0, -1, token_features)
     extractor.extract(t1, 0, token_features)
     extractor.extract(t2, 1, token_features)
@@ -66,6 +77,232 @@ def test_word_vectors():
     assert token_features["v[0]=1"] == pytest.approx(0.0026 * 2.0)
     assert token_features["v[0]=2"] == pytest.approx(0.0098 * 2.0)
 
+    # Preparing looks up all the tokens at once and gives the same features
+    tokens = [t0, t1, t2, t3, t4, Token("The", 5)]
+    expected = []
+    for token in tokens:
+        token_features = {}
+        extractor.extract(token, 0, token_features)
+        expected.append(token_features)
+    extractor = WordEmbeddingFeatures(vectors_path, scale=2.0)
+    extractor.prepare(tokens)
+    assert extractor._word_casing == {
+        "the": "the",
+        "Wikipedia": "Wikipedia",
+        "article": "article",
+        "foobar": None,
+        "The": "the",
+    }
+    assert extractor._vector_cache.info().currsize == 3
+    for token, token_expected in zip(tokens, expected):
+        token_features = {}
+        extractor.extract(token, 0, token_features)
+        assert token_features == token_expected
+    # Everything was already looked up
+    assert extractor._vector_cache.info().misses == 0
+
+    # Sentence extraction prepares the extractor
+    builder = DocumentBuilder("test")
+    sentence = builder.create_sentence([Token("the", 0), Token("article", 1)])
+    doc = builder.build()
+    feature_extractor = SentenceFeatureExtractor(
+        {"vectors": {"window": [0], "word_vectors": {"path": vectors_path}}}
+    )
+    features = feature_extractor.extract(sentence, doc)
+    assert features[1]["v[0]=0"] == pytest.approx(0.0050)
+    (vector_extractor,) = feature_extractor._preparing_extractors
+    assert vector_extractor._vector_cache.info().misses == 0
+
+
+def test_word_vectors_preloaded():
+    vectors_path = "tests/test_data/word_vectors.sqlite"
+    tokens = [
+        Token("the", 0),
+        Token("Wikipedia", 1),
+        Token("article", 2),
+        Token(".", 3),
+        Token("foobar", 4),
+        Token("The", 5),
+    ]
+    extractor = WordEmbeddingFeatures(vectors_path, scale=2.0)
+    expected = []
+    for token in tokens:
+        token_features = {}
+        extractor.extract(token, 0, token_features)
+        expected.append(token_features)
+
+    def extract_all(extractor: WordEmbeddingFeatures) -> list:
+        extractor.prepare(tokens)
+        features = []
+        for token in tokens:
+            token_features: Dict[str, float] = {}
+            extractor.extract(token, 0, token_features)
+            features.append(token_features)
+        return features
+
+    # Whole embedding in memory
+    extractor = WordEmbeddingFeatures(vectors_path, scale=2.0, preload=True)
+    assert extractor.preloaded
+    assert extract_all(extractor) == expected
+    # The vectors are not pickled, but are loaded again when unpickling
+    state = extractor.__getstate__()
+    assert state["_matrix"] is None and state["_rows"] is None
+    unpickled = pickle.loads(pickle.dumps(extractor))
+    assert unpickled.preloaded
+    assert extract_all(unpickled) == expected
+
+    # Only the requested words, so others are OOV
+    extractor = WordEmbeddingFeatures(vectors_path, scale=2.0)
+    extractor.preload(["THE", "article"])
+    assert extractor._rows.keys() == {"the", "article"}
+    features = extract_all(extractor)
+    assert features[0] == expected[0]
+    assert features[1] == {"v[0]=OOV": 1.0}
+    assert features[2] == expected[2]
+    assert features[5] == expected[5]
+    # Only the same words are loaded again when unpickling
+    unpickled = pickle.loads(pickle.dumps(extractor))
+    assert unpickled._rows.keys() == {"the", "article"}
+    assert extract_all(unpickled) == features
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        matrix_path = str(Path(tmpdirname, "matrix"))
+        # Creates the matrix
+        extractor = WordEmbeddingFeatures(
+            vectors_path, scale=2.0, matrix_path=matrix_path
+        )
+        assert isinstance(extractor._matrix, np.memmap)
+        assert extract_all(extractor) == expected
+        # Opens the existing matrix
+        extractor = WordEmbeddingFeatures(
+            vectors_path, scale=2.0, matrix_path=matrix_path
+        )
+        assert extract_all(extractor) == expected
+
+        # Pickling reopens the database and matrix
+        unpickled = pickle.loads(pickle.dumps(extractor))
+        assert isinstance(unpickled._matrix, np.memmap)
+        assert extract_all(unpickled) == expected
+
+    unpickled = pickle.loads(pickle.dumps(WordEmbeddingFeatures(vectors_path, scale=2.0)))
+    assert not unpickled.preloaded
+    assert extract_all(unpickled) == expected
+
+
+def test_word_vectors_reduced():
+    vectors_path = "tests/test_data/word_vectors.sqlite"
+    tokens = [Token("the", 0), Token("Wikipedia", 1), Token("article", 2)]
+    vectors = np.array(
+        [[0.0129, 0.0026, 0.0098], [0.0007, -0.0205, 0.0107], [0.0050, -0.0114, 0.0150]]
+    )
+
+    def extract_all(extractor: WordEmbeddingFeatures) -> list:
+        features = []
+        for token in tokens:
+            token_features: Dict[str, float] = {}
+            extractor.extract(token, 0, token_features)
+            features.append(token_features)
+        return features
+
+    # Projected to the first principal component
+    extractor = WordEmbeddingFeatures(vectors_path, projection_dim=1)
+    assert extractor.dim == 1
+    features = extract_all(extractor)
+    assert all(token_features.keys() == {"v[0]=0"} for token_features in features)
+    projected = np.array([token_features["v[0]=0"] for token_features in features])
+    centered = vectors - vectors.mean(axis=0)
+    component = np.linalg.svd(centered)[2][0]
+    assert np.abs(projected) == pytest.approx(np.abs(centered @ component), abs=1e-6)
+    # Pickling keeps the fitted projection
+    assert extract_all(pickle.loads(pickle.dumps(extractor))) == features
+
+    # Quantized into two buckets split at each dimension's median
+    extractor = WordEmbeddingFeatures(vectors_path, buckets=2)
+    assert extract_all(extractor) == [
+        {"v[0]=0:1": 1.0, "v[0]=1:1": 1.0, "v[0]=2:0": 1.0},
+        {"v[0]=0:0": 1.0, "v[0]=1:0": 1.0, "v[0]=2:0": 1.0},
+        {"v[0]=0:0": 1.0, "v[0]=1:0": 1.0, "v[0]=2:1": 1.0},
+    ]
+    extractor.fit(["Wikipedia", "article"])
+    assert extract_all(extractor)[2] == {
+        "v[0]=0:1": 1.0,
+        "v[0]=1:1": 1.0,
+        "v[0]=2:1": 1.0,
+    }
+
+    # Both together
+    extractor = WordEmbeddingFeatures(vectors_path, projection_dim=2, buckets=3)
+    features = extract_all(extractor)
+    assert all(len(token_features) == 2 for token_features in features)
+
+    with pytest.raises(ValueError):
+        WordEmbeddingFeatures(vectors_path, projection_dim=4)
+    with pytest.raises(ValueError):
+        WordEmbeddingFeatures(vectors_path, buckets=1)
+    with pytest.raises(ValueError):
+        WordEmbeddingFeatures(vectors_path, projection_dim=3, fit_size=2)
+
+
+def test_embedding_clusters():
+    # Two well-separated groups of words, each of which should be a cluster
+    vectors = {
+        "cat": [1.0, 0.1, 0.0],
+        "dog": [0.9, 0.2, 0.0],
+        "mouse": [1.0, 0.0, 0.1],
+        "paris": [0.0, 0.1, 1.0],
+        "london": [0.1, 0.0, 0.9],
+    }
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        text_path = Path(tmpdirname, "vectors.txt")
+        with open(text_path, "w", encoding="utf8") as text_file:
+            print(len(vectors), 3, file=text_file)
+            for word, vector in vectors.items():
+                print(word, *vector, file=text_file)
+        vectors_path = str(Path(tmpdirname, "vectors.sqlite"))
+        SqliteWordEmbedding.convert_text_format_to_db(text_path, vectors_path)
+        cache_dir = Path(tmpdirname, "cache")
+
+        extractor = EmbeddingClusterFeatures(
+            vectors_path, clusters=2, cache_dir=str(cache_dir)
+        )
+        clusters = {word: extractor.word_clusters[word] for word in vectors}
+        assert clusters["cat"] == clusters["dog"] == clusters["mouse"]
+        assert clusters["paris"] == clusters["london"] != clusters["cat"]
+
+        token_features = {}
+        extractor.extract(Token("Cat", 0), -1, token_features)
+        extractor.extract(Token("berlin", 1), 0, token_features)
+        assert token_features == {f"ec[-1]={clusters['cat'][0]}": 1.0, "ec[0]=OOV": 1.0}
+
+        # Cached assignments are reused
+        (cache_path,) = cache_dir.iterdir()
+        cached = EmbeddingClusterFeatures(
+            vectors_path, clusters=2, cache_dir=str(cache_dir)
+        )
+        assert cached.word_clusters == extractor.word_clusters
+        assert list(cache_dir.iterdir()) == [cache_path]
+
+        # Multiple assignments, nearest first
+        extractor = EmbeddingClusterFeatures(
+            vectors_path, clusters=2, assignments=2, cache_dir=str(cache_dir)
+        )
+        assert len(list(cache_dir.iterdir())) == 2
+        assert extractor.word_clusters["cat"] == (
+            clusters["cat"][0],
+            clusters["paris"][0],
+        )
+
+        # Only clustering some of the vocabulary
+        extractor = EmbeddingClusterFeatures(vectors_path, clusters=2, vocab_size=3)
+        assert extractor.word_clusters.keys() == {"cat", "dog", "mouse"}
+
+        with pytest.raises(ValueError):
+            EmbeddingClusterFeatures(vectors_path, clusters=6)
+        with pytest.raises(ValueError):
+            EmbeddingClusterFeatures(vectors_path, clusters=2, assignments=3)
+        with pytest.raises(ValueError):
+            EmbeddingClusterFeatures(vectors_path, clusters=0)
+
 
 def test_brown_clusters():
     clusters_path = "tests/test_data/test_clusters.paths"
@@ -86,6 +323,8 @@ def test_brown_clusters():
         "bc[0]=OOV": 1.0,
         "bc[1]=110110100110110100": 1.0,
     }
+    assert extractor.cluster_paths[extractor.word_clusters["the"]] == "10100"
+    assert len(extractor.cluster_paths) == len(set(extractor.cluster_paths))
 
     # Test specific prefixes
     token_features = {}
@@ -101,6 +340,23 @@ def test_brown_clusters():
         "bc[1]=11": 1.0,
     }
 
+    # Extractors pickled before clusters were stored by ID kept a path for each word
+    old_extractor = BrownClusterFeatures.__new__(BrownClusterFeatures)
+    old_extractor.__setstate__(
+        {
+            "use_full_paths": False,
+            "use_prefixes": True,
+            "prefixes": [1, 2],
+            "paths": {"the": "10100", "article": "110110100110110100"},
+        }
+    )
+    old_features: Dict[str, float] = {}
+    old_extractor.extract(t0, -1, old_features)
+    old_extractor.extract(t1, 0, old_features)
+    old_extractor.extract(t2, 1, old_features)
+    assert old_features == token_features
+    assert not hasattr(old_extractor, "paths")
+
     # Test all prefixes
     token_features = {}
     extractor = BrownClusterFeatures(clusters_path, use_prefixes=True)
@@ -407,3 +663,198 @@ def test_bad_feature():
     feature_params = {"baseline": {"window": [-1, 0, 1], "foo": {}}}
     with pytest.raises(ValueError):
         SentenceFeatureExtractor(feature_params)
+
+
+def test_feature_cache():
+    feature_params = {
+        "baseline": {
+            "window": [-2, -1, 0, 1, 2],
+            "token_identity": {},
+            "word_shape": {},
+            "length_weight": {},
+            "suffix": {"min_length": 1, "max_length": 3},
+        },
+        "pos": {"window": [0], "pos": {}},
+    }
+    builder = DocumentBuilder("test")
+    tokens = [
+        Token.create(text, idx, pos_tag="NN")
+        for idx, text in enumerate(["the", "cat", "saw", "the", "dog", "."])
+    ]
+    s1 = builder.create_sentence(tokens)
+    d = builder.build()
+
+    uncached_extractor = SentenceFeatureExtractor(feature_params, cache_size=0)
+    cached_extractor = SentenceFeatureExtractor(feature_params)
+    expected = uncached_extractor.extract(s1, d)
+    assert cached_extractor.extract(s1, d) == expected
+    # Extract again to use the cache for every token
+    assert cached_extractor.extract(s1, d) == expected
+
+    # One entry per token type (5) in each group of window positions (2)
+    info = cached_extractor.cache_info()
+    assert info.currsize == 10
+    assert info.misses == 10
+    # Each extraction looks up each of the 6 tokens once per group
+    assert info.hits == 2 * 6 * 2 - 10
+    assert uncached_extractor.cache_info().currsize == 0
+
+    # Cache size is bounded
+    small_extractor = SentenceFeatureExtractor(feature_params, cache_size=2)
+    assert small_extractor.extract(s1, d) == expected
+    assert small_extractor.cache_info().currsize == 2
+
+    small_extractor.clear_cache()
+    info = small_extractor.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (0, 0, 0)
+
+    with pytest.raises(ValueError):
+        SentenceFeatureExtractor(feature_params, cache_size=-1)
+
+
+def test_compact_sentence_features(monkeypatch):
+    text_params = {
+        "baseline": {
+            "window": [-1, 0, 1],
+            "token_identity": {},
+            "word_shape": {},
+            "suffix": {"min_length": 1, "max_length": 2},
+        },
+        "vectors": {
+            "window": [0],
+            "word_vectors": {"path": "tests/test_data/word_vectors.sqlite"},
+        },
+    }
+    pos_params = {
+        "baseline": {"window": [-1, 0, 1], "token_identity": {}},
+        "pos": {"window": [0], "pos": {}},
+    }
+    builder = DocumentBuilder("test")
+    tokens = [
+        Token.create(text, idx, pos_tag="NN")
+        for idx, text in enumerate(["the", "cat", "saw", "the", "dog", "."])
+    ]
+    s1 = builder.create_sentence(tokens)
+    d = builder.build()
+    vocabulary = TokenVocabulary()
+    c1 = vocabulary.compact_sentence(s1)
+
+    text_extractor = SentenceFeatureExtractor(text_params)
+    pos_extractor = SentenceFeatureExtractor(pos_params)
+    text_expected = SentenceFeatureExtractor(text_params).extract(s1, d)
+    pos_expected = SentenceFeatureExtractor(pos_params).extract(s1, d)
+    assert pos_extractor.extract(c1, d) == pos_expected
+
+    # Text-only extractors do not create tokens for compact sentences
+    def no_tokens(*_args: object) -> Token:
+        raise AssertionError("Token created")
+
+    monkeypatch.setattr(TokenVocabulary, "token", no_tokens)
+    assert text_extractor.extract(c1, d) == text_expected
+    # Texts share cache entries with tokens
+    assert text_extractor.extract(s1, d) == text_expected
+    assert text_extractor.cache_info().currsize == 5
+
+
+def test_unpickle_old_extractor():
+    feature_params = {
+        "baseline": {"window": [-1, 0, 1], "token_identity": {}, "word_shape": {}}
+    }
+    builder = DocumentBuilder("test")
+    s1 = builder.create_sentence([Token("foo", 0), Token("Bar", 1), Token("foo", 2)])
+    d = builder.build()
+    feature_extractor = SentenceFeatureExtractor(feature_params)
+    expected = feature_extractor.extract(s1, d)
+
+    # Extractors pickled before caching was added only stored their window features
+    old_extractor = SentenceFeatureExtractor.__new__(SentenceFeatureExtractor)
+    old_extractor.__setstate__({"window_features": feature_extractor.window_features})
+    assert old_extractor.vocabulary is None
+    assert old_extractor.extract(s1, d) == expected
+    # One entry per token type, shared by all positions
+    assert old_extractor.cache_info().currsize == 2
+
+
+def test_feature_ids():
+    feature_params = {"baseline": {"window": [-1, 0, 1], "token_identity": {}}}
+    builder = DocumentBuilder("test")
+    s1 = builder.create_sentence([Token("foo", 0), Token("bar", 1), Token("foo", 2)])
+    s2 = builder.create_sentence([Token("foo", 0), Token("baz", 1)])
+    d = builder.build()
+
+    feature_extractor = SentenceFeatureExtractor(feature_params, use_feature_ids=True)
+    vocabulary = feature_extractor.vocabulary
+    expected = feature_extractor.extract(s1, d)
+    ids = feature_extractor.extract_ids(s1, d)
+    assert all(isinstance(key, int) for token_ids in ids for key in token_ids)
+    assert feature_extractor.decode_ids(ids) == expected
+    # b, tkn[0]=foo, tkn[1]=bar, tkn[-1]=foo, tkn[0]=bar, tkn[1]=foo, tkn[-1]=bar
+    assert len(vocabulary) == 7
+    assert vocabulary.feature_name(vocabulary.feature_id("tkn[0]=bar")) == "tkn[0]=bar"
+
+    # Unknown features are dropped once the vocabulary is frozen
+    vocabulary.freeze()
+    assert feature_extractor.decode_ids(feature_extractor.extract_ids(s2, d)) == [
+        {"b": 1.0, "tkn[0]=foo": 1.0},
+        {"b": 1.0, "tkn[-1]=foo": 1.0},
+    ]
+    assert vocabulary.feature_id("tkn[0]=baz") is None
+    assert len(vocabulary) == 7
+
+    # Feature IDs can be enabled in the feature parameters
+    params_extractor = SentenceFeatureExtractor(
+        {"use_feature_ids": True, **feature_params}
+    )
+    assert params_extractor.vocabulary is not None
+    assert params_extractor.extract(s1, d) == expected
+
+    # Extractors without a vocabulary cannot produce IDs
+    with pytest.raises(ValueError):
+        SentenceFeatureExtractor(feature_params).extract_ids(s1, d)
+
+
+def test_corpus_feature_cache():
+    feature_params = {"baseline": {"window": [-1, 0, 1], "token_identity": {}}}
+    docs = read_conll(Path("tests", "test_data", "en_bio.txt"), BIO())
+    feature_extractor = SentenceFeatureExtractor(feature_params)
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        cache = CorpusFeatureCache.open_or_build(tmpdirname, feature_params, docs)
+        assert len(cache) == len(docs)
+        assert cache.document_ids == [doc.id for doc in docs]
+        assert list(cache) == [
+            [feature_extractor.extract(sentence, doc) for sentence in doc.sentences]
+            for doc in docs
+        ]
+        # The same corpus and parameters reuse the existing cache
+        assert (
+            CorpusFeatureCache.open_or_build(tmpdirname, feature_params, docs).path
+            == cache.path
+        )
+        # Different parameters get their own cache
+        other_params = {"baseline": {"window": [0], "token_identity": {}}}
+        assert (
+            CorpusFeatureCache.open_or_build(tmpdirname, other_params, docs).path
+            != cache.path
+        )
+
+        # Slices of the cache match extracting features from the documents directly
+        for encoder in (BIO(), IO()):
+            expected = [
+                (
+                    feature_extractor.extract(sentence, doc),
+                    encoder.encode_mentions(sentence, mentions),
+                )
+                for doc in (docs[1], docs[0])
+                for sentence, mentions in doc.sentences_with_mentions()
+            ]
+            training_data = cache.extracted_features(docs, encoder, [1, 0])
+            # Sentences are read lazily
+            assert iter(training_data) is training_data
+            assert list(training_data) == expected
+
+        # The documents must match the ones the cache was built from
+        with pytest.raises(ValueError):
+            list(cache.extracted_features(docs[1:], BIO()))
+        with pytest.raises(ValueError):
+            list(cache.extracted_features(docs[::-1], BIO()))
@@ -1,7 +1,23 @@
+import pickle
 import tempfile
+from pathlib import Path
 
-from nerpy import DocumentBuilder, Token
-from nerpy.io import load_json, load_pickled_documents, pickle_documents
+import pytest
+
+from nerpy import BIO, IOB, Document, DocumentBuilder, Token
+from nerpy.ingest.conll import read_conll
+from nerpy.io import (
+    ColumnarCorpus,
+    IndexedCorpus,
+    load_columnar_documents,
+    load_documents,
+    load_indexed_documents,
+    load_json,
+    load_pickled_documents,
+    pickle_documents,
+    write_columnar_documents,
+    write_indexed_documents,
+)
 
 
 def test_pickling():
@@ -17,6 +33,94 @@ def test_pickling():
         pickled_docs = load_pickled_documents(filename)
 
         assert pickled_docs == [doc]
+        assert load_documents(filename) == [doc]
+
+
+def test_columnar():
+    docs = read_conll(Path("tests", "test_data", "en_bio.txt"), BIO())
+    docs.extend(read_conll(Path("tests", "test_data", "deu_iob.txt"), IOB()))
+    builder = DocumentBuilder("props")
+    builder.create_sentence([Token("foo", 0)])
+    docs.append(
+        Document("props", builder.build().sentences, properties={"genre": "news"})
+    )
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = Path(tmpdirname, "corpus")
+        write_columnar_documents(docs, path)
+
+        for mmap in (True, False):
+            corpus = load_columnar_documents(path, mmap=mmap)
+            assert len(corpus) == len(docs)
+            assert list(corpus) == docs
+            assert corpus[0] == docs[0]
+            assert corpus[-1] == docs[-1]
+            assert corpus[-1].properties == {"genre": "news"}
+            assert corpus[1:3] == docs[1:3]
+            assert corpus.document_ids == tuple(doc.id for doc in docs)
+            assert corpus.by_id(docs[2].id) == docs[2]
+            # Mention types are shared across documents
+            assert (
+                corpus[0].mentions[0].mention_type is corpus[1].mentions[0].mention_type
+            )
+            with pytest.raises(IndexError):
+                corpus[len(docs)]
+
+        # Pickling only stores the path
+        corpus = load_documents(path)
+        assert isinstance(corpus, ColumnarCorpus)
+        buf = pickle.dumps(corpus)
+        assert len(buf) < 500
+        assert list(pickle.loads(buf)) == docs
+
+        # Empty corpus
+        empty_path = Path(tmpdirname, "empty")
+        write_columnar_documents([], empty_path)
+        assert len(load_columnar_documents(empty_path)) == 0
+
+        with pytest.raises(ValueError):
+            write_columnar_documents(
+                [_document_with_properties({"unhashable": []})], Path(tmpdirname, "bad")
+            )
+
+
+def test_indexed():
+    docs = read_conll(Path("tests", "test_data", "en_bio.txt"), BIO())
+    docs.extend(read_conll(Path("tests", "test_data", "deu_iob.txt"), IOB()))
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = Path(tmpdirname, "corpus")
+        write_indexed_documents(docs, path)
+
+        corpus = load_documents(path)
+        assert isinstance(corpus, IndexedCorpus)
+        assert len(corpus) == len(docs)
+        assert list(corpus) == docs
+        assert corpus[1] == docs[1]
+        assert corpus[-1] == docs[-1]
+        assert corpus[::2] == docs[::2]
+        assert corpus.by_id(docs[1].id) == docs[1]
+        with pytest.raises(KeyError):
+            corpus.by_id("missing")
+        with pytest.raises(IndexError):
+            corpus[len(docs)]
+        assert list(pickle.loads(pickle.dumps(corpus))) == docs
+
+        empty_path = Path(tmpdirname, "empty")
+        write_indexed_documents([], empty_path)
+        assert list(load_indexed_documents(empty_path)) == []
+
+        # Pickled lists are not indexed corpora
+        pickle_path = Path(tmpdirname, "pickle")
+        pickle_documents(docs, pickle_path)
+        with pytest.raises(ValueError):
+            load_indexed_documents(pickle_path)
+
+
+def _document_with_properties(properties: dict):
+    builder = DocumentBuilder("test")
+    builder.create_sentence([Token("foo", 0, properties)])
+    return builder.build()
 
 
 def test_json():
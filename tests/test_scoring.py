@@ -1,7 +1,18 @@
+import pickle
+from typing import List
+
+import numpy as np
 import pytest
 
 from nerpy import DocumentBuilder, EntityType, Mention, MentionType, Token
-from nerpy.scoring import ScoringCounts, score_prf
+from nerpy.scoring import (
+    Scorer,
+    ScoringCounts,
+    TypedDocumentCounts,
+    document_counts,
+    fscores,
+    score_prf,
+)
 
 NAME = MentionType("name")
 ORG = EntityType(types=("ORG",))
@@ -68,6 +79,89 @@ def test_scoring():
     assert res.type_scores[LOC].fscore == 0.6666666666666666
 
 
+def test_incremental_scoring():
+    system_doc = create_system_doc()
+    gold_doc = create_gold_doc()
+    empty_doc = gold_doc.copy_without_mentions()
+    gold_docs = [gold_doc, gold_doc, empty_doc]
+    system_docs = [system_doc, empty_doc, gold_doc]
+    expected = score_prf(gold_docs, system_docs)
+
+    scorer = Scorer()
+    for gold, system in zip(gold_docs, system_docs):
+        scorer.update(gold, system)
+    assert scorer.result() == expected
+
+    # Merging scorers for each document gives the same result
+    merged = Scorer()
+    for gold, system in zip(gold_docs, system_docs):
+        doc_scorer = Scorer()
+        doc_scorer.update(gold, system)
+        # Scorers can be sent between processes
+        merged.merge(pickle.loads(pickle.dumps(doc_scorer)))
+    assert merged.result() == expected
+    assert merged.type_counts[LOC].true_positives == 1
+    assert merged.type_counts[LOC].false_positives == 2
+    assert merged.type_counts[PER].false_negatives == 3
+
+    assert Scorer().result() == score_prf([], [])
+
+
+def test_document_counts():
+    system_doc = create_system_doc()
+    gold_doc = create_gold_doc()
+    empty_doc = gold_doc.copy_without_mentions()
+    gold_docs = [gold_doc, empty_doc, gold_doc]
+    system_docs = [system_doc, gold_doc, empty_doc]
+
+    counts = document_counts(gold_docs, system_docs)
+    assert counts.tolist() == [[3, 1, 2], [0, 5, 0], [0, 0, 5]]
+    assert fscores(counts).tolist() == [0.6666666666666665, 0.0, 0.0]
+    assert fscores(counts.sum(axis=0)) == score_prf(gold_docs, system_docs).score.fscore
+    assert document_counts([], []).shape == (0, 3)
+
+
+def test_typed_document_counts():
+    system_doc = create_system_doc()
+    gold_doc = create_gold_doc()
+    empty_doc = gold_doc.copy_without_mentions()
+    gold_docs = [gold_doc, empty_doc, gold_doc]
+    system_docs = [system_doc, gold_doc, empty_doc]
+
+    counts = TypedDocumentCounts.count(gold_docs, system_docs)
+    assert len(counts) == 3
+    assert counts.entity_types == (LOC, ORG, PER)
+    assert counts.counts.shape == (3, 3, 3)
+    assert counts.counts[0].tolist() == [[1, 1, 0], [1, 0, 1], [1, 0, 1]]
+    assert counts.totals().tolist() == document_counts(gold_docs, system_docs).tolist()
+    assert counts.type_totals().tolist() == [[1, 2, 1], [1, 2, 3], [1, 2, 3]]
+    # Weights count the first document twice and skip the last
+    assert counts.type_totals(np.array([[2, 1, 0]]))[0].tolist() == [
+        [2, 3, 0],
+        [2, 2, 2],
+        [2, 2, 2],
+    ]
+
+    # Scores match scoring the same documents
+    assert counts.result() == score_prf(gold_docs, system_docs)
+    for subset in ([0], [1, 2], [0, 2], np.array([True, False, True])):
+        subset_gold = [doc for doc, keep in zip(gold_docs, _mask(subset)) if keep]
+        subset_system = [doc for doc, keep in zip(system_docs, _mask(subset)) if keep]
+        expected = score_prf(subset_gold, subset_system)
+        assert counts.result(subset) == expected
+        assert counts.subset(subset).result() == expected
+    assert counts.subset([2, 1]).document_ids == ("test", "test")
+
+    empty = TypedDocumentCounts.count([], [])
+    assert empty.counts.shape == (0, 0, 3)
+    assert empty.result() == score_prf([], [])
+
+
+def _mask(subset) -> List[bool]:
+    indices = np.arange(3)[subset]
+    return [idx in indices for idx in range(3)]
+
+
 def test_scoring_counts():
     system_doc = create_system_doc()
     gold_doc = create_gold_doc()
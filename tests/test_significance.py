@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from nerpy.significance import approximate_randomization_test, paired_bootstrap_test
+
+TESTS = (paired_bootstrap_test, approximate_randomization_test)
+
+
+def _counts(seed: int) -> np.ndarray:
+    # True positives, false positives, and false negatives for 100 documents
+    return np.random.default_rng(seed).integers(0, 10, size=(100, 3))
+
+
+def test_identical_systems():
+    counts = _counts(0)
+    for test in TESTS:
+        result = test(counts, counts.copy(), samples=500, seed=0)
+        assert result.difference == 0.0
+        assert result.p_value == 1.0
+        assert result.samples == 500
+
+
+def test_different_systems():
+    counts1 = _counts(0)
+    # The second system finds every gold mention without any false positives
+    counts2 = np.zeros_like(counts1)
+    counts2[:, 0] = counts1[:, 0] + counts1[:, 2]
+    for test in TESTS:
+        result = test(counts1, counts2, samples=1000, seed=0)
+        assert result.fscore2 == 1.0
+        assert result.difference > 0.0
+        assert result.p_value == 1 / 1001
+
+        # Results are reproducible given a seed, including with multiple workers
+        assert test(counts1, counts2, samples=1000, seed=0) == result
+        assert test(counts1, counts2, samples=1000, seed=1, workers=2) == test(
+            counts1, counts2, samples=1000, seed=1, workers=2
+        )
+
+
+def test_close_systems():
+    counts1 = _counts(0)
+    counts2 = counts1.copy()
+    counts2[0, 0] += 1
+    for test in TESTS:
+        assert test(counts1, counts2, samples=1000, seed=0).p_value > 0.5
+
+
+def test_bad_counts():
+    counts = _counts(0)
+    for test in TESTS:
+        with pytest.raises(ValueError):
+            test(counts, counts[:-1])
+        with pytest.raises(ValueError):
+            test(counts[:, :2], counts[:, :2])
+        with pytest.raises(ValueError):
+            test(counts, counts, samples=0)